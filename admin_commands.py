@@ -0,0 +1,267 @@
+"""
+Commandes Telegram du bot admin
+
+Séparées de web_server pour que le rôle bot ne charge pas aiohttp/jinja2.
+"""
+import asyncio
+import logging
+
+from database import (
+    get_all_users, block_user, unblock_user,
+    get_user_by_email, bulk_update_users
+)
+from config import ADMIN_ID
+
+logger = logging.getLogger(__name__)
+
+def get_win_rate():
+    from bot_logic import state as bot_state
+    finished = bot_state.won_predictions + bot_state.lost_predictions
+    if finished == 0:
+        return 0
+    return round((bot_state.won_predictions / finished) * 100, 1)
+
+BULK_REPORT_LINES = 20
+
+async def handle_bulk_command(event, args):
+    """/bulk extend 30 a@x.com b@y.com | /bulk block filter:expired | CSV en pièce jointe"""
+    import subscriptions
+    
+    action = args[0].lower()
+    rest = args[1:]
+    days = None
+    if action == 'extend' and rest and rest[0].isdigit():
+        days, rest = rest[0], rest[1:]
+    
+    options = dict(arg.split(':', 1) for arg in rest if ':' in arg and '@' not in arg)
+    emails = [arg for arg in rest if '@' in arg]
+    csv_text = None
+    if event.message.document:
+        data = await event.message.download_media(bytes)
+        csv_text = data.decode('utf-8-sig')
+    
+    try:
+        bulk = subscriptions.build_request(
+            action, days=days, emails=emails or None, csv_text=csv_text,
+            user_filter=options.get('filter'), within_days=options.get('within', 7)
+        )
+    except subscriptions.BulkRequestError as e:
+        await event.reply(f"❌ Demande invalide: {e}")
+        return
+    
+    summary = await subscriptions.run(bulk)
+    msg = f"""👥 OPÉRATION GROUPÉE ({summary['action']}):
+
+✅ Mis à jour: {summary['updated']}
+❓ Inconnus: {summary['not_found']}
+⚠️ Invalides: {summary['invalid']}"""
+    failed = [r for r in summary['results'] if r['status'] != 'ok']
+    for r in failed[:BULK_REPORT_LINES]:
+        msg += f"\n• {r['email']} ({r['status']})"
+    if len(failed) > BULK_REPORT_LINES:
+        msg += f"\n… et {len(failed) - BULK_REPORT_LINES} autres"
+    await event.reply(msg)
+
+async def handle_admin_commands(event):
+    """Gère les commandes admin dans Telegram"""
+    if not event.is_private:
+        return
+    
+    sender_id = event.sender_id
+    if str(sender_id) != str(ADMIN_ID):
+        return
+    
+    text = event.message.message
+    parts = text.split()
+    command = parts[0].lower() if parts else ''
+    
+    try:
+        if command == '/list':
+            users = get_all_users()
+            msg = "📋 LISTE DES UTILISATEURS\n\n"
+            for u in users[:20]:  # Limite à 20
+                status = "🟢" if u['is_active'] else "🔴"
+                sub = u['subscription_end'][:10] if u['subscription_end'] else "Non abonné"
+                msg += f"{status} {u['first_name']} {u['last_name']}\n📧 {u['email']}\n📅 {sub}\n\n"
+            await event.reply(msg)
+            
+        elif command == '/add_time' and len(parts) >= 3:
+            email = parts[1]
+            days = int(parts[2])
+            rows = await asyncio.to_thread(bulk_update_users, 'extend', emails=[email.lower()], days=days)
+            if rows and rows[0]['id'] is not None:
+                await event.reply(f"✅ {days} jours ajoutés à {email}\nNouvelle date: {rows[0]['subscription_end']}")
+            else:
+                await event.reply(f"❌ Utilisateur {email} non trouvé")
+        
+        elif command == '/bulk' and len(parts) >= 2:
+            await handle_bulk_command(event, parts[1:])
+                
+        elif command == '/block' and len(parts) >= 2:
+            email = parts[1]
+            user = get_user_by_email(email)
+            if user:
+                block_user(user['id'])
+                await event.reply(f"🚫 {email} bloqué")
+            else:
+                await event.reply(f"❌ {email} non trouvé")
+                
+        elif command == '/unblock' and len(parts) >= 2:
+            email = parts[1]
+            user = get_user_by_email(email)
+            if user:
+                unblock_user(user['id'])
+                await event.reply(f"✅ {email} débloqué")
+            else:
+                await event.reply(f"❌ {email} non trouvé")
+                
+        elif command == '/clearall':
+            from database import clear_all_except_users
+            from bot_logic import state as bot_state
+            
+            # 1. Clear database
+            if clear_all_except_users():
+                # 2. Reset bot state
+                bot_state.predictions_enabled = True
+                bot_state.won_predictions = 0
+                bot_state.lost_predictions = 0
+                bot_state.total_predictions = 0
+                bot_state.prediction_history.clear()
+                bot_state.processed_messages.clear()
+                
+                # 3. Reset pause cycle
+                bot_state.pause_scheduler.reset()
+                
+                # 4. Clear verification state
+                bot_state.verification_state.reset()
+                from analytics import analytics
+                analytics.reset()
+                
+                import shared_state
+                import invalidation
+                shared_state.mark_dirty()
+                invalidation.publish('predictions_log', remote=False)
+                
+                await event.reply("✅ Système réinitialisé !\n- Base de données nettoyée (hors utilisateurs)\n- Compteurs à zéro\n- Prédictions automatiques reprises")
+            else:
+                await event.reply("❌ Erreur lors du nettoyage de la base de données")
+                
+        elif command == '/broadcast' and len(parts) >= 2:
+            from database import create_broadcast, BROADCAST_AUDIENCES
+            from broadcast import broadcaster
+            # /broadcast [all] <texte>: abonnés en cours par défaut
+            body = text.split(maxsplit=1)[1]
+            audience = 'subscribers'
+            if parts[1] in BROADCAST_AUDIENCES and len(parts) >= 3:
+                audience = parts[1]
+                body = body.split(maxsplit=1)[1]
+            row = await asyncio.to_thread(create_broadcast, body, audience)
+            broadcaster.start(row)
+            await event.reply(f"📣 Diffusion #{row['id']} lancée vers {row['total']} destinataires")
+        
+        elif command == '/broadcasts':
+            from database import list_broadcasts
+            from broadcast import broadcaster
+            msg = "📣 DIFFUSIONS:\n"
+            for b in await asyncio.to_thread(list_broadcasts, 5):
+                msg += f"\n#{b['id']} {b['status']} - {b['sent']}✅ {b['failed']}❌ / {b['total']} ({b['audience']})"
+            if broadcaster.flood_waits:
+                msg += f"\n\nFloodWait reçus: {broadcaster.flood_waits}"
+            await event.reply(msg)
+        
+        elif command == '/broadcast_cancel' and len(parts) >= 2:
+            from database import finish_broadcast
+            from broadcast import broadcaster
+            broadcast_id = int(parts[1])
+            if await asyncio.to_thread(finish_broadcast, broadcast_id, 'cancelled'):
+                broadcaster.cancel(broadcast_id)
+                await event.reply(f"⏹️ Diffusion #{broadcast_id} annulée")
+            else:
+                await event.reply(f"❌ Diffusion #{broadcast_id} non trouvée ou terminée")
+        
+        elif command == '/loophealth':
+            from loop_monitor import monitor
+            arg = parts[1].lower() if len(parts) >= 2 else ''
+            if arg == 'on':
+                monitor.configure(enabled=True)
+            elif arg == 'off':
+                monitor.configure(enabled=False)
+            elif arg.isdigit():
+                monitor.configure(threshold_ms=int(arg))
+            
+            snap = monitor.snapshot(with_stacks=False)
+            msg = f"""🩺 SANTÉ BOUCLE:
+
+État: {'ON' if snap['enabled'] else 'OFF'}
+Seuil: {snap['threshold_ms']} ms
+Retard actuel: {snap['last_lag_ms']} ms
+Retard max: {snap['max_lag_ms']} ms
+Blocages: {snap['stall_count']}"""
+            for r in snap['reports'][-5:]:
+                msg += f"\n• {r['time'][11:19]} {r['duration_ms']} ms - {r['culprit']}"
+            await event.reply(msg)
+            
+        elif command == '/help':
+            await event.reply("""📚 COMMANDES ADMIN:
+
+/list - Liste des utilisateurs
+/add_time <email> <jours> - Ajouter du temps
+/block <email> - Bloquer utilisateur
+/unblock <email> - Débloquer utilisateur
+/bulk <extend <jours>|block|unblock> <emails...|filter:<actifs>> - Opération groupée
+   (filtres: all, active, expiring [within:<jours>], expired, blocked; ou CSV email[,jours] en pièce jointe)
+/broadcast [all] <texte> - Message à tous les abonnés
+/broadcasts - Suivi des diffusions
+/broadcast_cancel <id> - Annuler une diffusion
+/stats - Statistiques
+/analytics - Détail par couleur, heure, rattrapage
+/loophealth [on|off|<ms>] - Santé de la boucle
+
+Exemple: /add_time user@email.com 7""")
+            
+        elif command == '/stats':
+            from bot_logic import state as bot_state
+            await event.reply(f"""📊 STATISTIQUES BOT:
+
+🎯 Prédictions: {bot_state.total_predictions}
+✅ Gagnés: {bot_state.won_predictions}
+❌ Perdus: {bot_state.lost_predictions}
+📈 Win Rate: {get_win_rate()}%
+🎮 Jeu actuel: #{bot_state.current_game_number}""")
+            
+        elif command == '/analytics':
+            from analytics import analytics
+            snap = analytics.snapshot()
+            rate = lambda r: f"{r}%" if r is not None else "-"
+            msg = f"""📈 ANALYSE DES PRÉDICTIONS:
+
+Total: {snap['total']['won']}✅ / {snap['total']['lost']}❌ ({rate(snap['total']['win_rate'])})
+
+Par couleur:"""
+            for suit, c in snap['by_suit'].items():
+                msg += f"\n{suit} {c['won']}✅ {c['lost']}❌ ({rate(c['win_rate'])})"
+            msg += "\n\nPar rattrapage (gagné au plus tard):"
+            for c in snap['by_rattrapage']:
+                msg += f"\n{c['rattrapage']}️⃣ {c['won']}✅ (cumul {rate(c['cumulative_win_rate'])})"
+            hours = [h for h in snap['by_hour'] if h['won'] + h['lost']]
+            if hours:
+                best = max(hours, key=lambda h: h['win_rate'])
+                worst = min(hours, key=lambda h: h['win_rate'])
+                msg += f"\n\nMeilleure heure: {best['hour']}h ({rate(best['win_rate'])})"
+                msg += f"\nPire heure: {worst['hour']}h ({rate(worst['win_rate'])})"
+            streaks = snap['streaks']
+            current = streaks['current']
+            if current['status']:
+                msg += f"\n\nSérie en cours: {current['length']} {'✅' if current['status'] == 'WON' else '❌'}"
+            msg += f"\nRecord: {streaks['best_won']}✅ / {streaks['best_lost']}❌"
+            await event.reply(msg)
+            
+        elif command == '/log':
+            if event.message.photo:
+                await event.message.download_media("static/logo.png")
+                await event.reply("✅ Logo mis à jour avec succès ! Le changement sera visible au prochain rafraîchissement de la page.")
+            else:
+                await event.reply("📷 Veuillez envoyer l'image avec la commande /log en légende.")
+            
+    except Exception as e:
+        await event.reply(f"❌ Erreur: {e}")
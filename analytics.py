@@ -0,0 +1,116 @@
+"""
+Statistiques détaillées des prédictions, tenues à jour en continu
+
+Agrégats incrémentaux (par couleur, par heure de résolution, par
+rattrapage, séries) mis à jour en temps constant à chaque résultat par
+bot_logic. Chargés une fois au démarrage depuis predictions_log
+(requête GROUP BY, voir database.get_prediction_aggregates) puis servis
+depuis la mémoire: /analytics (bot admin) et /api/admin/analytics (via
+l'instantané partagé) ne relisent jamais le journal.
+"""
+from datetime import datetime
+
+SUITS = ('♥', '♦', '♣', '♠')
+# Vérifications d'une prédiction: jeu prédit (0) puis 3 rattrapages
+CHECKS = 4
+
+
+def _rate(won: int, lost: int):
+    total = won + lost
+    return round(won / total * 100, 1) if total else None
+
+
+def _counts(won: int, lost: int) -> dict:
+    return {'won': won, 'lost': lost, 'win_rate': _rate(won, lost)}
+
+
+class Analytics:
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.won = 0
+        self.lost = 0
+        self.by_suit = {suit: [0, 0] for suit in SUITS}
+        self.by_hour = [[0, 0] for _ in range(24)]
+        self.won_at_check = [0] * CHECKS
+        self.streak_status = None
+        self.streak_length = 0
+        self.best_won_streak = 0
+        self.best_lost_streak = 0
+        self._snapshot = None
+
+    def record(self, suit: str, won: bool, rattrapage: int = 0, at: datetime = None):
+        """Un résultat (O(1)); rattrapage: indice de la vérification concluante"""
+        slot = 0 if won else 1
+        if won:
+            self.won += 1
+            self.won_at_check[min(max(rattrapage, 0), CHECKS - 1)] += 1
+        else:
+            self.lost += 1
+        self.by_suit.setdefault(suit, [0, 0])[slot] += 1
+        self.by_hour[(at or datetime.now()).hour][slot] += 1
+        self._extend_streak('WON' if won else 'LOST', 1)
+        self._snapshot = None
+
+    def _extend_streak(self, status: str, length: int):
+        if status == self.streak_status:
+            self.streak_length += length
+        else:
+            self.streak_status = status
+            self.streak_length = length
+        if status == 'WON':
+            self.best_won_streak = max(self.best_won_streak, self.streak_length)
+        else:
+            self.best_lost_streak = max(self.best_lost_streak, self.streak_length)
+
+    def load(self, groups, recent):
+        """Remplace les agrégats par ceux de la base
+
+        groups: (suit, hour, status, rattrapage, count); hour None pour les
+                mois résumés (predictions_rollup)
+        recent: statuts des derniers résultats, du plus ancien au plus récent
+                (séries calculées sur cette fenêtre)
+        """
+        self.reset()
+        for suit, hour, status, rattrapage, count in groups:
+            slot = 0 if status == 'WON' else 1
+            if slot == 0:
+                self.won += count
+                self.won_at_check[min(max(rattrapage or 0, 0), CHECKS - 1)] += count
+            else:
+                self.lost += count
+            self.by_suit.setdefault(suit, [0, 0])[slot] += count
+            if hour is not None:
+                self.by_hour[int(hour)][slot] += count
+        for status in recent:
+            self._extend_streak(status, 1)
+
+    def snapshot(self) -> dict:
+        """Dict JSON-sérialisable, reconstruit seulement après un nouveau résultat"""
+        if self._snapshot is None:
+            cumulative = 0
+            checks = []
+            for index, won in enumerate(self.won_at_check):
+                cumulative += won
+                checks.append({
+                    'rattrapage': index,
+                    'won': won,
+                    # Part des prédictions gagnées au plus tard à cette vérification
+                    'cumulative_win_rate': _rate(cumulative, self.won + self.lost - cumulative),
+                })
+            self._snapshot = {
+                'total': _counts(self.won, self.lost),
+                'by_suit': {suit: _counts(*counts) for suit, counts in self.by_suit.items()},
+                'by_hour': [dict(_counts(*counts), hour=hour) for hour, counts in enumerate(self.by_hour)],
+                'by_rattrapage': checks,
+                'streaks': {
+                    'current': {'status': self.streak_status, 'length': self.streak_length},
+                    'best_won': self.best_won_streak,
+                    'best_lost': self.best_lost_streak,
+                },
+            }
+        return self._snapshot
+
+
+analytics = Analytics()
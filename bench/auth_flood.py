@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Rafale de connexions: le serveur reste-t-il disponible avec la limitation ?
+
+Lance un serveur enfant avec le vrai middleware auth_rate_limit_middleware
+et une route /api/login qui fait le même PBKDF2 que verify_password (sans
+base de données), plus une tâche qui mesure le retard de la boucle
+(ce que subirait le bot Telegram dans le rôle "all"). Le parent inonde
+/api/login depuis --ips adresses simulées (X-Forwarded-For, PROXY_HOPS=1) avec des
+emails aléatoires, et sonde /ping pendant la rafale. Deux passes: sans
+limitation (seaux démesurés) puis avec la configuration par défaut.
+
+Usage: python bench/auth_flood.py [--duration 10] [--concurrency 64] [--ips 20]
+"""
+import os
+import sys
+import time
+import json
+import random
+import signal
+import asyncio
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from web_scaling import wait_ready
+
+UNLIMITED = {'AUTH_IP_BURST': '1e9', 'AUTH_IP_PER_MINUTE': '1e9',
+             'AUTH_EMAIL_BURST': '1e9', 'AUTH_EMAIL_PER_MINUTE': '1e9'}
+
+
+def serve(port: int):
+    """Mode enfant: middleware réel, login factice au coût PBKDF2 réel"""
+    import logging
+    from aiohttp import web
+    from database import hash_password, verify_password
+    from web_server import auth_rate_limit_middleware
+
+    logging.basicConfig(level=logging.WARNING)
+    stored = hash_password('correct horse')
+    lags = []
+
+    async def api_login(request):
+        data = await request.post()
+        ok = verify_password(stored, data.get('password') or '')
+        return web.json_response({'success': ok}, status=200 if ok else 401)
+
+    async def ping(request):
+        return web.Response(text='pong')
+
+    async def lag_report(request):
+        report = {'max_ms': max(lags, default=0) * 1000, 'samples': len(lags)}
+        lags.clear()
+        return web.json_response(report)
+
+    async def measure_lag(app):
+        async def ticker():
+            while True:
+                start = time.perf_counter()
+                await asyncio.sleep(0.01)
+                lags.append(time.perf_counter() - start - 0.01)
+        app['ticker'] = asyncio.ensure_future(ticker())
+
+    app = web.Application(middlewares=[auth_rate_limit_middleware])
+    app.router.add_post('/api/login', api_login)
+    app.router.add_get('/ping', ping)
+    app.router.add_get('/lag', lag_report)
+    app.on_startup.append(measure_lag)
+    web.run_app(app, host='127.0.0.1', port=port, print=None)
+
+
+async def flood(base: str, duration: float, concurrency: int, ips: int):
+    from aiohttp import ClientSession, TCPConnector
+    statuses = {}
+    pings = []
+    stop_at = time.monotonic() + duration
+    rng = random.Random(3)
+
+    async def attacker(http):
+        while time.monotonic() < stop_at:
+            headers = {'X-Forwarded-For': f"10.0.0.{rng.randrange(ips)}"}
+            form = {'email': f"user{rng.randrange(100000)}@example.com", 'password': 'hunter2'}
+            try:
+                async with http.post(f"{base}/api/login", data=form, headers=headers) as resp:
+                    await resp.read()
+                    statuses[resp.status] = statuses.get(resp.status, 0) + 1
+            except Exception:
+                statuses['erreur'] = statuses.get('erreur', 0) + 1
+
+    async def prober(http):
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            async with http.get(f"{base}/ping") as resp:
+                await resp.read()
+            pings.append(time.perf_counter() - start)
+            await asyncio.sleep(0.1)
+
+    async with ClientSession(connector=TCPConnector(limit=concurrency + 1)) as http:
+        await http.get(f"{base}/lag")  # remet la mesure à zéro
+        await asyncio.gather(prober(http), *(attacker(http) for _ in range(concurrency)))
+        async with http.get(f"{base}/lag") as resp:
+            lag = json.loads(await resp.text())
+
+    pings.sort()
+    pick = lambda q: pings[min(len(pings) - 1, int(q * len(pings)))] * 1000 if pings else 0
+    total = sum(statuses.values())
+    return {
+        'rps': total / duration,
+        'hashed': sum(n for s, n in statuses.items() if s in (200, 401)),
+        'rejected': statuses.get(429, 0),
+        'ping_p50_ms': pick(0.50),
+        'ping_p99_ms': pick(0.99),
+        'lag_max_ms': lag['max_ms'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--ips', type=int, default=20, help='adresses IP simulées')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port)
+        return
+
+    base = f"http://127.0.0.1:{args.port}"
+    print(f"Rafale /api/login: {args.concurrency} clients, {args.ips} IP, {args.duration}s")
+    print(f"{'limitation':>11} {'req/s':>8} {'PBKDF2':>8} {'429':>8} {'ping p50':>9} {'ping p99':>9} {'retard max':>11}")
+    for label, env in (('non', UNLIMITED), ('oui', {})):
+        proc = subprocess.Popen([sys.executable, __file__, '--serve', '--port', str(args.port)],
+                                cwd=ROOT, env=dict(os.environ, PROXY_HOPS='1', **env))
+        try:
+            asyncio.run(wait_ready(f"{base}/ping"))
+            r = asyncio.run(flood(base, args.duration, args.concurrency, args.ips))
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            proc.wait(timeout=30)
+        print(f"{label:>11} {r['rps']:>8.0f} {r['hashed']:>8} {r['rejected']:>8} {r['ping_p50_ms']:>8.1f}ms "
+              f"{r['ping_p99_ms']:>8.1f}ms {r['lag_max_ms']:>9.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Simulateur de diffusion: durée prévisible et boucle toujours disponible
+
+Envoie une diffusion à --recipients destinataires avec broadcast.Broadcaster
+sur le client factice (fake_telegram, latence --latency par envoi) et une
+base en mémoire. Un FloodWait de --flood-seconds est injecté tous les
+--flood-every messages. Pour chaque niveau de concurrence, compare la
+durée mesurée à la durée attendue (destinataires / débit + FloodWait),
+compte les allers-retours base (lots lus, paquets de statuts) et mesure
+le retard maximal de la boucle asyncio pendant l'envoi (ce que subirait
+le bot de prédiction dans le même process).
+
+Usage: python bench/broadcast_sim.py [--recipients 2000] [--rate 200]
+                                     [--concurrency 1,4,8,16] [--latency 0.05]
+                                     [--flood-every 500] [--flood-seconds 1]
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import logging
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_telegram import FakeClient, isolate_database
+
+
+class FloodWaitError(Exception):
+    """Même nom et attribut que l'erreur Telethon"""
+    def __init__(self, seconds):
+        super().__init__(f"A wait of {seconds} seconds is required")
+        self.seconds = seconds
+
+
+class FloodingClient(FakeClient):
+    def __init__(self, latency, flood_every, flood_seconds):
+        super().__init__(latency=latency)
+        self.flood_every = flood_every
+        self.flood_seconds = flood_seconds
+        self.calls = 0
+        self.floods = 0
+
+    async def send_message(self, entity, text):
+        self.calls += 1
+        if self.flood_every and self.calls % self.flood_every == 0:
+            self.floods += 1
+            raise FloodWaitError(self.flood_seconds)
+        return await super().send_message(entity, text)
+
+
+def install_broadcast_store(recipients: int):
+    """Fonctions de diffusion de database.py, en mémoire"""
+    db = isolate_database()
+    store = {'deliveries': {}, 'broadcast': None, 'fetches': 0, 'writes': 0}
+
+    def create(total):
+        store['deliveries'] = {uid: ['pending', 0] for uid in range(1, total + 1)}
+        store['broadcast'] = {'id': 1, 'text': 'Bonjour', 'audience': 'subscribers',
+                              'status': 'running', 'total': total, 'sent': 0, 'failed': 0}
+        return store['broadcast']
+
+    def get_broadcast_batch(broadcast_id, after_user_id=0, limit=500):
+        store['fetches'] += 1
+        rows = []
+        for uid, (status, attempts) in store['deliveries'].items():
+            if uid > after_user_id and status == 'pending':
+                rows.append((uid, 100000 + uid, attempts))
+                if len(rows) == limit:
+                    break
+        return rows
+
+    def record_broadcast_deliveries(broadcast_id, results):
+        store['writes'] += 1
+        for user_id, status, attempts, error in results:
+            store['deliveries'][user_id] = [status, attempts]
+            store['broadcast'][status] += 1
+
+    def finish_broadcast(broadcast_id, status='done'):
+        store['broadcast']['status'] = status
+        return True
+
+    db.get_broadcast_batch = get_broadcast_batch
+    db.record_broadcast_deliveries = record_broadcast_deliveries
+    db.finish_broadcast = finish_broadcast
+    store['create'] = create
+    return store
+
+
+async def measure_lag(stop: asyncio.Event, interval=0.01):
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, time.perf_counter() - start - interval)
+    return worst
+
+
+async def run(recipients, rate, concurrency, latency, flood_every, flood_seconds):
+    import broadcast
+    store = install_broadcast_store(recipients)
+    client = FloodingClient(latency, flood_every, flood_seconds)
+    runner = broadcast.Broadcaster(rate=rate, concurrency=concurrency)
+    runner.client = client
+
+    stop = asyncio.Event()
+    lag_task = asyncio.ensure_future(measure_lag(stop))
+    start = time.perf_counter()
+    runner.start(store['create'](recipients))
+    await asyncio.gather(*runner.tasks.values())
+    elapsed = time.perf_counter() - start
+    stop.set()
+    max_lag = await lag_task
+
+    b = store['broadcast']
+    # Débit limité par le seau à jetons ou par concurrence / latence
+    throughput = min(rate, concurrency / latency) if latency else rate
+    expected = recipients / throughput + client.floods * flood_seconds
+    return {
+        'elapsed': elapsed,
+        'expected': expected,
+        'sent': b['sent'],
+        'failed': b['failed'],
+        'floods': client.floods,
+        'msg_s': b['sent'] / elapsed,
+        'db_round_trips': store['fetches'] + store['writes'] + 1,
+        'max_lag_ms': max_lag * 1000,
+        'status': b['status'],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--recipients', type=int, default=2000)
+    parser.add_argument('--rate', type=float, default=200, help='débit global (msg/s)')
+    parser.add_argument('--concurrency', default='1,4,8,16', help='envois simultanés testés')
+    parser.add_argument('--latency', type=float, default=0.05, help='latence simulée d\'un envoi (s)')
+    parser.add_argument('--flood-every', type=int, default=500, help='FloodWait tous les N messages (0: jamais)')
+    parser.add_argument('--flood-seconds', type=float, default=1)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    import broadcast
+    broadcast.RETRY_DELAY = 0
+
+    print(f"Diffusion: {args.recipients} destinataires, {args.rate:.0f} msg/s max, "
+          f"latence {args.latency * 1000:.0f} ms, FloodWait {args.flood_seconds}s tous les {args.flood_every}")
+    print(f"{'concur.':>8} {'durée s':>8} {'attendu s':>9} {'écart':>7} {'msg/s':>7} {'envoyés':>8} "
+          f"{'échecs':>7} {'flood':>6} {'A/R base':>9} {'retard max ms':>14}")
+    for concurrency in [int(c) for c in args.concurrency.split(',')]:
+        r = asyncio.run(run(args.recipients, args.rate, concurrency, args.latency,
+                            args.flood_every, args.flood_seconds))
+        drift = (r['elapsed'] / r['expected'] - 1) * 100
+        print(f"{concurrency:>8} {r['elapsed']:>8.2f} {r['expected']:>9.2f} {drift:>+6.1f}% {r['msg_s']:>7.0f} "
+              f"{r['sent']:>8} {r['failed']:>7} {r['floods']:>6} {r['db_round_trips']:>9} {r['max_lag_ms']:>14.1f}")
+    print(f"\nA/R base d'un envoi un par un: {args.recipients * 2}")
+
+
+if __name__ == '__main__':
+    main()
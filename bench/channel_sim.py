@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Simulateur du canal source: débit soutenu par le bot et point de saturation
+
+Branche bot_logic.setup_handlers sur le client factice (fake_telegram) et
+une base en mémoire, puis publie des jeux réalistes dans le canal source:
+message ⏰ placeholder, édition avec cartes partielles, édition finale
+✅/🔰. Pour chaque cadence (jeux/s), mesure les jeux réellement traités
+par seconde, la latence de traitement (dépôt dans la file d'ingestion ->
+fin du worker), le nombre maximal de mises à jour en attente côté
+Telethon, la profondeur maximale de la file et les parsings évités par
+jeu (éditions regroupées ou sans changement utile). La saturation est la
+première cadence où le débit tombe sous 95 % de l'offre ou le p99
+dépasse --max-p99-ms.
+
+Usage: python bench/channel_sim.py [--rates 10,50,100,200,500]
+                                   [--duration 5] [--edits 1] [--edit-gap 0.05]
+                                   [--latency 0.05] [--sequential]
+"""
+import os
+import sys
+import time
+import random
+import asyncio
+import argparse
+import logging
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_telegram import FakeClient, events, isolate_database
+from microbench import game_messages
+
+SOURCE_CHANNEL_ID = -1001234567890
+ADMIN_ID = 42
+
+
+def new_bot(latency: float, sequential: bool):
+    """Client factice + bot_logic neuf (état remis à zéro)"""
+    isolate_database()
+    import bot_logic
+    bot_logic.state.__init__()
+    bot_logic.state.pause_config['cycle'] = [0]
+    client = FakeClient(latency=latency, sequential=sequential)
+    source_ids = {'SOURCE_CHANNEL_ID': SOURCE_CHANNEL_ID, 'SOURCE_CHANNEL_2_ID': None}
+    bot_logic.setup_handlers(client, {'ADMIN_ID': ADMIN_ID}, source_ids, events=events)
+
+    # Latence file + traitement: dépôt par le handler -> fin du worker
+    from ingestion import ingestion
+    apply = ingestion.handler
+    client.applied_times = []
+
+    async def timed(update):
+        await apply(update)
+        client.applied_times.append(time.perf_counter() - update.enqueued_at)
+    ingestion.configure(timed)
+    return client
+
+
+async def play_game(client, rng, game, edit_gap, edits):
+    placeholder, *updates = game_messages(rng, game, partials=edits)
+    msg_id = client.emit_new(SOURCE_CHANNEL_ID, placeholder)
+    for text in updates:
+        await asyncio.sleep(edit_gap)
+        client.emit_edit(SOURCE_CHANNEL_ID, msg_id, text)
+
+
+async def run_rate(rate, duration, edit_gap, latency, sequential, edits=1, seed=7):
+    client = new_bot(latency, sequential)
+    rng = random.Random(seed)
+    games = []
+    max_pending = 0
+    start = time.perf_counter()
+    interval = 1 / rate
+    game = 1
+    next_at = start
+    while time.perf_counter() - start < duration:
+        games.append(asyncio.ensure_future(play_game(client, rng, game, edit_gap, edits)))
+        game = game % 1440 + 1
+        max_pending = max(max_pending, client.pending)
+        next_at += interval
+        await asyncio.sleep(max(0, next_at - time.perf_counter()))
+    offered_time = time.perf_counter() - start
+    await asyncio.gather(*games)
+    await client.drain()
+    from ingestion import ingestion
+    await ingestion.drain()
+    # Le dernier jeu dure (edits + 1) * edit_gap même sans aucune attente
+    elapsed = time.perf_counter() - start - (edits + 1) * edit_gap
+    channels = ingestion.snapshot()['channels'].values()
+    max_depth = max((c['max_depth'] for c in channels), default=0)
+    saved = max((c['parses_saved_per_game'] for c in channels), default=0)
+    ingestion.stop()
+
+    times = sorted(client.applied_times)
+    pick = lambda q: times[min(len(times) - 1, int(q * len(times)))] * 1000 if times else 0
+    return {
+        'offered': len(games) / offered_time,
+        'achieved': len(games) / max(elapsed, offered_time),
+        'updates': len(times),
+        'p50_ms': pick(0.50),
+        'p99_ms': pick(0.99),
+        'max_pending': max_pending,
+        'max_depth': max_depth,
+        'saved_per_game': saved,
+        'predictions': len(client.sent),
+        'errors': client.handler_errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rates', default='10,50,100,200,500', help='cadences testées (jeux/s)')
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--edits', type=int, default=1, help='éditions ⏰ intermédiaires par jeu')
+    parser.add_argument('--edit-gap', type=float, default=0.05, help='secondes entre deux éditions d\'un jeu')
+    parser.add_argument('--latency', type=float, default=0.05, help='latence simulée des appels Telegram (s)')
+    parser.add_argument('--sequential', action='store_true', help='mises à jour traitées une par une')
+    parser.add_argument('--max-p99-ms', type=float, default=1000)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    print(f"Canal simulé: {args.edits + 2} mises à jour/jeu, édition toutes les {args.edit_gap}s, "
+          f"latence Telegram {args.latency * 1000:.0f} ms{', séquentiel' if args.sequential else ''}")
+    print(f"{'offre':>8} {'traité':>8} {'màj':>7} {'p50 ms':>8} {'p99 ms':>8} {'attente':>8} {'file':>6} {'prédic.':>8} {'écon./jeu':>9}")
+    saturation = None
+    for rate in [float(r) for r in args.rates.split(',')]:
+        r = asyncio.run(run_rate(rate, args.duration, args.edit_gap, args.latency, args.sequential, args.edits))
+        print(f"{r['offered']:>7.0f}/s {r['achieved']:>7.0f}/s {r['updates']:>7} {r['p50_ms']:>8.1f} "
+              f"{r['p99_ms']:>8.1f} {r['max_pending']:>8} {r['max_depth']:>6} {r['predictions']:>8} {r['saved_per_game']:>9}"
+              f"{'  ⚠️ ' + str(r['errors']) + ' erreurs' if r['errors'] else ''}")
+        if saturation is None and (r['achieved'] < 0.95 * r['offered'] or r['p99_ms'] > args.max_p99_ms):
+            saturation = rate
+    print(f"\nSaturation: {f'{saturation:.0f} jeux/s' if saturation else 'non atteinte'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Compression des réponses: octets économisés et coût CPU par route
+
+Construit des corps représentatifs (instantané /api/predictions avec 100
+prédictions, /api/admin/users pour --users abonnés, une page
+d'historique, les gabarits et fichiers statiques du dépôt) et mesure
+pour chaque encodage disponible (gzip, br si le module brotli est
+installé): taille, gain, temps de compression et coût d'un corps déjà
+en cache (empreinte seule).
+
+--check-static vérifie avec le vrai middleware (aiohttp requis) qu'un
+fichier statique servi en flux (/static/js/app.js) part en gzip quand le
+client l'accepte, et tel quel sinon ou sur une requête partielle; code
+de sortie 1 en cas d'échec.
+
+Usage: python bench/compression.py [--users 500] [--repeat 50] [--check-static]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import compression
+from records import PredictionRecord
+
+SUITS = ('♥', '♦', '♣', '♠')
+
+
+def bodies(users: int) -> dict:
+    rng = random.Random(5)
+    now = datetime(2026, 10, 19, 12)
+    predictions = [PredictionRecord(100 + i * 2, rng.choice(SUITS), rng.choice(('✅0️⃣', '✅1️⃣', '❌', '⏳')),
+                                    now - timedelta(minutes=3 * i)).to_dict() for i in range(100)]
+    snapshot = {
+        'predictions': predictions, 'total_predictions': 420, 'won_predictions': 350,
+        'lost_predictions': 70, 'win_rate': 83.3, 'current_game': 300, 'last_source_game': 300,
+        'pause_info': {'remaining_before_pause': '3/5', 'is_paused': False, 'remaining_pause_time': '0'},
+        'user': {'first_name': 'Awa', 'subscription_end': (now + timedelta(days=12)).isoformat()},
+        'timestamp': now.isoformat(),
+    }
+    admin_users = {'users': [{
+        'id': i, 'email': f"abonne{i}@example.com", 'first_name': f"Prénom{i}", 'last_name': f"Nom{i}",
+        'subscription_end': (now + timedelta(days=rng.randrange(-30, 60))).isoformat(),
+        'is_active': rng.random() > 0.05, 'created_at': (now - timedelta(days=rng.randrange(400))).isoformat(),
+        'is_admin': False, 'plain_password': f"{rng.randrange(10 ** 8):08d}",
+    } for i in range(users)]}
+    history = {'items': [{
+        'id': 9000 - i, 'game_number': 1440 - i * 2, 'suit': rng.choice(SUITS),
+        'status': rng.choice(('WON', 'LOST')), 'rattrapage': rng.randrange(4),
+        'created_at': (now - timedelta(minutes=3 * i)).isoformat(),
+        'resolved_at': (now - timedelta(minutes=3 * i - 1)).isoformat(),
+    } for i in range(50)], 'next_cursor': 'MjAyNi0xMC0xOVQwOTozMDowMHw4OTUw'}
+
+    result = {
+        '/api/predictions': json.dumps(snapshot).encode(),
+        '/api/admin/users': json.dumps(admin_users).encode(),
+        '/api/predictions/history': json.dumps(history).encode(),
+    }
+    for path in ('templates/index.html', 'templates/admin.html', 'static/js/app.js',
+                 'static/js/lang.js', 'static/css/style.css'):
+        with open(os.path.join(ROOT, path), 'rb') as f:
+            result['/' + path] = f.read()
+    return result
+
+
+def timed(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def check_static() -> list:
+    """Erreurs constatées sur /static/js/app.js servi par compression_middleware"""
+    from aiohttp import web
+    from aiohttp.test_utils import TestClient, TestServer
+    from web_server import compression_middleware
+
+    app = web.Application(middlewares=[compression_middleware])
+    app.router.add_static('/static/', path=os.path.join(ROOT, 'static'))
+    with open(os.path.join(ROOT, 'static/js/app.js'), 'rb') as f:
+        expected = f.read()
+
+    errors = []
+    cases = (
+        ('gzip accepté', {'Accept-Encoding': 'gzip, deflate'}, 'gzip'),
+        ('sans Accept-Encoding', {'Accept-Encoding': 'identity'}, None),
+        ('requête partielle', {'Accept-Encoding': 'gzip', 'Range': 'bytes=0-99'}, None),
+    )
+    async with TestClient(TestServer(app)) as client:
+        for label, headers, encoding in cases:
+            async with client.get('/static/js/app.js', headers=headers) as resp:
+                body = await resp.read()  # décompressé par le client
+                got = resp.headers.get('Content-Encoding')
+                print(f"{label:<22} {resp.status} Content-Encoding: {got or '-'}")
+                if got != encoding:
+                    errors.append(f"{label}: Content-Encoding {got!r}, attendu {encoding!r}")
+                if 'Range' not in headers and body != expected:
+                    errors.append(f"{label}: corps différent du fichier")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--users', type=int, default=500)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--check-static', action='store_true',
+                        help='vérifie la compression des fichiers statiques (aiohttp)')
+    args = parser.parse_args()
+
+    if args.check_static:
+        errors = asyncio.run(check_static())
+        for error in errors:
+            print(f"❌ {error}")
+        sys.exit(1 if errors else 0)
+
+    print(f"Encodages: {', '.join(compression.ENCODINGS)} | seuil {compression.COMPRESS_MIN_SIZE} o")
+    print(f"{'route':<28} {'enc.':>5} {'brut':>9} {'compressé':>10} {'gain':>6} {'CPU µs':>9} {'cache µs':>9}")
+    total_in = total_out = 0
+    for route, body in bodies(args.users).items():
+        for encoding in compression.ENCODINGS:
+            compressed = compression._compress(body, encoding)
+            cpu = timed(lambda: compression._compress(body, encoding), args.repeat)
+            compression.compress(body, encoding, route)  # remplit le cache
+            hit = timed(lambda: compression.compress(body, encoding, route), args.repeat)
+            if encoding == 'gzip':
+                total_in += len(body)
+                total_out += len(compressed)
+            print(f"{route:<28} {encoding:>5} {len(body):>9} {len(compressed):>10} "
+                  f"{(1 - len(compressed) / len(body)) * 100:>5.0f}% {cpu * 1e6:>9.0f} {hit * 1e6:>9.1f}")
+    print(f"\nTotal gzip: {total_in} -> {total_out} octets ({(1 - total_out / total_in) * 100:.0f}% économisés)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Tableau de bord: temps de script et écritures DOM par mise à jour (app.js)
+
+Exécute static/js/app.js (et lang.js) sous node, sur un DOM minimal qui
+compte les écritures (texte, styles, innerHTML et ses balises, insertions,
+retraits), avec une horloge virtuelle: les setInterval de initApp sont
+déclenchés à leur cadence réelle pendant --minutes, /api/predictions
+répond avec un instantané qui évolue comme le bot (nouvelle prédiction
+toutes les --predict-every secondes, résolue --resolve-after secondes
+plus tard), et la langue change deux fois en cours de session.
+--baseline REV rejoue la même session avec les fichiers d'une révision
+git (avant / après). En fin de session, le statut d'une ligne affichée
+change seul (même jeu, même couleur): le banc vérifie que la ligne est
+réécrite (code de sortie 1 sinon). Le DOM factice ne modélise ni le parsing HTML ni le
+layout du navigateur: les écritures comptées sont le bon indicateur du
+travail évité, les temps mesurent le script seul.
+
+Usage: python bench/dashboard_render.py [--minutes 30] [--baseline HEAD~1]
+"""
+import os
+import sys
+import re
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HARNESS = r"""
+const fs = require('fs');
+const vm = require('vm');
+const cfg = JSON.parse(fs.readFileSync(process.argv[2], 'utf8'));
+
+let mutations = 0;
+let fetches = 0;
+
+class El {
+    constructor(tag, id) {
+        this.tagName = tag;
+        this.id = id;
+        this.childNodes = [];
+        this.parentNode = null;
+        this._text = '';
+        this.dataset = {};
+        this.listeners = {};
+        this.disabled = false;
+        this.style = new Proxy({}, {
+            get: (t, k) => t[k] ?? '',
+            set: (t, k, v) => { mutations++; t[k] = v; return true; }
+        });
+        this.classList = { add: () => { mutations++; }, remove: () => { mutations++; } };
+    }
+    get textContent() { return this._text; }
+    set textContent(v) { mutations++; this._detach(); this._text = String(v); }
+    get innerHTML() { return this._text; }
+    set innerHTML(html) {
+        this._detach();
+        mutations += 1 + (html.match(/<[a-z]/gi) || []).length;
+        this._text = html;
+    }
+    get firstChild() { return this.childNodes[0] || null; }
+    get nextSibling() {
+        if (!this.parentNode) return null;
+        const siblings = this.parentNode.childNodes;
+        return siblings[siblings.indexOf(this) + 1] || null;
+    }
+    _detach() { this.childNodes.forEach(c => { c.parentNode = null; }); this.childNodes = []; }
+    _unlink(child) {
+        const i = this.childNodes.indexOf(child);
+        if (i >= 0) this.childNodes.splice(i, 1);
+        child.parentNode = null;
+    }
+    appendChild(child) { return this.insertBefore(child, null); }
+    insertBefore(child, ref) {
+        mutations++;
+        if (child.parentNode) child.parentNode._unlink(child);
+        const i = ref ? this.childNodes.indexOf(ref) : this.childNodes.length;
+        this.childNodes.splice(i, 0, child);
+        child.parentNode = this;
+        return child;
+    }
+    remove() { mutations++; if (this.parentNode) this.parentNode._unlink(this); }
+    addEventListener(type, fn) { (this.listeners[type] = this.listeners[type] || []).push(fn); }
+    querySelector() { return null; }
+}
+
+const byId = {};
+cfg.ids.forEach(id => { byId[id] = new El('div', id); });
+const translated = cfg.translate_keys.map(key => { const el = new El('span'); el.dataset.translate = key; return el; });
+
+// Instantané du bot
+const SUITS = ['♥', '♦', '♣', '♠'];
+const WINS = ['✅0️⃣', '✅1️⃣', '✅2️⃣', '❌'];
+let clock = 0;
+let version = 1;
+let game = 500;
+let won = 40, lost = 8;
+const predictions = [];
+const start = Date.parse('2026-10-19T12:00:00');
+for (let i = 0; i < 50; i++) predictions.push({
+    game_number: 400 + i * 2, suit: SUITS[i % 4], status: WINS[i % 4],
+    timestamp: new Date(start - (50 - i) * 60000).toISOString(), time_str: '12:00'
+});
+
+function advance(now) {
+    if (now % cfg.game_every === 0) { game++; version++; }
+    if (now % cfg.predict_every === 0) {
+        predictions.push({ game_number: game + 2, suit: SUITS[now % 4], status: '⏳',
+                           timestamp: new Date(start + now * 1000).toISOString(), time_str: '12:00' });
+        if (predictions.length > 50) predictions.shift();
+        version++;
+    }
+    const pending = predictions.find(p => p.status === '⏳');
+    if (pending && now % cfg.predict_every === cfg.resolve_after) {
+        pending.status = WINS[now % 4];
+        pending.status === '❌' ? lost++ : won++;
+        version++;
+    }
+}
+
+function payload() {
+    return JSON.stringify({
+        version, predictions, total_predictions: won + lost, won_predictions: won,
+        lost_predictions: lost, win_rate: Math.round(won / (won + lost) * 1000) / 10,
+        current_game: game, last_source_game: game,
+        pause_info: { remaining_before_pause: `${5 - (version % 5)}/5`, is_paused: false, remaining_pause_time: '0' },
+        user: { first_name: 'Awa', subscription_end: '2027-01-01T00:00:00' },
+        timestamp: new Date(start + clock * 1000).toISOString()
+    });
+}
+
+const intervals = [];
+const context = {
+    console, URLSearchParams, Intl, Date, Math, JSON, Promise, Map, Set, performance,
+    document: {
+        getElementById: id => byId[id] || null,
+        querySelectorAll: () => translated,
+        createElement: tag => new El(tag)
+    },
+    localStorage: { setItem() {}, getItem() { return null; } },
+    setInterval: (fn, ms) => { intervals.push({ fn, ms, next: ms }); return intervals.length; },
+    clearInterval: () => {},
+    fetch: async url => {
+        fetches++;
+        const bundle = /^\/lang\/(\w+)\.json/.exec(url);
+        const body = bundle ? cfg.bundles[bundle[1]] : payload();
+        return { ok: true, status: 200, json: async () => JSON.parse(body) };
+    }
+};
+context.window = context;
+context.window.location = { search: '' };
+vm.createContext(context);
+vm.runInContext(cfg.lang_js, context, { filename: 'lang.js' });
+vm.runInContext(cfg.app_js, context, { filename: 'app.js' });
+// Script en ligne du gabarit (paquet de la langue de la page)
+vm.runInContext(cfg.bootstrap, context);
+
+const settle = () => new Promise(resolve => setImmediate(resolve));
+const stats = {};
+function note(label, ms, muts, calls) {
+    const s = stats[label] = stats[label] || { times: [], mutations: 0, fetches: 0 };
+    s.times.push(ms); s.mutations += muts; s.fetches += calls;
+}
+async function measure(label, fn) {
+    const m0 = mutations, f0 = fetches, t0 = performance.now();
+    fn();
+    await settle();
+    note(label, performance.now() - t0, mutations - m0, fetches - f0);
+}
+
+(async () => {
+    await measure('init', () => vm.runInContext(`initApp('fr', {first_name: 'Awa', subscription_end: '2027-01-01T00:00:00'})`, context));
+    const switches = { [cfg.duration / 3 | 0]: 'en', [2 * cfg.duration / 3 | 0]: 'fr' };
+    for (clock = 1; clock <= cfg.duration; clock++) {
+        advance(clock);
+        for (const iv of intervals) {
+            if (clock * 1000 < iv.next) continue;
+            iv.next += iv.ms;
+            const label = iv.ms === 1000 ? 'timer' : iv.ms === 3000 ? 'poll' : `interval ${iv.ms / 1000}s`;
+            await measure(label, iv.fn);
+        }
+        if (switches[clock]) {
+            // onchange du <select> dans le gabarit, puis écouteurs ajoutés par app.js
+            const lang = switches[clock];
+            await measure('lang', () => {
+                context.changeLang(lang);
+                (byId.langSelect.listeners.change || []).forEach(fn => fn({ target: { value: lang } }));
+            });
+        }
+    }
+    // Contrôle: seul le statut d'une ligne déjà affichée change
+    const target = [...predictions].reverse().find(p => p.status !== '⏳' && p.status !== '❌');
+    target.status = '❌';
+    version++;
+    await measure('statut seul', intervals.find(iv => iv.ms === 3000).fn);
+    const row = byId.predictionsHistoryBody.childNodes.find(tr => tr._text.includes(`#${target.game_number}<`));
+    const statusCheck = Boolean(row && row._text.includes('status-lost'));
+
+    const out = {};
+    for (const [label, s] of Object.entries(stats)) {
+        const sorted = [...s.times].sort((a, b) => a - b);
+        out[label] = {
+            count: sorted.length,
+            mean_ms: sorted.reduce((a, b) => a + b, 0) / sorted.length,
+            p95_ms: sorted[Math.min(sorted.length - 1, Math.floor(0.95 * sorted.length))],
+            mutations: s.mutations / sorted.length,
+            fetches: s.fetches
+        };
+    }
+    out.total = { mutations, fetches, status_check: statusCheck };
+    process.stdout.write(JSON.stringify(out));
+})();
+"""
+
+
+def read_file(rev, path):
+    """Contenu d'un fichier du dépôt (rev None: copie de travail, '' si absent)"""
+    if rev is None:
+        full = os.path.join(ROOT, path)
+        if not os.path.exists(full):
+            return ''
+        with open(full, encoding='utf-8') as f:
+            return f.read()
+    result = subprocess.run(['git', 'show', f"{rev}:{path}"], cwd=ROOT, capture_output=True, text=True)
+    return result.stdout if result.returncode == 0 else ''
+
+
+def read_bundles(rev):
+    """Paquets static/lang/<code>.json (vide avant leur introduction)"""
+    return {lang: read_file(rev, f"static/lang/{lang}.json")
+            for lang in ('fr', 'en', 'es', 'ru', 'de', 'it', 'pt', 'ar', 'zh')
+            if read_file(rev, f"static/lang/{lang}.json")}
+
+
+def run(label, rev, args, workdir):
+    template = read_file(rev, 'templates/index.html')
+    lang_js = read_file(rev, 'static/js/lang.js')
+    bundles = read_bundles(rev)
+    bootstrap = ''
+    if 'registerTranslations' in lang_js:
+        bootstrap = f"registerTranslations('fr', {bundles['fr']}, 'v', {json.dumps(list(bundles))});"
+    cfg = {
+        'app_js': read_file(rev, 'static/js/app.js'), 'lang_js': lang_js,
+        'bundles': bundles, 'bootstrap': bootstrap,
+        'ids': re.findall(r'\bid="(\w+)"', template),
+        'translate_keys': re.findall(r'data-translate="(\w+)"', template),
+        'duration': int(args.minutes * 60), 'game_every': args.game_every,
+        'predict_every': args.predict_every, 'resolve_after': args.resolve_after,
+    }
+    cfg_path = os.path.join(workdir, f"{label}.json")
+    with open(cfg_path, 'w', encoding='utf-8') as f:
+        json.dump(cfg, f)
+    harness = os.path.join(workdir, 'harness.js')
+    out = subprocess.run(['node', harness, cfg_path], check=True, capture_output=True, text=True).stdout
+    return json.loads(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--minutes', type=float, default=30, help='durée de la session simulée')
+    parser.add_argument('--game-every', type=int, default=25, help='secondes entre deux jeux source')
+    parser.add_argument('--predict-every', type=int, default=60, help='secondes entre deux prédictions')
+    parser.add_argument('--resolve-after', type=int, default=40, help='secondes avant le résultat')
+    parser.add_argument('--baseline', help='révision git à comparer (ex. HEAD~1)')
+    args = parser.parse_args()
+
+    if shutil.which('node') is None:
+        sys.exit("node introuvable: ce banc exécute app.js sous node")
+
+    runs = [('actuel', None)]
+    if args.baseline:
+        runs.insert(0, (args.baseline, args.baseline))
+
+    print(f"Session simulée: {args.minutes:g} min, jeu toutes les {args.game_every}s, "
+          f"prédiction toutes les {args.predict_every}s")
+    print(f"{'version':<10} {'appel':<16} {'n':>5} {'moy. ms':>8} {'p95 ms':>8} {'écritures':>10} {'requêtes':>9}")
+    failed = False
+    with tempfile.TemporaryDirectory() as workdir:
+        with open(os.path.join(workdir, 'harness.js'), 'w', encoding='utf-8') as f:
+            f.write(HARNESS)
+        for label, rev in runs:
+            result = run(label.replace('/', '_').replace('~', '_'), rev, args, workdir)
+            total = result.pop('total')
+            for call, r in result.items():
+                print(f"{label:<10} {call:<16} {r['count']:>5} {r['mean_ms']:>8.3f} {r['p95_ms']:>8.3f} "
+                      f"{r['mutations']:>10.1f} {r['fetches']:>9}")
+            print(f"{label:<10} {'total':<16} {'':>5} {'':>8} {'':>8} {total['mutations']:>10} {total['fetches']:>9}")
+            print(f"{label:<10} ligne réécrite quand seul le statut change: {'oui' if total['status_check'] else 'NON'}")
+            failed = failed or (rev is None and not total['status_check'])
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""
+Client Telegram factice (en process) pour les benchmarks
+
+Implémente le sous-ensemble de Telethon utilisé par bot_logic:
+  - client.on(events.NewMessage(pattern=...)) / events.MessageEdited()
+  - send_message, edit_message, get_entity
+  - événements avec message (id, message, text, date, edit_date),
+    get_chat(), respond(), sender_id, is_group / is_channel
+Les mises à jour injectées par emit_new / emit_edit sont dispatchées
+comme Telethon (une tâche par mise à jour, handlers dans l'ordre
+d'enregistrement) et chaque dispatch est chronométré.
+
+isolate_database() remplace le module database par une version en
+mémoire pour mesurer le bot sans PostgreSQL.
+"""
+import re
+import sys
+import time
+import types
+import asyncio
+from datetime import datetime, timezone
+
+# ============================================================
+# ÉVÉNEMENTS
+# ============================================================
+
+class NewMessage:
+    kind = 'new'
+
+    def __init__(self, pattern=None, chats=None, incoming=None, outgoing=None):
+        self.pattern = re.compile(pattern).match if isinstance(pattern, str) else pattern
+        self.chats = None if chats is None else set(chats if isinstance(chats, (list, set, tuple)) else [chats])
+
+    def matches(self, event) -> bool:
+        if event.kind != self.kind:
+            return False
+        if self.chats is not None and event.chat_id not in self.chats:
+            return False
+        if self.pattern is not None:
+            event.pattern_match = self.pattern(event.message.message or '')
+            return bool(event.pattern_match)
+        return True
+
+
+class MessageEdited(NewMessage):
+    kind = 'edited'
+
+
+events = types.SimpleNamespace(NewMessage=NewMessage, MessageEdited=MessageEdited)
+
+
+class FakeChat:
+    """Canal tel que renvoyé par Telethon: id positif, sans préfixe -100"""
+    def __init__(self, chat_id: int, broadcast=True):
+        marked = str(chat_id)
+        self.id = int(marked[4:]) if broadcast and marked.startswith('-100') else chat_id
+        self.broadcast = broadcast
+
+
+class FakeMessage:
+    def __init__(self, msg_id: int, text: str, chat_id: int):
+        self.id = msg_id
+        self.message = text
+        self.chat_id = chat_id
+        self.date = datetime.now(timezone.utc)
+        self.edit_date = None
+
+    @property
+    def text(self):
+        return self.message
+
+
+class FakeEvent:
+    def __init__(self, kind, client, message, sender_id=None, private=False):
+        self.kind = kind
+        self.client = client
+        self.message = message
+        self.chat_id = message.chat_id
+        self.sender_id = sender_id
+        self.is_private = private
+        self.is_group = False
+        self.is_channel = not private
+        self.pattern_match = None
+
+    async def get_chat(self):
+        return FakeChat(self.chat_id, broadcast=self.is_channel)
+
+    async def respond(self, text):
+        return await self.client.send_message(self.chat_id, text)
+
+# ============================================================
+# CLIENT
+# ============================================================
+
+class FakeClient:
+    def __init__(self, latency: float = 0.0, sequential: bool = False):
+        """latency: délai simulé de chaque appel réseau (send/edit/get_entity)"""
+        self.latency = latency
+        self.sequential = sequential
+        self.handlers = []
+        self.sent = []
+        self.edits = 0
+        self.dispatch_times = []   # secondes: injection -> fin des handlers
+        self.handler_errors = 0
+        self._next_id = 1
+        self._tasks = set()
+        self._messages = {}
+        self._last = None
+
+    # ---------------- API utilisée par bot_logic ----------------
+
+    def on(self, builder):
+        def decorator(callback):
+            self.handlers.append((builder, callback))
+            return callback
+        return decorator
+
+    def add_event_handler(self, callback, builder):
+        self.handlers.append((builder, callback))
+
+    async def _network(self):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def get_entity(self, entity):
+        await self._network()
+        return entity
+
+    async def send_message(self, entity, text):
+        await self._network()
+        msg = FakeMessage(self._new_id(), text, entity if isinstance(entity, int) else 0)
+        self.sent.append(msg)
+        return msg
+
+    async def edit_message(self, entity, message_id, text):
+        await self._network()
+        self.edits += 1
+        return None
+
+    # ---------------- Injection de mises à jour ----------------
+
+    def _new_id(self):
+        self._next_id += 1
+        return self._next_id
+
+    def emit_new(self, chat_id: int, text: str, sender_id=None, private=False):
+        msg = FakeMessage(self._new_id(), text, chat_id)
+        self._messages[(chat_id, msg.id)] = msg
+        self._emit(FakeEvent('new', self, msg, sender_id, private))
+        return msg.id
+
+    def emit_edit(self, chat_id: int, msg_id: int, text: str):
+        msg = self._messages[(chat_id, msg_id)]
+        msg.message = text
+        msg.edit_date = datetime.now(timezone.utc)
+        self._emit(FakeEvent('edited', self, msg))
+
+    def _emit(self, event):
+        coro = self._dispatch(event, time.perf_counter())
+        if self.sequential:
+            task = asyncio.ensure_future(self._chain(coro))
+        else:
+            task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _chain(self, coro):
+        # Mode séquentiel: une mise à jour après l'autre, comme sequential_updates=True
+        previous = self._last
+        self._last = asyncio.current_task()
+        if previous is not None and not previous.done():
+            await asyncio.shield(previous)
+        await coro
+
+    async def _dispatch(self, event, emitted_at):
+        for builder, callback in self.handlers:
+            if builder.matches(event):
+                try:
+                    await callback(event)
+                except Exception:
+                    self.handler_errors += 1
+        self.dispatch_times.append(time.perf_counter() - emitted_at)
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    async def drain(self):
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+# ============================================================
+# BASE EN MÉMOIRE
+# ============================================================
+
+def isolate_database():
+    """Installe un module `database` en mémoire (à appeler avant d'importer bot_logic)"""
+    if 'database' in sys.modules:
+        return sys.modules['database']
+    db = types.ModuleType('database')
+    db.logged = []
+    db.log_prediction = lambda number, suit, status, rattrapage=0: db.logged.append((number, suit, status))
+    db.get_prediction_stats = lambda: (0, 0)
+    db.get_prediction_aggregates = lambda recent=500: ([], [])
+    db.pop_bot_runtime = lambda: None
+    db.save_bot_runtime = lambda payload: None
+    sys.modules['database'] = db
+    return db
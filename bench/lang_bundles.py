@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Traductions au premier chargement: octets et temps d'analyse, avant / après
+
+Compare ce que la page principale doit télécharger et exécuter pour ses
+traductions: lang.js d'une révision git (--baseline, toutes les langues)
+contre le lang.js actuel plus le paquet de la langue embarqué dans la
+page par le serveur (translations.py). Tailles brute et gzip, puis temps
+de compilation + exécution sous node (meilleur de --repeat, contexte neuf
+à chaque fois), et taille d'un paquet chargé au changement de langue.
+
+Usage: python bench/lang_bundles.py [--baseline HEAD~1] [--lang fr] [--repeat 200]
+"""
+import os
+import sys
+import gzip
+import json
+import shutil
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import translations
+from dashboard_render import read_file
+
+TIMER = r"""
+const vm = require('vm');
+const cfg = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+let best = Infinity;
+for (let i = 0; i < cfg.repeat; i++) {
+    const context = vm.createContext({ fetch() {}, document: { querySelectorAll: () => [] } });
+    const start = process.hrtime.bigint();
+    for (const source of cfg.sources) new vm.Script(source).runInContext(context);
+    best = Math.min(best, Number(process.hrtime.bigint() - start) / 1e6);
+}
+process.stdout.write(String(best));
+"""
+
+
+def parse_ms(sources, repeat):
+    out = subprocess.run(['node', '-e', TIMER], input=json.dumps({'sources': sources, 'repeat': repeat}),
+                         check=True, capture_output=True, text=True).stdout
+    return float(out)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--baseline', default='HEAD~1', help='révision avec l\'ancien lang.js')
+    parser.add_argument('--lang', default=translations.DEFAULT_LANG)
+    parser.add_argument('--repeat', type=int, default=200)
+    args = parser.parse_args()
+
+    before = [read_file(args.baseline, 'static/js/lang.js')]
+    inline = (f"registerTranslations('{args.lang}', "
+              f"{translations.bundle_bytes(args.lang).decode()}, '{translations.VERSION}', "
+              f"{json.dumps(list(translations.LANGS))});")
+    after = [read_file(None, 'static/js/lang.js'), inline]
+
+    print(f"Premier chargement, langue {args.lang}")
+    print(f"{'version':<10} {'octets':>8} {'gzip':>8} {'analyse + exécution ms':>24}")
+    for label, sources in ((args.baseline, before), ('actuel', after)):
+        raw = ''.join(sources).encode()
+        timing = f"{parse_ms(sources, args.repeat):>24.3f}" if shutil.which('node') else f"{'(node absent)':>24}"
+        print(f"{label:<10} {len(raw):>8} {len(gzip.compress(raw, 6)):>8} {timing}")
+
+    sizes = [len(translations.bundle_bytes(lang)) for lang in translations.LANGS]
+    print(f"\nPaquet chargé au changement de langue: {min(sizes)}-{max(sizes)} octets "
+          f"(une fois par version, ensuite cache navigateur)")
+
+
+if __name__ == '__main__':
+    main()
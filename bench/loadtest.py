@@ -0,0 +1,270 @@
+#!/usr/bin/env python3
+"""
+Test de charge du tableau de bord (abonnés simultanés)
+
+Crée N utilisateurs synthétiques (create_user + abonnement + create_session)
+dans la base pointée par DATABASE_URL (utiliser une base locale!), démarre
+setup_web_app dans un process séparé avec un état de bot simulé, puis
+reproduit le comportement de static/js/app.js pour chaque utilisateur:
+  - chargement de / et des scripts
+  - GET /api/predictions toutes les 3 s (fetchData)
+  - GET /api/predictions?limit=20 toutes les 30 s (loadPredictionHistory)
+  - une fraction des utilisateurs se déconnecte puis se reconnecte (PBKDF2)
+Rapporte débit, p50/p95/p99 et taux d'erreur par route.
+
+Usage: DATABASE_URL=postgresql://localhost/baccarat_test \\
+       python bench/loadtest.py --users 500 --duration 60 [--churn 0.05] [--speed 1]
+"""
+import os
+import sys
+import time
+import json
+import random
+import signal
+import asyncio
+import argparse
+import subprocess
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+EMAIL_DOMAIN = 'loadtest.invalid'
+PASSWORD = 'loadtest-pass'
+
+# ============================================================
+# SERVEUR (process enfant)
+# ============================================================
+
+def fake_bot_state():
+    """Remplit bot_logic.state comme après quelques heures de fonctionnement"""
+    from datetime import datetime, timedelta
+    from bot_logic import state, get_suit_for_number
+    from records import PredictionRecord
+
+    now = datetime.now()
+    game = 100
+    for i in range(100):
+        game += 2
+        suit = get_suit_for_number(game) or '♥'
+        ts = now - timedelta(minutes=(100 - i) * 2)
+        status = random.choice(['✅0️⃣', '✅1️⃣', '✅2️⃣', '❌'])
+        state.prediction_history.append(PredictionRecord(game, suit, status, created=ts))
+    state.current_game_number = state.last_source_game_number = game + 1
+    state.won_predictions, state.lost_predictions = 80, 20
+
+
+async def fake_bot_ticker():
+    """Fait évoluer l'état comme le bot: nouveau jeu, prédiction, résultat"""
+    from bot_logic import state
+    from records import PredictionRecord
+    import shared_state
+
+    while True:
+        await asyncio.sleep(5)
+        state.current_game_number += 1
+        state.last_source_game_number = state.current_game_number
+        last = state.prediction_history.last()
+        if last and last.status == '⏳':
+            state.prediction_history.set_status(last.game_number, '✅0️⃣')
+            state.won_predictions += 1
+        else:
+            state.prediction_history.append(PredictionRecord(state.current_game_number + 1, '♦'))
+        shared_state.mark_dirty()
+
+
+def serve(port: int):
+    import logging
+    from aiohttp import web
+    import shared_state
+    from web_server import setup_web_app
+
+    logging.basicConfig(level=logging.WARNING)
+    os.chdir(ROOT)
+    shared_state.configure('all')
+    fake_bot_state()
+
+    async def run():
+        app = setup_web_app({'user': None, 'admin': None})
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, '127.0.0.1', port).start()
+        ticker = asyncio.create_task(fake_bot_ticker())
+        stop = asyncio.Event()
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stop.set)
+        await stop.wait()
+        ticker.cancel()
+        await runner.cleanup()
+
+    asyncio.run(run())
+
+# ============================================================
+# DONNÉES DE TEST
+# ============================================================
+
+def create_users(count: int, run_id: str):
+    """Crée les comptes et leurs sessions (PBKDF2 en parallèle: hashlib libère le GIL)"""
+    from database import create_user, create_session, add_subscription_time
+
+    def make(i):
+        email = f"u{i}-{run_id}@{EMAIL_DOMAIN}"
+        user = create_user(email, PASSWORD, 'Load', f'User{i}')
+        if not user:
+            raise RuntimeError(f"création impossible: {email}")
+        add_subscription_time(user['id'], 1)
+        return {'email': email, 'session_id': create_session(user['id'])}
+
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 4) as pool:
+        return list(pool.map(make, range(count)))
+
+
+def delete_users(run_id: str):
+    from database import get_connection
+    conn = get_connection()
+    c = conn.cursor()
+    pattern = f"%-{run_id}@{EMAIL_DOMAIN}"
+    c.execute('DELETE FROM sessions WHERE user_id IN (SELECT id FROM users WHERE email LIKE %s)', (pattern,))
+    c.execute('DELETE FROM users WHERE email LIKE %s', (pattern,))
+    conn.commit()
+    c.close()
+    conn.close()
+
+# ============================================================
+# CLIENTS SIMULÉS
+# ============================================================
+
+class Stats:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, route, status, elapsed):
+        self.latencies[route].append(elapsed)
+        self.statuses[route][status] += 1
+        if status >= 400 or status == 0:
+            self.errors[route] += 1
+
+    def report(self, duration):
+        total = sum(len(v) for v in self.latencies.values())
+        errors = sum(self.errors.values())
+        print(f"\nDébit global: {total / duration:.1f} req/s, erreurs {errors} ({errors / max(total, 1) * 100:.2f}%)")
+        print(f"{'route':<28} {'req':>7} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'err%':>6}")
+        for route, values in sorted(self.latencies.items()):
+            values.sort()
+            pick = lambda q: values[min(len(values) - 1, int(q * len(values)))] * 1000
+            err = self.errors[route] / len(values) * 100
+            print(f"{route:<28} {len(values):>7} {len(values) / duration:>7.1f} "
+                  f"{pick(.5):>7.1f}ms {pick(.95):>7.1f}ms {pick(.99):>7.1f}ms {err:>5.1f}%")
+
+
+async def request(http, stats, method, url, route, **kwargs):
+    start = time.perf_counter()
+    status = 0
+    try:
+        async with http.request(method, url, **kwargs) as resp:
+            await resp.read()
+            status = resp.status
+    except Exception:
+        pass
+    stats.record(route, status, time.perf_counter() - start)
+    return status
+
+
+async def simulate_user(base, user, stats, stop_at, churn, speed):
+    """Même rythme que app.js: fetchData 3 s, loadPredictionHistory 30 s"""
+    from aiohttp import ClientSession, CookieJar
+
+    jar = CookieJar(unsafe=True)
+    async with ClientSession(cookie_jar=jar) as http:
+        jar.update_cookies({'session_id': user['session_id']})
+        await asyncio.sleep(random.uniform(0, 3 / speed))
+        await request(http, stats, 'GET', f"{base}/", '/')
+        for script in ('/static/js/lang.js', '/static/js/app.js'):
+            await request(http, stats, 'GET', base + script, script)
+
+        next_history = 0.0
+        while time.monotonic() < stop_at:
+            now = time.monotonic()
+            await request(http, stats, 'GET', f"{base}/api/predictions", '/api/predictions')
+            if now >= next_history:
+                await request(http, stats, 'GET', f"{base}/api/predictions?limit=20", '/api/predictions?limit=20')
+                next_history = now + 30 / speed
+            if random.random() < churn:
+                await request(http, stats, 'POST', f"{base}/api/logout", '/api/logout')
+                await request(http, stats, 'POST', f"{base}/api/login", '/api/login',
+                              data={'email': user['email'], 'password': PASSWORD})
+            await asyncio.sleep(3 / speed)
+
+
+async def run_load(base, users, duration, churn, speed):
+    stats = Stats()
+    stop_at = time.monotonic() + duration
+    await asyncio.gather(*(simulate_user(base, u, stats, stop_at, churn, speed) for u in users))
+    return stats
+
+
+async def wait_ready(url, timeout=20):
+    from aiohttp import ClientSession
+    deadline = time.monotonic() + timeout
+    async with ClientSession() as http:
+        while time.monotonic() < deadline:
+            try:
+                async with http.get(url) as resp:
+                    return
+            except OSError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError('serveur non démarré')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--duration', type=float, default=60)
+    parser.add_argument('--churn', type=float, default=0.02,
+                        help='probabilité de déconnexion/reconnexion par cycle de 3 s')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='accélère les intervalles de app.js (2 = deux fois plus de requêtes)')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--keep-users', action='store_true')
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port)
+        return
+
+    if not os.getenv('DATABASE_URL'):
+        raise SystemExit('DATABASE_URL doit pointer vers une base PostgreSQL locale de test')
+
+    from database import init_db
+    init_db()
+
+    run_id = f"{int(time.time())}"
+    print(f"Création de {args.users} utilisateurs...")
+    t0 = time.perf_counter()
+    users = create_users(args.users, run_id)
+    print(f"  {time.perf_counter() - t0:.1f} s")
+
+    server = subprocess.Popen([sys.executable, __file__, '--serve', '--port', str(args.port)], cwd=ROOT)
+    base = f"http://127.0.0.1:{args.port}"
+    try:
+        asyncio.run(wait_ready(base + '/login'))
+        print(f"Charge: {args.users} utilisateurs, {args.duration:.0f} s, churn {args.churn}, vitesse x{args.speed}")
+        stats = asyncio.run(run_load(base, users, args.duration, args.churn, args.speed))
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=30)
+        if not args.keep_users:
+            delete_users(run_id)
+
+    if args.json:
+        print(json.dumps({route: {'count': len(v), 'errors': stats.errors[route]}
+                          for route, v in stats.latencies.items()}, indent=2))
+    stats.report(args.duration)
+
+
+if __name__ == '__main__':
+    main()
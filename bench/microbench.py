@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmarks des fonctions chaudes de bot_logic
+
+Corpus généré de messages réalistes du canal source (placeholder ⏰,
+cartes partielles, résultat final ✅/🔰, messages de statistiques), puis
+mesure de chaque fonction du chemin message et d'un process_source_message
+complet avec le client Telegram factice de fake_telegram (aucun réseau,
+aucune base).
+
+Les temps sont normalisés par une charge de calibration (boucle Python
+fixe) pour que les références restent comparables d'une machine à
+l'autre. Les références sont stockées dans bench/baselines.json.
+
+Usage:
+  python bench/microbench.py                 # compare aux références
+  python bench/microbench.py --save          # enregistre de nouvelles références
+  python bench/microbench.py --threshold 1.3 # échec si > 30 % plus lent
+Code de sortie 1 en cas de régression (utilisable avant déploiement).
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fake_telegram import FakeClient, isolate_database
+
+BASELINE_FILE = os.path.join(ROOT, 'bench', 'baselines.json')
+SUITS = ['♠️', '❤️', '♦️', '♣️']
+RANKS = ['A', '2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K']
+
+# ============================================================
+# CORPUS
+# ============================================================
+
+def _cards(rng, n):
+    return [rng.choice(RANKS) + rng.choice(SUITS) for _ in range(n)]
+
+
+def _hand(rng, n):
+    return ''.join(_cards(rng, n))
+
+
+def game_messages(rng, game, partials=1):
+    """Séquence d'éditions d'un jeu telle que publiée par le canal source
+
+    partials: éditions ⏰ intermédiaires (les cartes apparaissent au fil des éditions)
+    """
+    p, b = _cards(rng, 2), _cards(rng, 2)
+    p3, b3 = ''.join(p) + _hand(rng, rng.randint(0, 1)), ''.join(b) + _hand(rng, rng.randint(0, 1))
+    final = rng.choice(['✅', '🔰'])
+    messages = [f"⏰#N{game}. ▶️ 0(...) - 0(...)"]
+    for i in range(partials):
+        shown = -(-(i + 1) * 2 // partials)
+        messages.append(f"⏰#N{game}. {rng.randint(0, 9)}({''.join(p[:shown])}) - "
+                        f"{rng.randint(0, 9)}({''.join(b[:shown])})")
+    messages.append(f"{final}#N{game}. {rng.randint(0, 9)}({p3}) - {rng.randint(0, 9)}({b3}) #T{rng.randint(0, 18)}")
+    return messages
+
+
+def stats_message(rng):
+    return '\n'.join(f"{s} : {rng.randint(0, 40)}" for s in SUITS) + f"\n#N{rng.randint(100, 1400)}"
+
+
+def build_corpus(seed=42, games=300):
+    rng = random.Random(seed)
+    messages = []
+    for game in range(100, 100 + games):
+        messages.extend(game_messages(rng, game))
+    return {
+        'messages': messages,
+        'stats': [stats_message(rng) for _ in range(200)],
+        'groups': [g for m in messages for g in m.split('(')[1:] if ')' in g][:1000],
+        'numbers': list(range(1, 1450)),
+    }
+
+def _isolate_bot_logic():
+    """Import de bot_logic sans base de données (seul le CPU est mesuré)"""
+    isolate_database()
+    import bot_logic
+    return bot_logic
+
+# ============================================================
+# MESURE
+# ============================================================
+
+def calibrate(repeat=5):
+    def workload():
+        total = 0
+        for i in range(200_000):
+            total += i % 7
+        return total
+    return min(_time_once(workload) for _ in range(repeat))
+
+
+def _time_once(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def bench(func, repeat=7):
+    """Meilleur temps sur `repeat` passes (le moins bruité)"""
+    func()  # échauffement
+    return min(_time_once(func) for _ in range(repeat))
+
+
+def build_cases(bl, corpus):
+    msgs, stats, groups, numbers = corpus['messages'], corpus['stats'], corpus['groups'], corpus['numbers']
+    source_ids = {'SOURCE_CHANNEL_ID': -100123, 'SOURCE_CHANNEL_2_ID': -100456}
+
+    def full_pipeline():
+        bl.state.__init__()
+        bl.state.client = FakeClient()
+        bl.state.pause_config['cycle'] = [0]
+
+        async def run():
+            for m in msgs:
+                await bl.process_source_message(m, -100123, source_ids, bl.is_message_finalized(m))
+        asyncio.run(run())
+
+    return {
+        'extract_game_number': lambda: [bl.extract_game_number(m) for m in msgs],
+        'parse_stats_message': lambda: [bl.parse_stats_message(m) for m in stats],
+        'extract_parentheses_groups': lambda: [bl.extract_parentheses_groups(m) for m in msgs],
+        'normalize_suits': lambda: [bl.normalize_suits(g) for g in groups],
+        'extract_suits_from_group': lambda: [bl.extract_suits_from_group(g) for g in groups],
+        'get_suit_for_number': lambda: [bl.get_suit_for_number(n) for n in numbers],
+        'is_trigger_number': lambda: [bl.is_trigger_number(n) for n in numbers],
+        'process_source_message': full_pipeline,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--save', action='store_true', help='enregistre les références')
+    parser.add_argument('--threshold', type=float, default=1.25,
+                        help='ratio max toléré par rapport à la référence')
+    parser.add_argument('--repeat', type=int, default=7)
+    parser.add_argument('only', nargs='*', help='noms de benchmarks à lancer')
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.CRITICAL)  # les logs INFO du bot fausseraient la mesure
+
+    bl = _isolate_bot_logic()
+    corpus = build_corpus()
+    cases = build_cases(bl, corpus)
+    if args.only:
+        cases = {k: v for k, v in cases.items() if k in args.only}
+
+    calib = calibrate()
+    baselines = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, encoding='utf-8') as f:
+            baselines = json.load(f).get('normalized', {})
+
+    print(f"Corpus: {len(corpus['messages'])} messages | calibration {calib * 1000:.2f} ms | seuil x{args.threshold}")
+    print(f"{'benchmark':<28} {'temps':>10} {'normalisé':>10} {'réf.':>8} {'ratio':>7}")
+    results = {}
+    regressions = []
+    for name, func in cases.items():
+        elapsed = bench(func, args.repeat)
+        normalized = elapsed / calib
+        results[name] = round(normalized, 4)
+        ref = baselines.get(name)
+        ratio = normalized / ref if ref else None
+        flag = ''
+        if ratio and ratio > args.threshold:
+            flag = '  ❌ RÉGRESSION'
+            regressions.append(name)
+        print(f"{name:<28} {elapsed * 1000:>8.2f}ms {normalized:>10.3f} "
+              f"{ref if ref else '-':>8} {f'{ratio:.2f}' if ratio else '-':>7}{flag}")
+
+    if args.save:
+        merged = dict(baselines, **results)
+        with open(BASELINE_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'python': sys.version.split()[0], 'normalized': merged}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\nRéférences enregistrées dans {os.path.relpath(BASELINE_FILE, ROOT)}")
+        return 0
+
+    if regressions:
+        print(f"\n❌ Régressions: {', '.join(regressions)}")
+        return 1
+    print("\n✅ Aucune régression")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
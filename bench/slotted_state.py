@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Enregistrements à slots (records.py) contre les dicts d'origine
+
+Compare, pour un historique plein (100 prédictions):
+  - mémoire de l'historique (tracemalloc)
+  - mise à jour de statut: parcours linéaire du deque de dicts contre
+    l'index numéro -> enregistrement
+  - lecture par le tableau de bord: copie list(deque) à chaque sondage
+    contre la vue mise en cache (inchangée entre deux résultats)
+  - remise à zéro de la vérification: dict littéral contre reset()
+
+Usage: python bench/slotted_state.py [--size 100] [--number 20000]
+"""
+import os
+import sys
+import timeit
+import argparse
+import tracemalloc
+from collections import deque
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from records import PredictionRecord, PredictionHistory, VerificationState
+
+
+def dict_history(size):
+    history = deque(maxlen=size)
+    for game in range(size):
+        history.append({
+            'game_number': game,
+            'suit': '♥',
+            'status': '⏳',
+            'timestamp': datetime.now().isoformat(),
+            'time_str': datetime.now().strftime('%H:%M:%S')
+        })
+    return history
+
+
+def record_history(size):
+    history = PredictionHistory(maxlen=size)
+    for game in range(size):
+        history.append(PredictionRecord(game, '♥'))
+    return history
+
+
+def measure_memory(factory, size):
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    obj = factory(size)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    total = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del obj
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size', type=int, default=100)
+    parser.add_argument('--number', type=int, default=20000)
+    args = parser.parse_args()
+    size, number = args.size, args.number
+
+    dicts = dict_history(size)
+    records = record_history(size)
+    # Pire cas réaliste: la prédiction à mettre à jour est la plus récente
+    target = size - 1
+
+    def dict_update():
+        for pred in dicts:
+            if pred['game_number'] == target:
+                pred['status'] = '✅0️⃣'
+                break
+
+    def record_update():
+        records.set_status(target, '✅0️⃣')
+
+    def dict_reset():
+        return {
+            'predicted_number': None, 'predicted_suit': None,
+            'current_check': 0, 'message_id': None,
+            'channel_id': None, 'status': None, 'base_game': None
+        }
+
+    verification = VerificationState()
+
+    rows = [
+        ('mise à jour statut', dict_update, record_update),
+        ('lecture (sondage)', lambda: list(dicts), records.view),
+        ('lecture après résultat', lambda: (dict_update(), list(dicts)),
+         lambda: (record_update(), records.view())),
+        ('reset vérification', dict_reset, verification.reset),
+    ]
+
+    mem_dict = measure_memory(dict_history, size)
+    mem_rec = measure_memory(record_history, size)
+    print(f"Historique de {size} prédictions")
+    print(f"{'mémoire':<24} {mem_dict / 1024:>9.1f} Ko {mem_rec / 1024:>9.1f} Ko {mem_dict / mem_rec:>6.2f}x")
+    print(f"{'opération (µs)':<24} {'dicts':>12} {'records':>12} {'gain':>7}")
+    for name, before, after in rows:
+        t_before = min(timeit.repeat(before, number=number, repeat=5)) / number * 1e6
+        t_after = min(timeit.repeat(after, number=number, repeat=5)) / number * 1e6
+        print(f"{name:<24} {t_before:>12.3f} {t_after:>12.3f} {t_before / t_after:>6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark de démarrage par rôle (python -X importtime)
+
+Pour chaque rôle, importe dans un interpréteur neuf le module d'entrée
+et mesure:
+  - le temps d'import cumulé (somme des imports de premier niveau)
+  - les modules les plus coûteux
+  - la mémoire résidente maximale (ru_maxrss) après import
+
+Rôles:
+  web  -> web_server   (aiohttp, jinja2, psycopg2 ; pas de telethon)
+  bot  -> bot_logic    (stdlib seulement ; telethon arrive avec le client)
+  all  -> main         (point d'entrée combiné, imports différés)
+
+Usage: python bench/startup.py [--repeat 5] [--top 10] [--json]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ROLES = {
+    'web': 'web_server',
+    'bot': 'bot_logic',
+    'all': 'main',
+}
+
+PROBE = (
+    "import resource, sys; import {module}; "
+    "heavy = [m for m in ('telethon', 'aiohttp', 'jinja2', 'psycopg2') if m in sys.modules]; "
+    "print('RSS', resource.getrusage(resource.RUSAGE_SELF).ru_maxrss); "
+    "print('HEAVY', ','.join(heavy))"
+)
+
+
+def parse_importtime(stderr: str):
+    """Retourne (total_us, {module_racine: cumul_us}) depuis la sortie -X importtime"""
+    per_module = {}
+    total = 0
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative, name = [p.strip() for p in line[len('import time:'):].split('|')]
+        except ValueError:
+            continue
+        # Niveau 0 d'indentation = import de premier niveau
+        raw_name = line.rsplit('|', 1)[1]
+        depth = (len(raw_name) - len(raw_name.lstrip())) - 1
+        if depth == 0:
+            total += int(cumulative)
+            per_module[name] = per_module.get(name, 0) + int(cumulative)
+    return total, per_module
+
+
+def run_role(module: str):
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE='0')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE.format(module=module)],
+        cwd=ROOT, env=env, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        last = proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'erreur inconnue'
+        raise RuntimeError(f"import {module} impossible: {last}")
+    rss_kb = 0
+    heavy = ''
+    for line in proc.stdout.splitlines():
+        if line.startswith('RSS '):
+            rss_kb = int(line.split()[1])
+        elif line.startswith('HEAVY '):
+            heavy = line[6:]
+    total_us, per_module = parse_importtime(proc.stderr)
+    return total_us, per_module, rss_kb, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=10)
+    parser.add_argument('--json', action='store_true')
+    parser.add_argument('roles', nargs='*', default=list(ROLES))
+    args = parser.parse_args()
+
+    report = {}
+    for role in args.roles:
+        module = ROLES[role]
+        try:
+            runs = [run_role(module) for _ in range(args.repeat)]
+        except RuntimeError as e:
+            report[role] = {'error': str(e)}
+            continue
+        totals = [r[0] for r in runs]
+        rss = [r[2] for r in runs]
+        last_modules = runs[-1][1]
+        top = sorted(last_modules.items(), key=lambda kv: kv[1], reverse=True)[:args.top]
+        report[role] = {
+            'module': module,
+            'import_ms_median': round(statistics.median(totals) / 1000, 1),
+            'import_ms_min': round(min(totals) / 1000, 1),
+            'rss_mb_median': round(statistics.median(rss) / 1024, 1),
+            'heavy_modules': runs[-1][3].split(',') if runs[-1][3] else [],
+            'top_imports_ms': {name: round(us / 1000, 1) for name, us in top},
+        }
+
+    if args.json:
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return
+
+    for role, data in report.items():
+        print(f"\n== Rôle {role} ==")
+        if 'error' in data:
+            print(f"  ❌ {data['error']}")
+            continue
+        print(f"  import {data['module']}: {data['import_ms_median']} ms (min {data['import_ms_min']} ms)")
+        print(f"  RSS: {data['rss_mb_median']} Mo")
+        print(f"  Modules lourds chargés: {', '.join(data['heavy_modules']) or 'aucun'}")
+        for name, ms in data['top_imports_ms'].items():
+            print(f"    {ms:8.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Montée en charge du mode multi-workers web (requêtes/seconde par nombre de workers)
+
+Pour chaque nombre de workers, lance web_workers.run_master sur un port
+local, charge une route sans base de données (rendu Jinja de /login par
+défaut) avec un client aiohttp à concurrence fixe, puis arrête les
+workers par SIGTERM (arrêt propre).
+
+Usage: python bench/web_scaling.py [--workers 1,2,4] [--duration 10]
+                                   [--concurrency 64] [--path /login]
+"""
+import os
+import sys
+import time
+import signal
+import asyncio
+import argparse
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def serve(workers: int, port: int):
+    """Mode enfant: sert l'application avec `workers` process"""
+    import logging
+    import web_workers
+    from web_server import setup_web_app
+
+    logging.basicConfig(level=logging.WARNING)
+    web_workers.run_master(lambda: setup_web_app({'user': None, 'admin': None}),
+                           workers, host='127.0.0.1', port=port)
+
+
+async def wait_ready(url: str, timeout: float = 15):
+    from aiohttp import ClientSession
+    deadline = time.monotonic() + timeout
+    async with ClientSession() as http:
+        while time.monotonic() < deadline:
+            try:
+                async with http.get(url) as resp:
+                    await resp.read()
+                    return
+            except OSError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"serveur non prêt: {url}")
+
+
+async def load(url: str, duration: float, concurrency: int):
+    from aiohttp import ClientSession, TCPConnector
+    latencies = []
+    errors = 0
+    stop_at = time.monotonic() + duration
+
+    async def client(http):
+        nonlocal errors
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            try:
+                async with http.get(url) as resp:
+                    await resp.read()
+                    if resp.status >= 400:
+                        errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    async with ClientSession(connector=TCPConnector(limit=concurrency)) as http:
+        await asyncio.gather(*(client(http) for _ in range(concurrency)))
+
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0
+    return {
+        'requests': len(latencies),
+        'rps': len(latencies) / duration,
+        'p50_ms': pick(0.50),
+        'p99_ms': pick(0.99),
+        'errors': errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--path', default='/login')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--serve', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port)
+        return
+
+    print(f"CPU: {os.cpu_count()} | route {args.path} | concurrence {args.concurrency} | {args.duration}s")
+    print(f"{'workers':>8} {'req/s':>10} {'p50 ms':>8} {'p99 ms':>8} {'erreurs':>8} {'gain':>6}")
+    baseline = None
+    for workers in [int(w) for w in args.workers.split(',')]:
+        proc = subprocess.Popen([sys.executable, __file__, '--serve', str(workers),
+                                 '--port', str(args.port)], cwd=ROOT)
+        url = f"http://127.0.0.1:{args.port}{args.path}"
+        try:
+            asyncio.run(wait_ready(url))
+            result = asyncio.run(load(url, args.duration, args.concurrency))
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            proc.wait(timeout=30)
+        baseline = baseline or result['rps']
+        print(f"{workers:>8} {result['rps']:>10.0f} {result['p50_ms']:>8.1f} "
+              f"{result['p99_ms']:>8.1f} {result['errors']:>8} {result['rps'] / baseline:>5.2f}x")
+
+
+if __name__ == '__main__':
+    main()
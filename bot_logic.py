@@ -4,11 +4,22 @@ Canal: -1003579400443
 """
 import os
 import re
+import json
+import asyncio
 import logging
-from datetime import datetime, timedelta
-from collections import deque
-from telethon import TelegramClient, events
-from telethon.sessions import StringSession
+import functools
+from datetime import datetime
+from collections import OrderedDict
+
+import pause
+import metrics
+import tracing
+import shared_state
+import invalidation
+from analytics import analytics
+from records import PredictionRecord, PredictionHistory, VerificationState
+from ingestion import ingestion, SourceUpdate
+from shutdown import coordinator as shutdown_coordinator
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +38,7 @@ class BotState:
         self.processed_messages = set()
         self.current_game_number = 0
         self.last_source_game_number = 0
-        self.prediction_history = deque(maxlen=100)
+        self.prediction_history = PredictionHistory()
         self.total_predictions = 0
         self.won_predictions = 0
         self.lost_predictions = 0
@@ -41,22 +52,10 @@ class BotState:
         self.client = None
         self.prediction_channel_ok = False
         # 🔧 NOUVEAU: État pour prédiction automatique
-        self.verification_state = {
-            'predicted_number': None,
-            'predicted_suit': None,
-            'current_check': 0,
-            'message_id': None,
-            'status': None,
-            'base_game': None
-        }
+        self.verification_state = VerificationState()
         self.predictions_enabled = True
-        self.pause_config = {
-            'cycle': [180, 300, 240],  # 3min, 5min, 4min
-            'current_index': 0,
-            'predictions_count': 0,
-            'is_paused': False,
-            'pause_end_time': None
-        }
+        self.pause_config = pause.default_config()
+        self.pause_scheduler = pause.PauseScheduler(self.pause_config)
 
 state = BotState()
 
@@ -121,16 +120,20 @@ def get_valid_even_numbers():
     """Génère les pairs valides: 6-1436, pairs, ne finissant pas par 0"""
     return [n for n in range(6, 1437) if n % 2 == 0 and n % 10 != 0]
 
-VALID_EVEN_NUMBERS = get_valid_even_numbers()
+@functools.lru_cache(maxsize=None)
+def valid_even_index() -> dict:
+    """Numéro pair valide -> rang, construit au premier usage (pas à l'import)"""
+    return {n: i for i, n in enumerate(get_valid_even_numbers())}
+
 SUIT_CYCLE = ['♥', '♦', '♣', '♠', '♦', '♥', '♠', '♣']
 SUIT_DISPLAY = {'♥': '❤️ Cœur', '♦': '♦️ Carreau', '♣': '♣️ Trèfle', '♠': '♠️ Pique'}
 
 def get_suit_for_number(number):
     """Retourne le costume pour un numéro pair valide"""
-    if number not in VALID_EVEN_NUMBERS:
+    rank = valid_even_index().get(number)
+    if rank is None:
         return None
-    idx = VALID_EVEN_NUMBERS.index(number) % len(SUIT_CYCLE)
-    return SUIT_CYCLE[idx]
+    return SUIT_CYCLE[rank % len(SUIT_CYCLE)]
 
 def is_trigger_number(number):
     """Déclencheur: impair finissant par 1,3,5,7 ET suivant est pair valide"""
@@ -142,7 +145,7 @@ def is_trigger_number(number):
     if last_digit not in [1, 3, 5, 7]:
         return False
     next_num = number + 1
-    return next_num in VALID_EVEN_NUMBERS
+    return next_num in valid_even_index()
 
 def get_trigger_target(number):
     """Retourne le numéro pair à prédire"""
@@ -156,8 +159,8 @@ async def send_prediction_to_channel(target_game: int, predicted_suit: str, base
         logger.warning("⛔ Prédictions désactivées")
         return None
     
-    if state.verification_state['predicted_number'] is not None:
-        logger.warning(f"⛔ Prédiction #{state.verification_state['predicted_number']} en cours")
+    if state.verification_state.active:
+        logger.warning(f"⛔ Prédiction #{state.verification_state.predicted_number} en cours")
         return None
     
     try:
@@ -180,34 +183,27 @@ async def send_prediction_to_channel(target_game: int, predicted_suit: str, base
         
         # S'assurer que le client a l'entité
         try:
-            entity = await state.client.get_entity(channel_id)
-            pred_msg = await state.client.send_message(entity, prediction_msg)
+            with tracing.span('get_entity'):
+                entity = await state.client.get_entity(channel_id)
+            with tracing.span('send'), metrics.TELEGRAM_SECONDS.labels('send_message').time(), \
+                    shutdown_coordinator.inflight():
+                pred_msg = await state.client.send_message(entity, prediction_msg)
         except Exception as e:
             logger.error(f"❌ Erreur envoi (tentative fallback): {e}")
+            metrics.TELEGRAM_ERRORS.labels('send_message').inc()
             # Fallback direct avec l'ID si get_entity échoue
-            pred_msg = await state.client.send_message(channel_id, prediction_msg)
-        
-        state.verification_state = {
-            'predicted_number': target_game,
-            'predicted_suit': predicted_suit,
-            'current_check': 0,
-            'message_id': pred_msg.id,
-            'channel_id': channel_id,
-            'status': 'pending',
-            'base_game': base_game
-        }
+            with tracing.span('send'), metrics.TELEGRAM_SECONDS.labels('send_message').time(), \
+                    shutdown_coordinator.inflight():
+                pred_msg = await state.client.send_message(channel_id, prediction_msg)
+        tracing.mark_outcome('prediction')
+        
+        state.verification_state.start(target_game, predicted_suit, pred_msg.id, channel_id, base_game)
         
         state.total_predictions += 1
+        metrics.BOT_PREDICTIONS.labels('sent').inc()
         
         # Ajouter à l'historique
-        prediction_data = {
-            'game_number': target_game,
-            'suit': predicted_suit,
-            'status': '⏳',
-            'timestamp': datetime.now().isoformat(),
-            'time_str': datetime.now().strftime('%H:%M:%S')
-        }
-        state.prediction_history.append(prediction_data)
+        state.prediction_history.append(PredictionRecord(target_game, predicted_suit))
         
         logger.info(f"🚀 PRÉDICTION #{target_game} ({predicted_suit}) ENVOYÉE")
         return pred_msg.id
@@ -216,16 +212,20 @@ async def send_prediction_to_channel(target_game: int, predicted_suit: str, base
         logger.error(f"❌ Erreur envoi prédiction: {e}")
         return None
 
-async def update_prediction_status(status: str):
-    """Met à jour le statut de la prédiction"""
-    if state.verification_state['predicted_number'] is None:
+async def update_prediction_status(status: str, rattrapage: int = 0):
+    """Met à jour le statut de la prédiction
+
+    rattrapage: indice de la vérification qui a conclu (0 = jeu prédit)
+    """
+    verif = state.verification_state
+    if not verif.active:
         return False
     
     try:
-        predicted_num = state.verification_state['predicted_number']
-        predicted_suit = state.verification_state['predicted_suit']
-        message_id = state.verification_state['message_id']
-        channel_id = state.verification_state['channel_id']
+        predicted_num = verif.predicted_number
+        predicted_suit = verif.predicted_suit
+        message_id = verif.message_id
+        channel_id = verif.channel_id
         
         if status == "❌":
             status_text = "❌ PERDU"
@@ -236,28 +236,30 @@ async def update_prediction_status(status: str):
         
         # Log to database
         from database import log_prediction
-        log_prediction(predicted_num, predicted_suit, "WON" if "GAGNÉ" in status_text else "LOST")
+        won = "GAGNÉ" in status_text
+        with tracing.span('db_log'):
+            log_prediction(predicted_num, predicted_suit, "WON" if won else "LOST", rattrapage)
+        analytics.record(predicted_suit, won, rattrapage)
+        # Cache d'historique du process courant (les autres reçoivent le NOTIFY)
+        invalidation.publish('predictions_log', remote=False)
         
         updated_msg = f"""🎰 **PRÉDICTION #{predicted_num}**
 🎯 **Couleur:** {SUIT_DISPLAY.get(predicted_suit, predicted_suit)}
 📊 **Statut:** {status_text}"""
         
-        await state.client.edit_message(channel_id, message_id, updated_msg)
+        with tracing.span('edit'), metrics.TELEGRAM_SECONDS.labels('edit_message').time(), \
+                shutdown_coordinator.inflight():
+            await state.client.edit_message(channel_id, message_id, updated_msg)
+        tracing.mark_outcome('result')
+        metrics.BOT_PREDICTIONS.labels('won' if won else 'lost').inc()
         
         # Mettre à jour l'historique
-        for pred in state.prediction_history:
-            if pred['game_number'] == predicted_num:
-                pred['status'] = status
-                break
+        state.prediction_history.set_status(predicted_num, status)
         
         logger.info(f"✅ Prédiction #{predicted_num} mise à jour: {status}")
         
         # Reset état
-        state.verification_state = {
-            'predicted_number': None, 'predicted_suit': None,
-            'current_check': 0, 'message_id': None,
-            'channel_id': None, 'status': None, 'base_game': None
-        }
+        verif.reset()
         
         # S'assurer que le numéro actuel est mis à jour
         state.current_game_number = predicted_num
@@ -271,15 +273,15 @@ async def update_prediction_status(status: str):
 
 async def process_verification_step(game_number: int, first_group: str):
     """Traite une étape de vérification"""
-    if state.verification_state['predicted_number'] is None:
+    verif = state.verification_state
+    if not verif.active:
         return
     
-    predicted_num = state.verification_state['predicted_number']
-    predicted_suit = state.verification_state['predicted_suit']
-    current_check = state.verification_state['current_check']
+    predicted_num = verif.predicted_number
+    predicted_suit = verif.predicted_suit
+    current_check = verif.current_check
     
-    expected_number = predicted_num + current_check
-    if game_number != expected_number:
+    if game_number != verif.expected_number:
         return
     
     suits = extract_suits_from_group(first_group)
@@ -287,16 +289,16 @@ async def process_verification_step(game_number: int, first_group: str):
     
     if predicted_suit in suits:
         status = f"✅{current_check}️⃣"
-        await update_prediction_status(status)
+        await update_prediction_status(status, current_check)
         return
     
     if current_check < 3:
-        state.verification_state['current_check'] += 1
-        next_num = predicted_num + state.verification_state['current_check']
+        verif.current_check += 1
+        next_num = verif.expected_number
         logger.info(f"❌ Check {current_check} échoué, prochain: #{next_num}")
     else:
         logger.info(f"💔 PERDU après 4 vérifications")
-        await update_prediction_status("❌")
+        await update_prediction_status("❌", current_check)
 
 def extract_suits_from_group(group_str: str) -> list:
     """Extrait les costumes d'un groupe"""
@@ -306,20 +308,13 @@ def extract_suits_from_group(group_str: str) -> list:
 async def check_and_launch_prediction(game_number: int):
     """Vérifie et lance une prédiction"""
     # Bloquer si prédiction en cours
-    if state.verification_state['predicted_number'] is not None:
+    if state.verification_state.active:
         logger.warning(f"⛔ BLOQUÉ: Prédiction en attente de vérification")
         return
     
-    # Vérifier pause
-    if state.pause_config['is_paused']:
-        try:
-            end_time = datetime.fromisoformat(state.pause_config['pause_end_time'])
-            if datetime.now() < end_time:
-                return
-            state.pause_config['is_paused'] = False
-            logger.info("🔄 Pause terminée")
-        except:
-            state.pause_config['is_paused'] = False
+    # Vérifier pause (la fin est programmée par le scheduler)
+    if state.pause_scheduler.is_paused:
+        return
     
     # Vérifier déclencheur
     if not is_trigger_number(game_number):
@@ -329,29 +324,8 @@ async def check_and_launch_prediction(game_number: int):
     if not target_num:
         return
     
-    # Cycle de pause
-    state.pause_config['predictions_count'] += 1
-    if state.pause_config['predictions_count'] >= 5:
-        cycle = state.pause_config['cycle']
-        idx = state.pause_config['current_index'] % len(cycle)
-        duration = cycle[idx]
-        
-        state.pause_config['is_paused'] = True
-        state.pause_config['pause_end_time'] = (datetime.now() + timedelta(seconds=duration)).isoformat()
-        state.pause_config['current_index'] += 1
-        state.pause_config['predictions_count'] = 0
-        
-        minutes = duration // 60
-        logger.info(f"⏸️ PAUSE: {minutes}min")
-        
-        try:
-            await state.client.send_message(
-                PREDICTION_CHANNEL_ID,
-                f"⏸️ **PAUSE**\n⏱️ {minutes} minutes..."
-            )
-        except Exception as e:
-            logger.error(f"Erreur message pause: {e}")
-        
+    # Cycle de pause (annonce dans le canal par on_pause_event)
+    if state.pause_scheduler.count_prediction():
         return
     
     # Lancer prédiction
@@ -359,6 +333,35 @@ async def check_and_launch_prediction(game_number: int):
     if suit:
         await send_prediction_to_channel(target_num, suit, game_number)
 
+# Annonces de pause en cours d'envoi (référence gardée jusqu'à la fin)
+_pause_announcements = set()
+
+def on_pause_event(event: str, scheduler):
+    """Début / fin de pause: état republié, annonce dans le canal de prédiction"""
+    shared_state.mark_dirty()
+    if state.client is None or scheduler is not state.pause_scheduler:
+        return
+    if event == 'start':
+        text = f"⏸️ **PAUSE**\n⏱️ {int(scheduler.duration) // 60} minutes..."
+    else:
+        text = "▶️ **REPRISE**\n🎯 Les prédictions reprennent"
+    try:
+        task = asyncio.get_running_loop().create_task(_announce_pause(text))
+    except RuntimeError:
+        return
+    _pause_announcements.add(task)
+    task.add_done_callback(_pause_announcements.discard)
+
+async def _announce_pause(text: str):
+    try:
+        with metrics.TELEGRAM_SECONDS.labels('send_message').time(), shutdown_coordinator.inflight():
+            await state.client.send_message(PREDICTION_CHANNEL_ID, text)
+    except Exception as e:
+        metrics.TELEGRAM_ERRORS.labels('send_message').inc()
+        logger.error(f"Erreur message pause: {e}")
+
+pause.subscribe(on_pause_event)
+
 # ============================================================
 # TRAITEMENT MESSAGES SOURCE (MODIFIÉ)
 # ============================================================
@@ -369,8 +372,24 @@ def is_message_finalized(message: str) -> bool:
 def is_message_editing(message: str) -> bool:
     return message.strip().startswith('⏰')
 
+def relevant_content(message: str):
+    """Ce qui influence le traitement d'une version du message: numéro et
+    premier groupe, préfixe de déduplication, marqueurs ⏰ / ✅🔰.
+    None si le message ne suit pas le format #N…(…) (toujours traité)."""
+    end = message.find(')')
+    head = message[:end + 1]
+    if end < 0 or '#N' not in head.upper():
+        return None
+    return (head, message[:30], is_message_editing(message), is_message_finalized(message))
+
 async def process_source_message(message_text: str, chat_id: int, source_ids: dict, is_finalized=False, config=None):
     """Traite les messages du canal source avec prédiction automatique"""
+    with tracing.span('process'), metrics.BOT_PROCESS_SECONDS.time():
+        await _process_source_message(message_text, chat_id, source_ids, is_finalized, config)
+    # Publier l'état pour les workers web (regroupé, hors chemin critique)
+    shared_state.mark_dirty()
+
+async def _process_source_message(message_text: str, chat_id: int, source_ids: dict, is_finalized=False, config=None):
     try:
         # Log pour debug
         logger.info(f"Traitement message source: chat_id={chat_id}, attendu={source_ids.get('SOURCE_CHANNEL_ID')}")
@@ -379,10 +398,12 @@ async def process_source_message(message_text: str, chat_id: int, source_ids: di
         if str(chat_id) != str(source_ids.get('SOURCE_CHANNEL_ID')):
             return
         
-        game_number = extract_game_number(message_text)
+        with metrics.BOT_PARSE_SECONDS.time():
+            game_number = extract_game_number(message_text)
         logger.info(f"Numéro de jeu extrait: {game_number}")
         if game_number is None:
             return
+        tracing.set_game(game_number)
         
         state.current_game_number = game_number
         state.last_source_game_number = game_number
@@ -397,10 +418,8 @@ async def process_source_message(message_text: str, chat_id: int, source_ids: di
         is_final = is_message_finalized(message_text)
         
         # Vérification prédiction en cours
-        if state.verification_state['predicted_number'] is not None:
-            predicted_num = state.verification_state['predicted_number']
-            current_check = state.verification_state['current_check']
-            expected_number = predicted_num + current_check
+        if state.verification_state.active:
+            expected_number = state.verification_state.expected_number
             
             if is_editing and game_number == expected_number:
                 logger.info(f"⏳ Message #{game_number} en édition, attente")
@@ -414,12 +433,13 @@ async def process_source_message(message_text: str, chat_id: int, source_ids: di
             return  # Jamais de nouveau lancement si vérification en cours
         
         # Nouveau lancement
-        await check_and_launch_prediction(game_number)
+        with tracing.span('launch'):
+            await check_and_launch_prediction(game_number)
         
         # Vérifier résultat si finalisé
         if is_finalized:
             groups = extract_parentheses_groups(message_text)
-            if len(groups) >= 1 and state.verification_state['predicted_number'] is not None:
+            if len(groups) >= 1 and state.verification_state.active:
                 await process_verification_step(game_number, groups[0])
         
     except Exception as e:
@@ -427,51 +447,146 @@ async def process_source_message(message_text: str, chat_id: int, source_ids: di
         import traceback
         logger.error(traceback.format_exc())
 
+# ============================================================
+# SAUVEGARDE D'ÉTAT (ARRÊT / REDÉMARRAGE)
+# ============================================================
+
+def export_runtime_state() -> dict:
+    """État à conserver entre deux process (prédiction en vérification, pause)"""
+    return {
+        'verification_state': state.verification_state.to_dict(),
+        'pause_config': state.pause_config,
+        'predictions_enabled': state.predictions_enabled,
+        'current_game_number': state.current_game_number,
+        'last_source_game_number': state.last_source_game_number,
+        'prediction_history': state.prediction_history.view(),
+        'saved_at': datetime.now().isoformat()
+    }
+
+def restore_runtime_state(data: dict):
+    """Restaure l'état sauvegardé par export_runtime_state()"""
+    state.verification_state.update(data.get('verification_state') or {})
+    state.pause_config.update(data.get('pause_config') or {})
+    state.pause_scheduler.restore()
+    state.predictions_enabled = data.get('predictions_enabled', True)
+    state.current_game_number = data.get('current_game_number', 0)
+    state.last_source_game_number = data.get('last_source_game_number', 0)
+    state.prediction_history.extend(data.get('prediction_history') or [])
+    verif = state.verification_state.predicted_number
+    logger.info(f"♻️ État restauré (sauvé {data.get('saved_at')}), vérification: {verif or 'aucune'}")
+
+async def save_runtime_state():
+    """Écrit l'état d'exécution en base (étape d'arrêt)"""
+    from database import save_bot_runtime
+    payload = json.dumps(export_runtime_state(), ensure_ascii=False, default=str)
+    await asyncio.to_thread(save_bot_runtime, payload)
+
 # ============================================================
 # HANDLERS (conservés et modifiés)
 # ============================================================
 
-async def handle_message(event, config, source_ids):
-    """Gestionnaire de messages principal"""
+# Mises à jour déjà traitées: Telethon peut en rejouer après une reconnexion
+SEEN_UPDATES_SIZE = 2048
+_seen_updates = OrderedDict()
+
+def source_chat_ids(source_ids: dict) -> frozenset:
+    """Identifiants marqués (-100…) des canaux source, filtre des handlers"""
+    return _source_set(source_ids.get('SOURCE_CHANNEL_ID'), source_ids.get('SOURCE_CHANNEL_2_ID'))
+
+@functools.lru_cache(maxsize=8)
+def _source_set(*ids) -> frozenset:
+    return frozenset(int(i) for i in ids if i)
+
+async def resolve_chat_id(event) -> int:
+    """event.chat_id est déjà marqué par Telethon (aucun appel réseau);
+    get_chat() ne sert qu'en dernier recours"""
+    chat_id = event.chat_id
+    if chat_id is not None:
+        return chat_id
+    chat = await event.get_chat()
+    chat_id = chat.id
+    if getattr(chat, 'broadcast', False) and not str(chat_id).startswith('-100'):
+        chat_id = int(f"-100{abs(chat_id)}")
+    return chat_id
+
+def _first_delivery(key) -> bool:
+    """Vrai à la première livraison d'une mise à jour"""
+    if key in _seen_updates:
+        _seen_updates.move_to_end(key)
+        return False
+    _seen_updates[key] = None
+    if len(_seen_updates) > SEEN_UPDATES_SIZE:
+        _seen_updates.popitem(last=False)
+    return True
+
+async def _dispatch_source_update(event, kind: str, config, source_ids):
+    """Filtre, déduplique et met en file une mise à jour d'un canal source"""
+    if shutdown_coordinator.stopping:
+        metrics.BOT_EVENTS_DROPPED.labels(kind, 'stopping').inc()
+        return
     try:
-        chat = await event.get_chat()
-        chat_id = chat.id
-        if hasattr(chat, 'broadcast') and chat.broadcast:
-            if not str(chat_id).startswith('-100'):
-                chat_id = int(f"-100{abs(chat_id)}")
+        chat_id = await resolve_chat_id(event)
+        if chat_id not in source_chat_ids(source_ids):
+            metrics.BOT_EVENTS_DROPPED.labels(kind, 'foreign').inc()
+            return
         
-        message_text = event.message.message
+        message = event.message
+        message_text = message.message
+        if kind == 'new':
+            key = (kind, chat_id, message.id)
+        else:
+            # Deux éditions différentes peuvent partager la même edit_date (seconde)
+            key = (kind, chat_id, message.id, hash(message_text))
+        if not _first_delivery(key):
+            metrics.BOT_EVENTS_DROPPED.labels(kind, 'duplicate').inc()
+            return
         
-        # Traiter uniquement le canal source
-        if str(chat_id) == str(source_ids.get('SOURCE_CHANNEL_ID')) or str(chat_id) == str(source_ids.get('SOURCE_CHANNEL_2_ID')):
-            is_final = is_message_finalized(message_text)
-            await process_source_message(message_text, chat_id, source_ids, is_final, config)
+        metrics.BOT_MESSAGES.labels(kind).inc()
+        message_time = message.date if kind == 'new' else (message.edit_date or message.date)
+        settled = is_message_finalized(message_text)
+        is_final = kind == 'new' and settled
+        # Le traitement se fait dans le worker du canal (ordre conservé,
+        # éditions intermédiaires regroupées)
+        await ingestion.submit(SourceUpdate(chat_id, kind, message.id, message_text, is_final,
+                                            tracing.Trace(message_time), settled=settled,
+                                            content_key=relevant_content(message_text)))
         
     except Exception as e:
-        logger.error(f"Erreur handle_message: {e}")
+        logger.error(f"Erreur dispatch ({kind}): {e}")
+
+async def apply_source_update(update, config, source_ids):
+    """Worker d'ingestion: applique une mise à jour à la machine d'état"""
+    token = tracing.attach(update.trace)
+    try:
+        tracing.record_span('queue', update.enqueued_at)
+        with tracing.span('handle'):
+            await process_source_message(update.text, update.chat_id, source_ids, update.is_final, config)
+    finally:
+        if tracing.finish_trace(token):
+            # Nouvelle mesure: republiée pour /api/admin/latency
+            shared_state.mark_dirty()
+
+async def handle_message(event, config, source_ids):
+    """Gestionnaire de messages principal"""
+    await _dispatch_source_update(event, 'new', config, source_ids)
 
 async def handle_edited_message(event, config, source_ids):
     """Gestionnaire des messages édités"""
-    try:
-        chat = await event.get_chat()
-        chat_id = chat.id
-        if hasattr(chat, 'broadcast') and chat.broadcast:
-            if not str(chat_id).startswith('-100'):
-                chat_id = int(f"-100{abs(chat_id)}")
-        
-        if str(chat_id) == str(source_ids.get('SOURCE_CHANNEL_ID')) or str(chat_id) == str(source_ids.get('SOURCE_CHANNEL_2_ID')):
-            message_text = event.message.message
-            await process_source_message(message_text, chat_id, source_ids, False, config)
-            
-    except Exception as e:
-        logger.error(f"Erreur handle_edited: {e}")
+    await _dispatch_source_update(event, 'edited', config, source_ids)
 
 # ============================================================
 # COMMANDES ADMIN POUR PRÉDICTIONS
 # ============================================================
 
-def setup_handlers(client, config, source_ids):
-    """Configure les gestionnaires d'événements"""
+def setup_handlers(client, config, source_ids, events=None):
+    """Configure les gestionnaires d'événements
+
+    events: module d'événements compatible Telethon (client factice des benchmarks)
+    """
+    # Telethon n'est chargé que par le rôle bot
+    if events is None:
+        from telethon import events
+    
     state.client = client
     
     # 🔧 Update initial stats from database
@@ -484,6 +599,22 @@ def setup_handlers(client, config, source_ids):
     except Exception as e:
         logger.error(f"Error loading stats: {e}")
     
+    # Statistiques détaillées: une seule lecture groupée, puis incrémental
+    try:
+        from database import get_prediction_aggregates
+        analytics.load(*get_prediction_aggregates())
+    except Exception as e:
+        logger.error(f"Error loading analytics: {e}")
+    
+    # Reprendre la vérification / la pause sauvegardées au dernier arrêt
+    try:
+        from database import pop_bot_runtime
+        saved = pop_bot_runtime()
+        if saved:
+            restore_runtime_state(json.loads(saved))
+    except Exception as e:
+        logger.error(f"Error restoring runtime state: {e}")
+    
     @client.on(events.NewMessage(pattern='/start'))
     async def cmd_start(event):
         if event.is_group or event.is_channel:
@@ -529,12 +660,8 @@ Commandes:
         if str(event.sender_id) != str(config.get('ADMIN_ID')):
             return
         state.predictions_enabled = False
-        old = state.verification_state['predicted_number']
-        state.verification_state = {
-            'predicted_number': None, 'predicted_suit': None,
-            'current_check': 0, 'message_id': None,
-            'channel_id': None, 'status': None, 'base_game': None
-        }
+        old = state.verification_state.predicted_number
+        state.verification_state.reset()
         await event.respond(f"🚨 Arrêt forcé. Prédiction #{old} effacée." if old else "🚨 Système débloqué")
     
     @client.on(events.NewMessage(pattern='/predictinfo'))
@@ -543,20 +670,23 @@ Commandes:
             return
         
         verif = state.verification_state
-        verif_info = f"#{verif['predicted_number']} ({verif['predicted_suit']})" if verif['predicted_number'] else "Aucune"
+        verif_info = f"#{verif.predicted_number} ({verif.predicted_suit})" if verif.active else "Aucune"
         
         cycle_mins = [x//60 for x in state.pause_config['cycle']]
         idx = state.pause_config['current_index'] % len(cycle_mins)
         
         pause_status = "Non"
-        if state.pause_config['is_paused']:
-            try:
-                end = datetime.fromisoformat(state.pause_config['pause_end_time'])
-                remaining = int((end - datetime.now()).total_seconds())
-                if remaining > 0:
-                    pause_status = f"Oui ({remaining//60}min)"
-            except:
-                pass
+        if state.pause_scheduler.is_paused:
+            remaining = int(state.pause_scheduler.remaining())
+            pause_status = f"Oui ({remaining // 60}min {remaining % 60:02d}s)"
+        
+        latency = tracing.summary()
+        latency_lines = []
+        for outcome, label in (('prediction', 'Source → prédiction'), ('result', 'Résultat → statut')):
+            total = latency.get(outcome, {}).get('end_to_end') or latency.get(outcome, {}).get('total')
+            if total:
+                latency_lines.append(f"• {label}: p50 {total['p50']:.0f} ms / p95 {total['p95']:.0f} ms ({total['count']})")
+        latency_info = '\n'.join(latency_lines) or '• Aucune mesure'
         
         await event.respond(f"""📊 STATUT
 
@@ -565,20 +695,19 @@ Commandes:
 🟢 Prédictions: {'ON' if state.predictions_enabled else 'OFF'}
 
 ⏸️ Pause: {pause_status}
-• Compteur: {state.pause_config['predictions_count']}/5
+• Compteur: {state.pause_config['predictions_count']}/{pause.PAUSE_EVERY}
 • Cycle: {cycle_mins} min
-• Position: {idx+1}/{len(cycle_mins)}""")
+• Position: {idx+1}/{len(cycle_mins)}
+
+⚡ Latence:
+{latency_info}""")
     
     @client.on(events.NewMessage(pattern='/clearverif'))
     async def cmd_clearverif(event):
         if str(event.sender_id) != str(config.get('ADMIN_ID')):
             return
-        old = state.verification_state['predicted_number']
-        state.verification_state = {
-            'predicted_number': None, 'predicted_suit': None,
-            'current_check': 0, 'message_id': None,
-            'channel_id': None, 'status': None, 'base_game': None
-        }
+        old = state.verification_state.predicted_number
+        state.verification_state.reset()
         await event.respond(f"✅ Vérification #{old} effacée" if old else "✅ Système libre")
     
     @client.on(events.NewMessage(pattern=r'^/pausecycle'))
@@ -595,16 +724,16 @@ Commandes:
 
 Cycle: {cycle_mins} min
 Position: {idx+1}/{len(cycle_mins)}
-Compteur: {state.pause_config['predictions_count']}/4
+Compteur: {state.pause_config['predictions_count']}/{pause.PAUSE_EVERY}
 
 Modifier: /pausecycle 3,5,4""")
         else:
             try:
                 new_mins = [int(x) for x in parts[1].split(',') if x.strip()]
                 if new_mins and all(x > 0 for x in new_mins):
-                    state.pause_config['cycle'] = [x * 60 for x in new_mins]
-                    state.pause_config['current_index'] = 0
-                    await event.respond(f"✅ Cycle: {new_mins} min")
+                    state.pause_scheduler.set_cycle([x * 60 for x in new_mins])
+                    shared_state.mark_dirty()
+                    await event.respond(f"✅ Cycle: {new_mins} min (dès la prochaine pause)")
                 else:
                     await event.respond("❌ Nombres positifs requis")
             except Exception as e:
@@ -640,14 +769,15 @@ Modifier: /pausecycle 3,5,4""")
 /pausecycle - Cycle pause
 /bilan - Stats""")
     
-    @client.on(events.NewMessage())
+    # Filtre à l'enregistrement: les commandes admin et les autres chats
+    # ne déclenchent jamais le traitement source
+    sources = sorted(source_chat_ids(source_ids)) or None
+    ingestion.configure(functools.partial(apply_source_update, config=config, source_ids=source_ids))
+    
+    @client.on(events.NewMessage(chats=sources))
     async def on_message(event):
         await handle_message(event, config, source_ids)
 
-    @client.on(events.MessageEdited())
+    @client.on(events.MessageEdited(chats=sources))
     async def on_edited_message(event):
         await handle_edited_message(event, config, source_ids)
-    
-    @client.on(events.MessageEdited())
-    async def on_edited(event):
-        await handle_edited_message(event, config, source_ids)
@@ -0,0 +1,260 @@
+"""
+Diffusion d'un message à tous les abonnés via le bot admin
+
+Une diffusion est créée en base (database.create_broadcast: une ligne
+par destinataire) par le tableau de bord ou /broadcast; le process bot
+la reçoit par NOTIFY (canal 'broadcasts') et l'envoie:
+  - destinataires lus par lots de BROADCAST_CHUNK (parcours par clé),
+    jamais tous chargés en mémoire
+  - BROADCAST_CONCURRENCY envois simultanés au plus
+  - débit global BROADCAST_RATE msg/s (seau à jetons) et au plus un
+    message par BROADCAST_RECIPIENT_INTERVAL s vers un même chat
+  - FloodWait: tout le débit est suspendu le temps demandé par
+    Telegram, puis le message est renvoyé; autres erreurs: nouvel essai
+    (MAX_ATTEMPTS), sauf erreurs définitives (bot bloqué, compte supprimé)
+  - statuts enregistrés par paquets de FLUSH_SIZE (une requête)
+Les lignes encore 'pending' sont reprises au redémarrage du bot; un
+envoi interrompu avant son enregistrement peut donc être refait.
+"""
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+
+import metrics
+import invalidation
+
+logger = logging.getLogger(__name__)
+
+BROADCAST_RATE = float(os.getenv('BROADCAST_RATE', '25'))
+BROADCAST_CONCURRENCY = int(os.getenv('BROADCAST_CONCURRENCY', '8'))
+BROADCAST_RECIPIENT_INTERVAL = float(os.getenv('BROADCAST_RECIPIENT_INTERVAL', '1'))
+BROADCAST_CHUNK = 500
+FLUSH_SIZE = 100
+MAX_ATTEMPTS = 3
+RETRY_DELAY = 2.0
+# Chats récemment servis gardés pour la limite par destinataire
+RECENT_SIZE = 4096
+
+# Erreurs Telethon sans espoir de succès au prochain essai
+PERMANENT_ERRORS = frozenset((
+    'UserIsBlockedError', 'InputUserDeactivatedError', 'UserDeactivatedError',
+    'UserDeactivatedBanError', 'PeerIdInvalidError', 'ChatWriteForbiddenError',
+))
+
+BROADCAST_MESSAGES = metrics.counter('bot_broadcast_messages_total',
+                                     'Messages de diffusion par résultat', ('result',))
+
+
+class RateLimiter:
+    """Seau à jetons partagé par tous les envois (ordre d'arrivée respecté)"""
+
+    def __init__(self, rate: float, burst: float = 1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    await asyncio.sleep(self.paused_until - now)
+                    continue
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        """FloodWait: plus aucun envoi pendant `seconds`"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+
+
+class Broadcaster:
+    def __init__(self, rate: float = BROADCAST_RATE, concurrency: int = BROADCAST_CONCURRENCY,
+                 recipient_interval: float = BROADCAST_RECIPIENT_INTERVAL):
+        self.client = None
+        self.limiter = RateLimiter(rate)
+        self.concurrency = concurrency
+        self.recipient_interval = recipient_interval
+        self.tasks = {}
+        self.flood_waits = 0
+        self._recent = OrderedDict()  # chat -> dernier envoi (monotonic)
+
+    # ---------------- Cycle de vie ----------------
+
+    def start(self, broadcast: dict):
+        """Lance l'envoi d'une diffusion 'running' (sans effet si déjà en cours)"""
+        broadcast_id = broadcast['id']
+        if self.client is None or broadcast_id in self.tasks or broadcast['status'] != 'running':
+            return
+        task = asyncio.get_running_loop().create_task(self._run(broadcast))
+        self.tasks[broadcast_id] = task
+        task.add_done_callback(lambda _: self.tasks.pop(broadcast_id, None))
+
+    def cancel(self, broadcast_id: int):
+        task = self.tasks.get(broadcast_id)
+        if task is not None:
+            task.cancel()
+
+    async def resume(self):
+        """Reprend les diffusions interrompues par un arrêt"""
+        from database import get_running_broadcasts
+        for broadcast in await asyncio.to_thread(get_running_broadcasts):
+            logger.info(f"♻️ Reprise de la diffusion #{broadcast['id']} "
+                        f"({broadcast['sent'] + broadcast['failed']}/{broadcast['total']})")
+            self.start(broadcast)
+
+    def on_notify(self, payload=None):
+        """Canal 'broadcasts': nouvelle diffusion ou annulation"""
+        try:
+            broadcast_id = int(payload)
+        except (TypeError, ValueError):
+            return
+        asyncio.get_running_loop().create_task(self._refresh(broadcast_id))
+
+    async def _refresh(self, broadcast_id: int):
+        from database import get_broadcast
+        broadcast = await asyncio.to_thread(get_broadcast, broadcast_id)
+        if broadcast is None or broadcast['status'] == 'cancelled':
+            self.cancel(broadcast_id)
+        else:
+            self.start(broadcast)
+
+    async def stop(self):
+        """Arrêt: interrompt les envois, les résultats obtenus sont enregistrés"""
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ---------------- Envoi ----------------
+
+    async def _run(self, broadcast: dict):
+        from database import get_broadcast_batch, finish_broadcast
+        broadcast_id = broadcast['id']
+        queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        results = []
+        workers = [asyncio.ensure_future(self._worker(queue, broadcast['text'], results))
+                   for _ in range(self.concurrency)]
+        started = time.perf_counter()
+        logger.info(f"📣 Diffusion #{broadcast_id} vers {broadcast['total']} destinataires")
+        try:
+            after = 0
+            while True:
+                rows = await asyncio.to_thread(get_broadcast_batch, broadcast_id, after, BROADCAST_CHUNK)
+                if not rows:
+                    break
+                for row in rows:
+                    await queue.put(row)
+                    if len(results) >= FLUSH_SIZE:
+                        await self._flush(broadcast_id, results)
+                after = rows[-1][0]
+            await queue.join()
+            await self._flush(broadcast_id, results)
+            await asyncio.to_thread(finish_broadcast, broadcast_id)
+            logger.info(f"✅ Diffusion #{broadcast_id} terminée en {time.perf_counter() - started:.1f}s")
+        except asyncio.CancelledError:
+            logger.info(f"⏹️ Diffusion #{broadcast_id} interrompue")
+            raise
+        except Exception as e:
+            logger.error(f"❌ Diffusion #{broadcast_id}: {e}")
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            try:
+                await self._flush(broadcast_id, results)
+            except Exception as e:
+                logger.error(f"❌ Diffusion #{broadcast_id}: {len(results)} statuts non enregistrés ({e})")
+
+    async def _flush(self, broadcast_id: int, results: list):
+        if not results:
+            return
+        from database import record_broadcast_deliveries
+        batch = results[:]
+        results.clear()
+        await asyncio.to_thread(record_broadcast_deliveries, broadcast_id, batch)
+
+    async def _worker(self, queue, text: str, results: list):
+        while True:
+            user_id, chat_id, attempts = await queue.get()
+            try:
+                status, attempts, error = await self._deliver(chat_id, text, attempts)
+                results.append((user_id, status, attempts, error))
+                BROADCAST_MESSAGES.labels(status).inc()
+            finally:
+                queue.task_done()
+
+    async def _deliver(self, chat_id: int, text: str, attempts: int):
+        """-> (statut, essais, erreur); les FloodWait ne comptent pas comme essais"""
+        while True:
+            await self._wait_recipient(chat_id)
+            await self.limiter.acquire()
+            attempts += 1
+            try:
+                with metrics.TELEGRAM_SECONDS.labels('broadcast').time():
+                    await self.client.send_message(chat_id, text)
+                self._mark_recipient(chat_id)
+                return 'sent', attempts, None
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                name = type(e).__name__
+                seconds = getattr(e, 'seconds', None)
+                if name == 'FloodWaitError' and seconds is not None:
+                    attempts -= 1
+                    self.flood_waits += 1
+                    BROADCAST_MESSAGES.labels('flood_wait').inc()
+                    logger.warning(f"⏳ FloodWait {seconds}s: diffusion suspendue")
+                    self.limiter.pause(seconds)
+                    continue
+                if name in PERMANENT_ERRORS or attempts >= MAX_ATTEMPTS:
+                    return 'failed', attempts, f"{name}: {e}"[:200]
+                BROADCAST_MESSAGES.labels('retry').inc()
+                await asyncio.sleep(RETRY_DELAY * attempts)
+
+    async def _wait_recipient(self, chat_id: int):
+        last = self._recent.get(chat_id)
+        if last is not None:
+            delay = last + self.recipient_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+    def _mark_recipient(self, chat_id: int):
+        recent = self._recent
+        recent[chat_id] = time.monotonic()
+        recent.move_to_end(chat_id)
+        if len(recent) > RECENT_SIZE:
+            recent.popitem(last=False)
+
+    def snapshot(self) -> dict:
+        return {
+            'running': sorted(self.tasks),
+            'rate': self.limiter.rate,
+            'concurrency': self.concurrency,
+            'flood_waits': self.flood_waits,
+            'paused_for_s': round(max(0.0, self.limiter.paused_until - time.monotonic()), 1),
+        }
+
+
+broadcaster = Broadcaster()
+
+
+async def start(client):
+    """Process bot: envoie avec `client` (bot admin) et reprend les diffusions en cours"""
+    broadcaster.client = client
+    invalidation.subscribe('broadcasts', broadcaster.on_notify)
+    try:
+        invalidation.start_listener()
+    except Exception as e:
+        logger.warning(f"⚠️ Diffusions: notifications indisponibles ({e})")
+    await broadcaster.resume()
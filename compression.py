@@ -0,0 +1,116 @@
+"""
+Compression des réponses HTML / JSON (gzip, brotli si le module est installé)
+
+web_server.compression_middleware choisit l'encodage selon
+Accept-Encoding (q-values respectées, br préféré à gzip) et compresse:
+  - les corps sous COMPRESS_MIN_SIZE octets sont envoyés tels quels
+  - les corps en mémoire sont compressés en une fois, dans un thread
+    au-delà de COMPRESS_THREAD_SIZE pour ne pas bloquer la boucle
+  - les réponses en flux (fichiers statiques) sont compressées au fil
+    de l'envoi par aiohttp
+Les corps identiques d'une requête à l'autre (pages d'historique,
+statistiques, liste admin, pages rendues) sont compressés une seule
+fois: cache LRU clé (encodage, empreinte du corps). /api/predictions
+porte des champs propres à l'abonné et l'heure: compressé à chaque fois.
+
+Octets économisés et temps CPU par route: métriques web_compress_*.
+"""
+import os
+import gzip
+import time
+import hashlib
+import logging
+from collections import OrderedDict
+
+import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli facultatif: gzip seul
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+COMPRESS_THREAD_SIZE = 256 * 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+CACHE_SIZE = 64
+# Corps plus gros (compressés dans un thread): jamais gardés, le cache
+# n'est touché que depuis la boucle
+CACHE_MAX_BODY = COMPRESS_THREAD_SIZE - 1
+
+COMPRESSIBLE_TYPES = ('text/', 'application/json', 'application/javascript', 'image/svg+xml')
+
+COMPRESS_SECONDS = metrics.histogram('web_compress_seconds', 'Temps CPU de compression par route',
+                                     ('route', 'encoding'),
+                                     buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025,
+                                              0.005, 0.01, 0.025, 0.05, 0.1))
+COMPRESS_BYTES_IN = metrics.counter('web_compress_bytes_in_total', 'Octets avant compression', ('route',))
+COMPRESS_BYTES_OUT = metrics.counter('web_compress_bytes_out_total', 'Octets envoyés après compression', ('route',))
+COMPRESS_CACHE = metrics.counter('web_compress_cache_total', 'Réutilisation des corps déjà compressés', ('result',))
+
+ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+_cache = OrderedDict()  # (encodage, empreinte) -> corps compressé
+
+
+def choose_encoding(accept_encoding: str, available=ENCODINGS):
+    """Meilleur encodage accepté par le client parmi `available` (None: identité)"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for item in accept_encoding.split(','):
+        name, _, params = item.strip().partition(';')
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    wildcard = accepted.get('*', 0.0)
+    best = max(available, key=lambda e: accepted.get(e, wildcard))
+    return best if accepted.get(best, wildcard) > 0 else None
+
+
+def compressible(content_type: str) -> bool:
+    return content_type.startswith(COMPRESSIBLE_TYPES)
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == 'br':
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    # mtime fixe: même corps -> mêmes octets (cache, ETag intermédiaires)
+    return gzip.compress(body, GZIP_LEVEL, mtime=0)
+
+
+def compress(body: bytes, encoding: str, route: str) -> bytes:
+    """Corps compressé, depuis le cache si ce même corps l'a déjà été"""
+    key = None
+    if len(body) <= CACHE_MAX_BODY:
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            COMPRESS_CACHE.labels('hit').inc()
+            record(route, len(body), len(cached))
+            return cached
+        COMPRESS_CACHE.labels('miss').inc()
+
+    start = time.perf_counter()
+    compressed = _compress(body, encoding)
+    COMPRESS_SECONDS.labels(route, encoding).observe(time.perf_counter() - start)
+    record(route, len(body), len(compressed))
+
+    if key is not None:
+        _cache[key] = compressed
+        if len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return compressed
+
+
+def record(route: str, size_in: int, size_out: int):
+    COMPRESS_BYTES_IN.labels(route).inc(size_in)
+    COMPRESS_BYTES_OUT.labels(route).inc(size_out)
@@ -2,17 +2,28 @@
 Gestion de la base de données SQLite
 """
 import os
+import logging
 import psycopg2
 import hashlib
 import secrets
 from psycopg2.extras import RealDictCursor
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, date
 from config import DATABASE_URL
+from metrics import track_db
+
+logger = logging.getLogger(__name__)
+
+# Mois de predictions_log conservés en détail; au-delà, la partition est
+# résumée dans predictions_rollup puis détachée et supprimée
+PREDICTIONS_RETENTION_MONTHS = int(os.getenv('PREDICTIONS_RETENTION_MONTHS', '12'))
+# Partitions créées d'avance
+PARTITIONS_AHEAD = 2
 
 def get_connection():
     """Crée une connexion à la base de données PostgreSQL"""
     return psycopg2.connect(DATABASE_URL)
 
+@track_db
 def init_db():
     """Initialise la base de données PostgreSQL"""
     conn = get_connection()
@@ -47,18 +58,59 @@ def init_db():
         )
     ''')
     
-    # Table prédictions
+    # Table prédictions (partitionnée par mois, voir PARTITIONS)
+    _init_predictions_log(c)
+    
+    # État partagé bot -> workers web (une seule ligne, id = 1)
     c.execute('''
-        CREATE TABLE IF NOT EXISTS predictions_log (
+        CREATE TABLE IF NOT EXISTS bot_state (
+            id INTEGER PRIMARY KEY,
+            version BIGINT NOT NULL,
+            payload TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # État d'exécution du bot sauvegardé à l'arrêt (vérification en cours, pause)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS bot_runtime (
+            id INTEGER PRIMARY KEY,
+            payload TEXT NOT NULL,
+            saved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Diffusions aux abonnés (broadcast.py): une ligne par destinataire,
+    # reprise après redémarrage sur les lignes encore 'pending'
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS broadcasts (
             id SERIAL PRIMARY KEY,
-            game_number INTEGER NOT NULL,
-            suit TEXT NOT NULL,
-            status TEXT NOT NULL,
-            rattrapage INTEGER DEFAULT 0,
+            text TEXT NOT NULL,
+            audience TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'running',
+            total INTEGER NOT NULL DEFAULT 0,
+            sent INTEGER NOT NULL DEFAULT 0,
+            failed INTEGER NOT NULL DEFAULT 0,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            resolved_at TIMESTAMP
+            finished_at TIMESTAMP
         )
     ''')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS broadcast_deliveries (
+            broadcast_id INTEGER NOT NULL REFERENCES broadcasts(id) ON DELETE CASCADE,
+            user_id INTEGER NOT NULL,
+            telegram_id BIGINT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            sent_at TIMESTAMP,
+            PRIMARY KEY (broadcast_id, user_id)
+        )
+    ''')
+    c.execute('''
+        CREATE INDEX IF NOT EXISTS broadcast_deliveries_pending_idx
+        ON broadcast_deliveries (broadcast_id, user_id) WHERE status = 'pending'
+    ''')
     
     conn.commit()
     c.close()
@@ -66,6 +118,176 @@ def init_db():
     
     create_default_admin()
 
+# ============================================================
+# PARTITIONS (predictions_log)
+# ============================================================
+
+def _month_start(day: date, offset: int = 0) -> date:
+    month = day.month - 1 + offset
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+def _partition_name(month: date) -> str:
+    return f"predictions_log_{month:%Y%m}"
+
+def _create_partition(c, month: date):
+    bounds = (month, _month_start(month, 1))
+    # Des lignes du mois tombées dans la partition par défaut empêcheraient la création
+    c.execute('CREATE TEMP TABLE predictions_log_moved (LIKE predictions_log) ON COMMIT DROP')
+    c.execute('''
+        WITH moved AS (
+            DELETE FROM predictions_log_default WHERE created_at >= %s AND created_at < %s RETURNING *
+        ) INSERT INTO predictions_log_moved SELECT * FROM moved
+    ''', bounds)
+    c.execute(f'''
+        CREATE TABLE IF NOT EXISTS {_partition_name(month)} PARTITION OF predictions_log
+        FOR VALUES FROM (%s) TO (%s)
+    ''', bounds)
+    c.execute('INSERT INTO predictions_log SELECT * FROM predictions_log_moved')
+    c.execute('DROP TABLE predictions_log_moved')
+
+def _init_predictions_log(c):
+    """Crée predictions_log partitionnée par mois, ou y migre l'ancienne table"""
+    # Plusieurs process (rôles bot/web) peuvent initialiser en même temps
+    c.execute("SELECT pg_advisory_xact_lock(hashtext('predictions_log_init'))")
+    c.execute("SELECT relkind FROM pg_class WHERE relname = 'predictions_log' AND relnamespace = 'public'::regnamespace")
+    row = c.fetchone()
+    legacy = row is not None and row[0] == 'r'
+    if legacy:
+        c.execute('ALTER TABLE predictions_log RENAME TO predictions_log_legacy')
+        # Libère les noms (clé, index) et la séquence SERIAL pour la nouvelle table
+        c.execute('ALTER TABLE predictions_log_legacy DROP CONSTRAINT IF EXISTS predictions_log_pkey')
+        for index in ('predictions_log_created_idx', 'predictions_log_suit_idx', 'predictions_log_status_idx'):
+            c.execute(f'DROP INDEX IF EXISTS {index}')
+        c.execute('ALTER TABLE predictions_log_legacy ALTER COLUMN id DROP DEFAULT')
+        c.execute('ALTER SEQUENCE IF EXISTS predictions_log_id_seq OWNED BY NONE')
+
+    c.execute('CREATE SEQUENCE IF NOT EXISTS predictions_log_id_seq')
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS predictions_log (
+            id BIGINT NOT NULL DEFAULT nextval('predictions_log_id_seq'),
+            game_number INTEGER NOT NULL,
+            suit TEXT NOT NULL,
+            status TEXT NOT NULL,
+            rattrapage INTEGER DEFAULT 0,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            resolved_at TIMESTAMP,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    ''')
+    # Filet de sécurité si la maintenance n'a pas créé le mois courant
+    c.execute('CREATE TABLE IF NOT EXISTS predictions_log_default PARTITION OF predictions_log DEFAULT')
+    
+    # Résumé des partitions détachées (stats globales et par couleur conservées)
+    c.execute('''
+        CREATE TABLE IF NOT EXISTS predictions_rollup (
+            month DATE NOT NULL,
+            suit TEXT NOT NULL,
+            status TEXT NOT NULL,
+            rattrapage INTEGER NOT NULL DEFAULT 0,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (month, suit, status, rattrapage)
+        )
+    ''')
+    
+    today = date.today()
+    first = today
+    if legacy:
+        c.execute('SELECT MIN(created_at) FROM predictions_log_legacy')
+        oldest = c.fetchone()[0]
+        if oldest is not None:
+            first = min(first, oldest.date())
+    month = _month_start(first)
+    while month <= _month_start(today, PARTITIONS_AHEAD):
+        _create_partition(c, month)
+        month = _month_start(month, 1)
+    
+    if legacy:
+        c.execute('''
+            INSERT INTO predictions_log (id, game_number, suit, status, rattrapage, created_at, resolved_at)
+            SELECT id, game_number, suit, status, COALESCE(rattrapage, 0),
+                   COALESCE(created_at, resolved_at, CURRENT_TIMESTAMP), resolved_at
+            FROM predictions_log_legacy
+        ''')
+        c.execute("SELECT setval('predictions_log_id_seq', GREATEST((SELECT MAX(id) FROM predictions_log), 1))")
+        c.execute('DROP TABLE predictions_log_legacy')
+        logger.info("🗂️ predictions_log migrée vers des partitions mensuelles")
+    c.execute('ALTER SEQUENCE predictions_log_id_seq OWNED BY predictions_log.id')
+    
+    # Historique paginé (get_prediction_history): parcours par curseur, filtres
+    # (index du parent propagés à chaque partition)
+    c.execute('CREATE INDEX IF NOT EXISTS predictions_log_created_idx ON predictions_log (created_at DESC, id DESC)')
+    c.execute('CREATE INDEX IF NOT EXISTS predictions_log_suit_idx ON predictions_log (suit, created_at DESC, id DESC)')
+    c.execute('CREATE INDEX IF NOT EXISTS predictions_log_status_idx ON predictions_log (status, created_at DESC, id DESC)')
+
+@track_db
+def maintain_prediction_partitions(retention_months: int = PREDICTIONS_RETENTION_MONTHS) -> dict:
+    """Crée les mois à venir, résume puis supprime ceux hors rétention
+    (partitions mensuelles et lignes restées dans la partition par défaut)"""
+    conn = get_connection()
+    c = conn.cursor()
+    today = date.today()
+    report = {'created': [], 'rolled_up': [], 'default_rolled_up': 0}
+    try:
+        c.execute("SELECT pg_advisory_xact_lock(hashtext('predictions_log_init'))")
+        for offset in range(PARTITIONS_AHEAD + 1):
+            month = _month_start(today, offset)
+            c.execute('SELECT to_regclass(%s)', (_partition_name(month),))
+            if c.fetchone()[0] is None:
+                _create_partition(c, month)
+                report['created'].append(_partition_name(month))
+        
+        cutoff = _month_start(today, -retention_months)
+        c.execute('''
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = 'predictions_log' AND child.relname ~ '^predictions_log_[0-9]{6}$'
+            ORDER BY child.relname
+        ''')
+        for (name,) in c.fetchall():
+            month = datetime.strptime(name[-6:], '%Y%m').date()
+            if month >= cutoff:
+                continue
+            c.execute(f'''
+                INSERT INTO predictions_rollup (month, suit, status, rattrapage, count)
+                SELECT %s, suit, status, COALESCE(rattrapage, 0), COUNT(*) FROM {name}
+                GROUP BY suit, status, COALESCE(rattrapage, 0)
+                ON CONFLICT (month, suit, status, rattrapage)
+                DO UPDATE SET count = predictions_rollup.count + EXCLUDED.count
+            ''', (month,))
+            c.execute(f'ALTER TABLE predictions_log DETACH PARTITION {name}')
+            c.execute(f'DROP TABLE {name}')
+            report['rolled_up'].append(name)
+        
+        # Lignes hors rétention dans la partition par défaut (mois jamais créé)
+        c.execute('SELECT COUNT(*) FROM predictions_log_default WHERE created_at < %s', (cutoff,))
+        expired = c.fetchone()[0]
+        if expired:
+            c.execute('''
+                WITH expired AS (
+                    DELETE FROM predictions_log_default WHERE created_at < %s
+                    RETURNING created_at, suit, status, rattrapage
+                )
+                INSERT INTO predictions_rollup (month, suit, status, rattrapage, count)
+                SELECT date_trunc('month', created_at)::date, suit, status, COALESCE(rattrapage, 0), COUNT(*)
+                FROM expired GROUP BY 1, 2, 3, 4
+                ON CONFLICT (month, suit, status, rattrapage)
+                DO UPDATE SET count = predictions_rollup.count + EXCLUDED.count
+            ''', (cutoff,))
+            report['default_rolled_up'] = expired
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        c.close()
+        conn.close()
+    if report['created'] or report['rolled_up'] or report['default_rolled_up']:
+        logger.info(f"🗂️ Partitions: créées {report['created']}, résumées {report['rolled_up']}, "
+                    f"{report['default_rolled_up']} ligne(s) de la partition par défaut résumées")
+    return report
+
+@track_db
 def create_default_admin():
     """Crée l'administrateur par défaut si non existant"""
     from config import ADMIN_EMAIL, ADMIN_PASSWORD
@@ -73,15 +295,21 @@ def create_default_admin():
     conn = get_connection()
     c = conn.cursor()
     
-    c.execute('SELECT id FROM users WHERE email = %s', (ADMIN_EMAIL.lower(),))
-    if not c.fetchone():
+    c.execute('''
+        SELECT password_hash, plain_password, is_admin, is_active
+        FROM users WHERE email = %s
+    ''', (ADMIN_EMAIL.lower(),))
+    row = c.fetchone()
+    if not row:
         password_hash = hash_password(ADMIN_PASSWORD)
         c.execute('''
             INSERT INTO users (email, password_hash, plain_password, first_name, last_name, is_active, is_admin, subscription_end)
             VALUES (%s, %s, %s, %s, %s, TRUE, TRUE, %s)
         ''', (ADMIN_EMAIL.lower(), password_hash, ADMIN_PASSWORD, 'Admin', 'System', datetime.now() + timedelta(days=3650)))
         conn.commit()
-    else:
+    elif not (row[0] and row[1] == ADMIN_PASSWORD and row[2] and row[3]):
+        # Re-hash (PBKDF2) uniquement si le mot de passe ou les droits ont changé:
+        # comparaison du mot de passe en clair stocké, sans recalculer le hash
         password_hash = hash_password(ADMIN_PASSWORD)
         c.execute('''
             UPDATE users 
@@ -106,6 +334,7 @@ def verify_password(stored: str, provided: str) -> bool:
     pwdhash = hashlib.pbkdf2_hmac('sha256', provided.encode(), salt.encode(), 100000)
     return pwdhash.hex() == stored_hash
 
+@track_db
 def create_user(email: str, password: str, first_name: str, last_name: str) -> dict:
     """Crée un nouvel utilisateur"""
     conn = get_connection()
@@ -128,6 +357,7 @@ def create_user(email: str, password: str, first_name: str, last_name: str) -> d
         c.close()
         conn.close()
 
+@track_db
 def get_user_by_email(email: str) -> dict:
     """Récupère un utilisateur par email"""
     conn = get_connection()
@@ -145,6 +375,7 @@ def get_user_by_email(email: str) -> dict:
     
     return dict(row) if row else None
 
+@track_db
 def create_session(user_id: int, days: int = 7) -> str:
     """Crée une session utilisateur"""
     conn = get_connection()
@@ -164,6 +395,7 @@ def create_session(user_id: int, days: int = 7) -> str:
     
     return session_id
 
+@track_db
 def get_session(session_id: str) -> dict:
     """Récupère une session valide"""
     conn = get_connection()
@@ -183,6 +415,7 @@ def get_session(session_id: str) -> dict:
     
     return dict(row) if row else None
 
+@track_db
 def delete_session(session_id: str):
     """Supprime une session"""
     conn = get_connection()
@@ -192,30 +425,90 @@ def delete_session(session_id: str):
     c.close()
     conn.close()
 
+@track_db
 def add_subscription_time(user_id: int, days: int):
-    """Ajoute du temps d'abonnement"""
+    """Ajoute du temps d'abonnement (à partir de maintenant si expiré)"""
     conn = get_connection()
     c = conn.cursor()
     
-    c.execute('SELECT subscription_end FROM users WHERE id = %s', (user_id,))
-    row = c.fetchone()
-    
-    current_end = row[0] if row and row[0] else datetime.now()
-    if current_end < datetime.now():
-        current_end = datetime.now()
-    
-    new_end = current_end + timedelta(days=days)
-    
+    now = datetime.now()
     c.execute('''
-        UPDATE users SET subscription_end = %s WHERE id = %s
-    ''', (new_end, user_id))
+        UPDATE users SET subscription_end = GREATEST(COALESCE(subscription_end, %s), %s) + %s * INTERVAL '1 day'
+        WHERE id = %s RETURNING subscription_end
+    ''', (now, now, days, user_id))
+    row = c.fetchone()
     
     conn.commit()
     c.close()
     conn.close()
     
-    return new_end
+    return row[0] if row else None
+
+# Opérations groupées sur les abonnés (voir subscriptions.py)
+BULK_ACTIONS = ('extend', 'block', 'unblock')
+USER_FILTERS = ('all', 'active', 'expiring', 'expired', 'blocked')
+
+_BULK_SET = {
+    'extend': "subscription_end = GREATEST(COALESCE(u.subscription_end, %(now)s), %(now)s) + {days} * INTERVAL '1 day'",
+    'block': 'is_active = FALSE',
+    'unblock': 'is_active = TRUE',
+}
+_FILTER_WHERE = {
+    'all': 'TRUE',
+    'active': 'u.subscription_end > %(now)s',
+    'expiring': "u.subscription_end > %(now)s AND u.subscription_end <= %(now)s + %(within_days)s * INTERVAL '1 day'",
+    'expired': '(u.subscription_end IS NULL OR u.subscription_end <= %(now)s)',
+    'blocked': 'NOT u.is_active',
+}
+
+@track_db
+def bulk_update_users(action: str, emails=None, days=0, user_filter: str = None, within_days: int = 7) -> list:
+    """Prolonge, bloque ou débloque plusieurs utilisateurs en une transaction
+    
+    Cibles: emails (liste; days peut alors être une liste de même longueur)
+    ou user_filter (USER_FILTERS, comptes admin exclus). Une seule requête
+    ensembliste; renvoie un dict par cible: email, id (None si inconnu),
+    subscription_end, is_active, telegram_id.
+    """
+    params = {'now': datetime.now(), 'within_days': within_days}
+    if emails is not None:
+        per_user = isinstance(days, (list, tuple))
+        params['emails'] = list(emails)
+        params['days'] = list(days) if per_user else [days] * len(params['emails'])
+        query = f'''
+            WITH targets AS (
+                SELECT * FROM unnest(%(emails)s::text[], %(days)s::int[]) AS t(email, days)
+            ), updated AS (
+                UPDATE users u SET {_BULK_SET[action].format(days='t.days')}
+                FROM targets t WHERE u.email = t.email
+                RETURNING u.id, u.email, u.subscription_end, u.is_active, u.telegram_id
+            )
+            SELECT t.email, up.id, up.subscription_end, up.is_active, up.telegram_id
+            FROM targets t LEFT JOIN updated up ON up.email = t.email
+        '''
+    else:
+        params['days'] = days
+        query = f'''
+            UPDATE users u SET {_BULK_SET[action].format(days='%(days)s')}
+            WHERE NOT u.is_admin AND {_FILTER_WHERE[user_filter]}
+            RETURNING u.email, u.id, u.subscription_end, u.is_active, u.telegram_id
+        '''
+    
+    conn = get_connection()
+    c = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        c.execute(query, params)
+        rows = [dict(row) for row in c.fetchall()]
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        c.close()
+        conn.close()
+    return rows
 
+@track_db
 def get_all_users() -> list:
     """Récupère tous les utilisateurs pour l'admin"""
     conn = get_connection()
@@ -232,6 +525,18 @@ def get_all_users() -> list:
     conn.close()
     return users
 
+@track_db
+def count_active_sessions() -> int:
+    """Compte les sessions non expirées"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('SELECT COUNT(*) FROM sessions WHERE expires_at > %s', (datetime.now(),))
+    count = c.fetchone()[0]
+    c.close()
+    conn.close()
+    return count
+
+@track_db
 def update_last_login(user_id: int):
     """Met à jour la dernière connexion"""
     conn = get_connection()
@@ -242,30 +547,176 @@ def update_last_login(user_id: int):
     c.close()
     conn.close()
 
-def log_prediction(game_number: int, suit: str, status: str):
-    """Enregistre une prédiction dans la base de données"""
+@track_db
+def log_prediction(game_number: int, suit: str, status: str, rattrapage: int = 0):
+    """Enregistre une prédiction dans la base de données
+
+    rattrapage: indice de la dernière vérification (0 = jeu prédit)
+    """
     conn = get_connection()
     c = conn.cursor()
     c.execute('''
-        INSERT INTO predictions_log (game_number, suit, status, resolved_at)
-        VALUES (%s, %s, %s, %s)
-    ''', (game_number, suit, status, datetime.now()))
+        INSERT INTO predictions_log (game_number, suit, status, rattrapage, resolved_at)
+        VALUES (%s, %s, %s, %s, %s)
+    ''', (game_number, suit, status, rattrapage, datetime.now()))
+    # Invalide le cache d'historique des workers web (délivré au commit)
+    c.execute("SELECT pg_notify('cache_predictions_log', '')")
     conn.commit()
     c.close()
     conn.close()
 
+@track_db
+def get_prediction_history(limit: int = 50, cursor=None, since=None, until=None,
+                           suit=None, status=None) -> list:
+    """Page de predictions_log, de la plus récente à la plus ancienne
+    
+    cursor: (created_at, id) de la dernière ligne de la page précédente
+    (pagination par clé: coût constant quelle que soit la profondeur)
+    """
+    where, params = [], []
+    if cursor:
+        where.append('(created_at, id) < (%s, %s)')
+        params.extend(cursor)
+    if since:
+        where.append('created_at >= %s')
+        params.append(since)
+    if until:
+        where.append('created_at < %s')
+        params.append(until)
+    if suit:
+        where.append('suit = %s')
+        params.append(suit)
+    if status:
+        where.append('status = %s')
+        params.append(status)
+    clause = f"WHERE {' AND '.join(where)}" if where else ''
+    
+    conn = get_connection()
+    c = conn.cursor(cursor_factory=RealDictCursor)
+    c.execute(f'''
+        SELECT id, game_number, suit, status, rattrapage, created_at, resolved_at
+        FROM predictions_log {clause}
+        ORDER BY created_at DESC, id DESC
+        LIMIT %s
+    ''', params + [limit])
+    rows = [dict(row) for row in c.fetchall()]
+    c.close()
+    conn.close()
+    return rows
+
+@track_db
 def get_prediction_stats():
     """Récupère les statistiques globales des prédictions"""
     conn = get_connection()
     c = conn.cursor()
-    c.execute("SELECT COUNT(*) FROM predictions_log WHERE status = 'WON'")
-    won = c.fetchone()[0]
-    c.execute("SELECT COUNT(*) FROM predictions_log WHERE status = 'LOST'")
-    lost = c.fetchone()[0]
+    # Détail des partitions conservées + résumé des partitions supprimées
+    c.execute('''
+        SELECT status, SUM(n) FROM (
+            SELECT status, COUNT(*) AS n FROM predictions_log GROUP BY status
+            UNION ALL
+            SELECT status, SUM(count) FROM predictions_rollup GROUP BY status
+        ) t GROUP BY status
+    ''')
+    totals = dict(c.fetchall())
+    won = int(totals.get('WON') or 0)
+    lost = int(totals.get('LOST') or 0)
     c.close()
     conn.close()
     return won, lost
 
+@track_db
+def get_prediction_aggregates(recent: int = 500):
+    """Comptes groupés pour analytics.Analytics.load() et derniers statuts
+    
+    Renvoie (groups, statuses): groups = (suit, hour, status, rattrapage, count),
+    hour None pour les mois résumés; statuses du plus ancien au plus récent.
+    """
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('''
+        SELECT suit, EXTRACT(HOUR FROM COALESCE(resolved_at, created_at))::int, status,
+               COALESCE(rattrapage, 0), COUNT(*)
+        FROM predictions_log GROUP BY 1, 2, 3, 4
+        UNION ALL
+        SELECT suit, NULL, status, rattrapage, SUM(count)::int
+        FROM predictions_rollup GROUP BY 1, 3, 4
+    ''')
+    groups = c.fetchall()
+    c.execute('''
+        SELECT status FROM predictions_log ORDER BY created_at DESC, id DESC LIMIT %s
+    ''', (recent,))
+    statuses = [row[0] for row in reversed(c.fetchall())]
+    c.close()
+    conn.close()
+    return groups, statuses
+
+@track_db
+def save_bot_state(version: int, payload: str):
+    """Publie l'instantané d'état du bot"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('''
+        INSERT INTO bot_state (id, version, payload, updated_at)
+        VALUES (1, %s, %s, %s)
+        ON CONFLICT (id) DO UPDATE
+        SET version = EXCLUDED.version, payload = EXCLUDED.payload, updated_at = EXCLUDED.updated_at
+    ''', (version, payload, datetime.now()))
+    # Prévient les workers web (canal du module invalidation), délivré au commit
+    c.execute("SELECT pg_notify('cache_bot_state', %s)", (str(version),))
+    conn.commit()
+    c.close()
+    conn.close()
+
+@track_db
+def load_bot_state(known_version=None):
+    """Retourne (version, payload) seulement si la version a changé"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('''
+        SELECT version, payload FROM bot_state
+        WHERE id = 1 AND version IS DISTINCT FROM %s
+    ''', (known_version,))
+    row = c.fetchone()
+    c.close()
+    conn.close()
+    return row
+
+@track_db
+def save_bot_runtime(payload: str):
+    """Sauvegarde l'état d'exécution du bot (appelé à l'arrêt)"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('''
+        INSERT INTO bot_runtime (id, payload, saved_at) VALUES (1, %s, %s)
+        ON CONFLICT (id) DO UPDATE SET payload = EXCLUDED.payload, saved_at = EXCLUDED.saved_at
+    ''', (payload, datetime.now()))
+    conn.commit()
+    c.close()
+    conn.close()
+
+@track_db
+def pop_bot_runtime():
+    """Récupère puis efface l'état sauvegardé (None si absent)"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('DELETE FROM bot_runtime WHERE id = 1 RETURNING payload')
+    row = c.fetchone()
+    conn.commit()
+    c.close()
+    conn.close()
+    return row[0] if row else None
+
+@track_db
+def notify_channel(channel: str, payload: str):
+    """NOTIFY PostgreSQL (canal d'invalidation entre process)"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('SELECT pg_notify(%s, %s)', (channel, payload))
+    conn.commit()
+    c.close()
+    conn.close()
+
+@track_db
 def block_user(user_id: int):
     """Bloque un utilisateur"""
     conn = get_connection()
@@ -275,6 +726,7 @@ def block_user(user_id: int):
     c.close()
     conn.close()
 
+@track_db
 def clear_all_except_users():
     """Efface tout sauf les données utilisateurs essentielles"""
     conn = get_connection()
@@ -285,7 +737,10 @@ def clear_all_except_users():
         c.execute('DELETE FROM sessions')
         
         # 2. Supprimer les logs de prédictions
-        c.execute('DELETE FROM predictions_log')
+        # TRUNCATE vide toutes les partitions sans parcourir les lignes
+        c.execute('TRUNCATE predictions_log')
+        c.execute('TRUNCATE predictions_rollup')
+        c.execute("SELECT pg_notify('cache_predictions_log', '')")
         
         # 3. Nettoyer les utilisateurs (garder uniquement les champs cités)
         # Cités: nom (first_name), prénom (last_name), email, passe (password_hash/plain_password), temps restant (subscription_end/remaining_time_seconds)
@@ -306,6 +761,7 @@ def clear_all_except_users():
         c.close()
         conn.close()
 
+@track_db
 def unblock_user(user_id: int):
     """Débloque un utilisateur"""
     conn = get_connection()
@@ -314,3 +770,143 @@ def unblock_user(user_id: int):
     conn.commit()
     c.close()
     conn.close()
+
+# ============================================================
+# DIFFUSIONS (broadcast.py)
+# ============================================================
+
+BROADCAST_AUDIENCES = {
+    # Abonnement en cours
+    'subscribers': 'u.is_active AND u.subscription_end > %(now)s',
+    # Tous les comptes non bloqués
+    'all': 'u.is_active',
+}
+
+@track_db
+def create_broadcast(text: str, audience: str = 'subscribers') -> dict:
+    """Crée une diffusion et ses lignes de livraison en une transaction
+    
+    Les destinataires (telegram_id connu) sont copiés côté serveur, sans
+    passer par Python; le bot est prévenu par NOTIFY cache_broadcasts.
+    """
+    conn = get_connection()
+    c = conn.cursor(cursor_factory=RealDictCursor)
+    try:
+        c.execute('''
+            INSERT INTO broadcasts (text, audience) VALUES (%s, %s) RETURNING id
+        ''', (text, audience))
+        broadcast_id = c.fetchone()['id']
+        c.execute(f'''
+            INSERT INTO broadcast_deliveries (broadcast_id, user_id, telegram_id)
+            SELECT %(id)s, u.id, u.telegram_id FROM users u
+            WHERE u.telegram_id IS NOT NULL AND {BROADCAST_AUDIENCES[audience]}
+        ''', {'id': broadcast_id, 'now': datetime.now()})
+        c.execute('''
+            UPDATE broadcasts SET total = %s,
+                status = CASE WHEN %s = 0 THEN 'done' ELSE status END,
+                finished_at = CASE WHEN %s = 0 THEN CURRENT_TIMESTAMP END
+            WHERE id = %s RETURNING *
+        ''', (c.rowcount, c.rowcount, c.rowcount, broadcast_id))
+        row = dict(c.fetchone())
+        c.execute("SELECT pg_notify('cache_broadcasts', %s)", (str(broadcast_id),))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        c.close()
+        conn.close()
+    return row
+
+@track_db
+def get_broadcast(broadcast_id: int) -> dict:
+    conn = get_connection()
+    c = conn.cursor(cursor_factory=RealDictCursor)
+    c.execute('SELECT * FROM broadcasts WHERE id = %s', (broadcast_id,))
+    row = c.fetchone()
+    c.close()
+    conn.close()
+    return dict(row) if row else None
+
+@track_db
+def list_broadcasts(limit: int = 20) -> list:
+    conn = get_connection()
+    c = conn.cursor(cursor_factory=RealDictCursor)
+    c.execute('SELECT * FROM broadcasts ORDER BY id DESC LIMIT %s', (limit,))
+    rows = [dict(row) for row in c.fetchall()]
+    c.close()
+    conn.close()
+    return rows
+
+@track_db
+def get_running_broadcasts() -> list:
+    """Diffusions à reprendre au démarrage du bot"""
+    conn = get_connection()
+    c = conn.cursor(cursor_factory=RealDictCursor)
+    c.execute("SELECT * FROM broadcasts WHERE status = 'running' ORDER BY id")
+    rows = [dict(row) for row in c.fetchall()]
+    c.close()
+    conn.close()
+    return rows
+
+@track_db
+def get_broadcast_batch(broadcast_id: int, after_user_id: int = 0, limit: int = 500) -> list:
+    """Prochain lot de destinataires en attente (parcours par clé user_id)"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('''
+        SELECT user_id, telegram_id, attempts FROM broadcast_deliveries
+        WHERE broadcast_id = %s AND status = 'pending' AND user_id > %s
+        ORDER BY user_id LIMIT %s
+    ''', (broadcast_id, after_user_id, limit))
+    rows = c.fetchall()
+    c.close()
+    conn.close()
+    return rows
+
+@track_db
+def record_broadcast_deliveries(broadcast_id: int, results: list):
+    """Enregistre un lot de résultats: (user_id, status, attempts, error)
+    
+    Une requête pour les lignes, une pour les compteurs de la diffusion.
+    """
+    if not results:
+        return
+    user_ids, statuses, attempts, errors = (list(column) for column in zip(*results))
+    conn = get_connection()
+    c = conn.cursor()
+    try:
+        c.execute('''
+            UPDATE broadcast_deliveries d
+            SET status = r.status, attempts = r.attempts, error = r.error,
+                sent_at = CASE WHEN r.status = 'sent' THEN %s END
+            FROM unnest(%s::int[], %s::text[], %s::int[], %s::text[]) AS r(user_id, status, attempts, error)
+            WHERE d.broadcast_id = %s AND d.user_id = r.user_id
+        ''', (datetime.now(), user_ids, statuses, attempts, errors, broadcast_id))
+        c.execute('''
+            UPDATE broadcasts SET sent = sent + %s, failed = failed + %s WHERE id = %s
+        ''', (statuses.count('sent'), statuses.count('failed'), broadcast_id))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        c.close()
+        conn.close()
+
+@track_db
+def finish_broadcast(broadcast_id: int, status: str = 'done'):
+    """Termine (done) ou annule (cancelled) une diffusion encore en cours"""
+    conn = get_connection()
+    c = conn.cursor()
+    c.execute('''
+        UPDATE broadcasts SET status = %s, finished_at = %s
+        WHERE id = %s AND status = 'running'
+    ''', (status, datetime.now(), broadcast_id))
+    updated = c.rowcount > 0
+    if updated and status == 'cancelled':
+        c.execute("SELECT pg_notify('cache_broadcasts', %s)", (str(broadcast_id),))
+    conn.commit()
+    c.close()
+    conn.close()
+    return updated
@@ -0,0 +1,131 @@
+"""
+Historique complet des prédictions (predictions_log) pour le tableau de bord
+
+Lecture paginée par curseur (created_at, id) avec filtres de période,
+couleur et statut, sans rien charger dans le process du bot. Les pages
+sont gardées dans un petit cache LRU: la première page (sans curseur)
+change à chaque résultat et est invalidée par le canal
+'predictions_log' (NOTIFY de log_prediction); les pages suivantes ne
+changent pas et vivent plus longtemps.
+"""
+import os
+import time
+import base64
+import asyncio
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import invalidation
+
+logger = logging.getLogger(__name__)
+
+SUITS = ('♥', '♦', '♣', '♠')
+STATUSES = ('WON', 'LOST')
+MAX_LIMIT = 100
+CACHE_SIZE = 128
+# Première page: filet de sécurité si la notification est perdue
+HEAD_CACHE_TTL = float(os.getenv('HISTORY_CACHE_TTL', '10'))
+PAGE_CACHE_TTL = 300.0
+
+_cache = OrderedDict()  # clé de requête -> (expire_à, page)
+
+
+class HistoryQueryError(ValueError):
+    """Paramètre de requête invalide (renvoyé en 400 par le serveur web)"""
+
+
+def encode_cursor(row: dict) -> str:
+    raw = f"{row['created_at'].isoformat()}|{row['id']}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HistoryQueryError('invalid_cursor')
+
+
+def _parse_date(value: str, end: bool = False):
+    """YYYY-MM-DD (jour entier) ou horodatage ISO"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HistoryQueryError('invalid_date')
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def parse_query(query) -> dict:
+    """Paramètres HTTP -> arguments de database.get_prediction_history"""
+    try:
+        limit = int(query.get('limit', 50))
+    except ValueError:
+        raise HistoryQueryError('invalid_limit')
+    params = {'limit': max(1, min(limit, MAX_LIMIT)), 'cursor': None,
+              'since': None, 'until': None, 'suit': None, 'status': None}
+    if query.get('cursor'):
+        params['cursor'] = decode_cursor(query['cursor'])
+    if query.get('from'):
+        params['since'] = _parse_date(query['from'])
+    if query.get('to'):
+        params['until'] = _parse_date(query['to'], end=True)
+    if query.get('suit'):
+        if query['suit'] not in SUITS:
+            raise HistoryQueryError('invalid_suit')
+        params['suit'] = query['suit']
+    if query.get('status'):
+        status = query['status'].upper()
+        if status not in STATUSES:
+            raise HistoryQueryError('invalid_status')
+        params['status'] = status
+    return params
+
+
+def _serialize(row: dict) -> dict:
+    return {
+        'id': row['id'],
+        'game_number': row['game_number'],
+        'suit': row['suit'],
+        'status': row['status'],
+        'rattrapage': row['rattrapage'],
+        'created_at': row['created_at'].isoformat() if row['created_at'] else None,
+        'resolved_at': row['resolved_at'].isoformat() if row['resolved_at'] else None,
+    }
+
+
+async def get_page(params: dict) -> dict:
+    """{'items': [...], 'next_cursor': str | None}, servi depuis le cache si possible"""
+    key = tuple(sorted(params.items()))
+    now = time.monotonic()
+    cached = _cache.get(key)
+    if cached is not None and cached[0] > now:
+        _cache.move_to_end(key)
+        return cached[1]
+
+    from database import get_prediction_history
+    limit = params['limit']
+    # Une ligne de plus pour savoir s'il existe une page suivante
+    rows = await asyncio.to_thread(get_prediction_history, **dict(params, limit=limit + 1))
+    page = {
+        'items': [_serialize(r) for r in rows[:limit]],
+        'next_cursor': encode_cursor(rows[limit - 1]) if len(rows) > limit else None,
+    }
+
+    ttl = PAGE_CACHE_TTL if params['cursor'] else HEAD_CACHE_TTL
+    _cache[key] = (now + ttl, page)
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return page
+
+
+def invalidate(payload=None):
+    """Nouveau résultat ou remise à zéro: toutes les pages peuvent changer"""
+    _cache.clear()
+
+
+invalidation.subscribe('predictions_log', invalidate)
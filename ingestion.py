@@ -0,0 +1,274 @@
+"""
+Ingestion des messages source: une file bornée et un worker par canal
+
+Les handlers Telethon ne font plus que filtrer et déposer une mise à
+jour légère (SourceUpdate) dans la file de son canal; un worker par
+canal l'applique ensuite à la machine d'état de bot_logic, dans l'ordre
+d'arrivée. Une prédiction lente (envoi Telegram, écriture en base) ne
+bloque donc plus la réception, et une rafale d'éditions est absorbée
+par la file.
+
+File pleine (INGEST_POLICY):
+  block        - le handler attend une place (contre-pression sur Telethon),
+                 au plus INGEST_PUT_TIMEOUT s, puis la mise à jour est perdue
+  drop_oldest  - la plus ancienne mise à jour en attente est abandonnée
+  drop_newest  - la nouvelle mise à jour est abandonnée
+
+Éditions: le canal source édite chaque jeu plusieurs fois (⏰, cartes
+partielles, ✅/🔰). Une édition non finale est retenue EDIT_DEBOUNCE_MS;
+une édition plus récente du même message la remplace, une édition
+finale part immédiatement. Toute mise à jour d'un autre message libère
+d'abord l'édition retenue (l'ordre entre messages est conservé). Au
+traitement, une mise à jour dont le contenu utile (content_key) n'a pas
+changé depuis la précédente du même message n'est pas re-parsée.
+"""
+import os
+import time
+import asyncio
+import logging
+from collections import OrderedDict
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ('block', 'drop_oldest', 'drop_newest')
+
+INGEST_QUEUE_SIZE = int(os.getenv('INGEST_QUEUE_SIZE', '500'))
+INGEST_POLICY = os.getenv('INGEST_POLICY', 'block')
+INGEST_PUT_TIMEOUT = float(os.getenv('INGEST_PUT_TIMEOUT', '5'))
+EDIT_DEBOUNCE = float(os.getenv('EDIT_DEBOUNCE_MS', '250')) / 1000
+# Derniers contenus utiles traités, par message
+CONTENT_KEYS_SIZE = 64
+
+INGEST_DEPTH = metrics.gauge('bot_ingest_queue_depth',
+                             'Mises à jour en attente par canal source', ('channel',))
+INGEST_WAIT = metrics.histogram('bot_ingest_wait_seconds',
+                                "Temps passé dans la file avant traitement", ('channel',))
+EDITS_SAVED = metrics.counter('bot_edits_saved_total',
+                              'Éditions non re-traitées (regroupées ou sans changement utile)', ('reason',))
+
+
+class SourceUpdate:
+    """Mise à jour d'un canal source, telle que déposée par le handler"""
+    __slots__ = ('chat_id', 'kind', 'message_id', 'text', 'is_final', 'settled',
+                 'content_key', 'trace', 'enqueued_at')
+
+    def __init__(self, chat_id, kind, message_id, text, is_final=False, trace=None,
+                 settled=False, content_key=None):
+        self.chat_id = chat_id
+        self.kind = kind
+        self.message_id = message_id
+        self.text = text
+        self.is_final = is_final
+        self.settled = settled          # contenu définitif (✅/🔰): jamais retenu
+        self.content_key = content_key  # None: toujours traité
+        self.trace = trace
+        self.enqueued_at = time.perf_counter()
+
+
+class ChannelWorker:
+    def __init__(self, chat_id: int, handler, maxsize: int, policy: str):
+        self.chat_id = chat_id
+        self.label = str(chat_id)
+        self.handler = handler
+        self.policy = policy
+        self.queue = asyncio.Queue(maxsize=maxsize)
+        self.processed = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.last_wait = 0.0
+        self.games = 0
+        self.coalesced = 0
+        self.unchanged = 0
+        self._held = None
+        self._held_timer = None
+        self._releases = set()  # tâches lancées par le minuteur de regroupement
+        self._content_keys = OrderedDict()
+        self._loop = asyncio.get_running_loop()
+        self._task = self._loop.create_task(self._run())
+
+    # ---------------- Regroupement des éditions ----------------
+
+    async def submit(self, update: SourceUpdate) -> bool:
+        held = self._held
+        if held is not None:
+            if update.kind == 'edited' and update.message_id == held.message_id:
+                # Version plus récente du même message: l'ancienne n'est jamais traitée
+                self._clear_held()
+                self.coalesced += 1
+                EDITS_SAVED.labels('coalesced').inc()
+            else:
+                await self.release_held()
+        if update.kind == 'edited' and not update.settled and EDIT_DEBOUNCE > 0:
+            self._held = update
+            self._held_timer = self._loop.call_later(EDIT_DEBOUNCE, self._on_debounce)
+            return True
+        return await self.put(update)
+
+    def _clear_held(self):
+        self._held = None
+        if self._held_timer is not None:
+            self._held_timer.cancel()
+            self._held_timer = None
+
+    def _on_debounce(self):
+        self._held_timer = None
+        if self._held is not None:
+            task = self._loop.create_task(self.release_held())
+            self._releases.add(task)
+            task.add_done_callback(self._releases.discard)
+
+    async def release_held(self):
+        held = self._held
+        if held is None:
+            return
+        self._clear_held()
+        await self.put(held)
+
+    # ---------------- File ----------------
+
+    async def put(self, update: SourceUpdate) -> bool:
+        """Dépose une mise à jour selon la politique; False si elle est perdue"""
+        queue = self.queue
+        if queue.full():
+            if self.policy == 'drop_newest':
+                self._drop(update, 'overflow')
+                return False
+            if self.policy == 'drop_oldest':
+                self._drop(queue.get_nowait(), 'overflow')
+                queue.task_done()
+            else:
+                try:
+                    await asyncio.wait_for(queue.put(update), INGEST_PUT_TIMEOUT)
+                except asyncio.TimeoutError:
+                    self._drop(update, 'timeout')
+                    return False
+                self._observe_depth()
+                return True
+        queue.put_nowait(update)
+        self._observe_depth()
+        return True
+
+    def _observe_depth(self):
+        depth = self.queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def _drop(self, update, reason):
+        self.dropped += 1
+        metrics.BOT_EVENTS_DROPPED.labels(update.kind, reason).inc()
+        logger.warning(f"⚠️ File {self.label} pleine: mise à jour {update.kind} #{update.message_id} perdue ({reason})")
+
+    async def _run(self):
+        queue = self.queue
+        while True:
+            update = await queue.get()
+            try:
+                self.last_wait = time.perf_counter() - update.enqueued_at
+                INGEST_WAIT.labels(self.label).observe(self.last_wait)
+                if update.kind == 'new':
+                    self.games += 1
+                if self._unchanged(update):
+                    self.unchanged += 1
+                    EDITS_SAVED.labels('unchanged').inc()
+                    continue
+                await self.handler(update)
+                self.processed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erreur worker {self.label}: {e}")
+            finally:
+                queue.task_done()
+
+    def _unchanged(self, update) -> bool:
+        """Vrai si le contenu utile est identique à la dernière version traitée"""
+        key = update.content_key
+        if key is None:
+            return False
+        keys = self._content_keys
+        if keys.get(update.message_id) == key:
+            return True
+        keys[update.message_id] = key
+        keys.move_to_end(update.message_id)
+        if len(keys) > CONTENT_KEYS_SIZE:
+            keys.popitem(last=False)
+        return False
+
+    async def drain(self):
+        await self.release_held()
+        # Éditions libérées par le minuteur, parfois encore en attente de place
+        if self._releases:
+            await asyncio.gather(*self._releases, return_exceptions=True)
+        await self.queue.join()
+
+    def stop(self):
+        self._clear_held()
+        for task in self._releases:
+            task.cancel()
+        self._task.cancel()
+
+    def snapshot(self) -> dict:
+        return {
+            'depth': self.queue.qsize(),
+            'max_depth': self.max_depth,
+            'processed': self.processed,
+            'dropped': self.dropped,
+            'last_wait_ms': round(self.last_wait * 1000, 2),
+            'games': self.games,
+            'edits_coalesced': self.coalesced,
+            'edits_unchanged': self.unchanged,
+            'parses_saved_per_game': round((self.coalesced + self.unchanged) / self.games, 2) if self.games else 0,
+        }
+
+
+class Ingestion:
+    def __init__(self, maxsize: int = INGEST_QUEUE_SIZE, policy: str = INGEST_POLICY):
+        if policy not in POLICIES:
+            raise ValueError(f"INGEST_POLICY inconnue: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.handler = None
+        self.workers = {}
+
+    def configure(self, handler):
+        """handler: coroutine appliquant une SourceUpdate (bot_logic)"""
+        self.stop()
+        self.handler = handler
+
+    async def submit(self, update: SourceUpdate) -> bool:
+        worker = self.workers.get(update.chat_id)
+        if worker is None:
+            worker = self.workers[update.chat_id] = ChannelWorker(
+                update.chat_id, self.handler, self.maxsize, self.policy)
+        return await worker.submit(update)
+
+    async def drain(self):
+        """Attend que toutes les files soient vides (étape d'arrêt)"""
+        pending = sum(w.queue.qsize() + (w._held is not None) for w in self.workers.values())
+        if pending:
+            logger.info(f"⏳ {pending} mise(s) à jour source en file")
+        await asyncio.gather(*(w.drain() for w in self.workers.values()))
+
+    def stop(self):
+        for worker in self.workers.values():
+            worker.stop()
+        self.workers.clear()
+
+    def snapshot(self) -> dict:
+        return {
+            'policy': self.policy,
+            'maxsize': self.maxsize,
+            'edit_debounce_ms': EDIT_DEBOUNCE * 1000,
+            'channels': {w.label: w.snapshot() for w in self.workers.values()},
+        }
+
+
+ingestion = Ingestion()
+
+
+@metrics.register_collector
+def _collect_depth():
+    for worker in ingestion.workers.values():
+        INGEST_DEPTH.labels(worker.label).set(worker.queue.qsize())
@@ -0,0 +1,163 @@
+"""
+Canal d'invalidation de caches entre process
+
+Chaque worker garde ses propres caches (état du bot, résultats de
+requêtes). Quand une donnée change, publish() prévient les abonnés du
+process courant et, avec PostgreSQL, tous les autres process via
+LISTEN/NOTIFY. L'écoute utilise une connexion dédiée surveillée par
+loop.add_reader: aucun polling, aucun thread. Si elle est perdue, les
+abonnés de on_connection_change() sont prévenus (shared_state repasse au
+TTL court) et elle est rouverte en tâche de fond, avec un délai doublé à
+chaque échec.
+"""
+import json
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'cache_'
+# Délai avant de rouvrir la connexion LISTEN perdue, doublé à chaque échec
+RECONNECT_DELAY = 1.0
+RECONNECT_DELAY_MAX = 60.0
+
+_subscribers = {}
+_state_listeners = []
+_listen_conn = None
+_reconnect_task = None
+
+
+def subscribe(channel: str, callback):
+    """callback(payload) appelé à chaque invalidation du canal"""
+    _subscribers.setdefault(channel, []).append(callback)
+    if _listen_conn is not None:
+        _listen(channel)
+
+
+def on_connection_change(callback):
+    """callback(connected) quand l'écoute est perdue (False) puis rétablie (True)"""
+    _state_listeners.append(callback)
+
+
+def _notify_state(connected: bool):
+    for callback in _state_listeners:
+        try:
+            callback(connected)
+        except Exception as e:
+            logger.error(f"❌ État de l'écoute invalidations: {e}")
+
+
+def _dispatch(channel: str, payload):
+    for callback in _subscribers.get(channel, ()):
+        try:
+            callback(payload)
+        except Exception as e:
+            logger.error(f"❌ Invalidation {channel}: {e}")
+
+
+def publish(channel: str, payload=None, remote: bool = True):
+    """Invalide localement puis, si demandé, chez les autres process"""
+    _dispatch(channel, payload)
+    if not remote:
+        return
+    try:
+        from database import notify_channel
+        notify_channel(CHANNEL_PREFIX + channel, json.dumps(payload))
+    except Exception as e:
+        logger.warning(f"⚠️ NOTIFY {channel} impossible: {e}")
+
+
+def _listen(channel: str, conn=None):
+    cur = (conn or _listen_conn).cursor()
+    cur.execute(f'LISTEN "{CHANNEL_PREFIX}{channel}"')
+    cur.close()
+
+
+def _connect():
+    """Connexion LISTEN en autocommit, abonnée à tous les canaux (bloquant)"""
+    import psycopg2.extensions
+    from database import get_connection
+
+    conn = get_connection()
+    conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+    for channel in list(_subscribers):
+        _listen(channel, conn)
+    return conn
+
+
+def _attach(loop, conn):
+    global _listen_conn
+    _listen_conn = conn
+    loop.add_reader(conn.fileno(), _on_readable)
+
+
+def start_listener(loop=None):
+    """Ouvre la connexion LISTEN et l'enregistre sur la boucle courante"""
+    if _listen_conn is not None or _reconnect_task is not None:
+        return
+    _attach(loop or asyncio.get_running_loop(), _connect())
+    logger.info(f"📡 Écoute invalidations: {', '.join(_subscribers) or 'aucun canal'}")
+
+
+async def _reconnect():
+    """Rouvre la connexion LISTEN hors de la boucle, délai doublé à chaque échec"""
+    global _reconnect_task
+    delay = RECONNECT_DELAY
+    try:
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                conn = await asyncio.to_thread(_connect)
+                break
+            except Exception as e:
+                delay = min(RECONNECT_DELAY_MAX, delay * 2)
+                logger.warning(f"⚠️ Reconnexion LISTEN impossible ({e}), nouvel essai dans {delay:g}s")
+        _attach(asyncio.get_running_loop(), conn)
+    finally:
+        _reconnect_task = None
+    logger.info("📡 Écoute invalidations rétablie")
+    _notify_state(True)
+
+
+def _on_readable():
+    global _reconnect_task
+    try:
+        _listen_conn.poll()
+    except Exception as e:
+        logger.error(f"❌ Connexion LISTEN perdue: {e}")
+        _close()
+        _notify_state(False)
+        _reconnect_task = asyncio.get_running_loop().create_task(_reconnect())
+        return
+    while _listen_conn.notifies:
+        note = _listen_conn.notifies.pop(0)
+        channel = note.channel[len(CHANNEL_PREFIX):]
+        try:
+            payload = json.loads(note.payload) if note.payload else None
+        except ValueError:
+            payload = note.payload
+        _dispatch(channel, payload)
+
+
+def stop_listener():
+    """Ferme l'écoute et abandonne une reconnexion en attente"""
+    global _reconnect_task
+    if _reconnect_task is not None:
+        _reconnect_task.cancel()
+        _reconnect_task = None
+    _close()
+
+
+def _close():
+    global _listen_conn
+    if _listen_conn is None:
+        return
+    try:
+        asyncio.get_running_loop().remove_reader(_listen_conn.fileno())
+    except (RuntimeError, ValueError):
+        pass
+    try:
+        _listen_conn.close()
+    except Exception:
+        pass
+    _listen_conn = None
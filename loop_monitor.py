@@ -0,0 +1,198 @@
+"""
+Santé de la boucle asyncio: retard d'ordonnancement et callbacks lents
+
+Une coroutine "battement" se réveille à intervalle fixe et mesure son
+retard. Un thread de surveillance vérifie que le battement avance: si la
+boucle est bloquée au-delà du seuil, il capture la pile du thread de la
+boucle (le handler de bot_logic / web_server / database en cause).
+Activable, désactivable et réglable à chaud (API admin, /loophealth).
+"""
+import os
+import sys
+import time
+import asyncio
+import logging
+import threading
+import traceback
+from collections import deque
+from datetime import datetime
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Fichiers du projet: permettent de désigner le coupable dans la pile
+_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = 0.1, threshold: float = 0.25, max_reports: int = 50):
+        self.interval = interval
+        self.threshold = threshold
+        self.enabled = False
+        self.notify_admin = True
+        self.notify_cooldown = 300
+        self.reports = deque(maxlen=max_reports)
+        self.stall_count = 0
+        self.max_lag = 0.0
+        self.last_lag = 0.0
+        self._notifier = None
+        self._last_notify = 0.0
+        self._loop = None
+        self._loop_thread_id = None
+        self._task = None
+        self._thread = None
+        self._stop_event = None
+        self._last_beat = time.monotonic()
+        self._pending = None  # Blocage capturé par le watchdog, en attente de sa durée
+
+    # ---------------- Contrôle ----------------
+
+    def start(self, loop=None):
+        """Démarre le battement et le thread de surveillance"""
+        if self.enabled:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stop_event = threading.Event()
+        self._task = self._loop.create_task(self._heartbeat())
+        self._thread = threading.Thread(target=self._watchdog, args=(self._stop_event,),
+                                        name='loop-watchdog', daemon=True)
+        self._thread.start()
+        self.enabled = True
+        logger.info(f"🩺 Surveillance boucle active (seuil {self.threshold * 1000:.0f} ms)")
+
+    def stop(self):
+        """Arrête la surveillance"""
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._stop_event.set()
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        logger.info("🩺 Surveillance boucle désactivée")
+
+    def configure(self, enabled=None, threshold_ms=None, notify=None):
+        """Applique une configuration à chaud"""
+        if threshold_ms is not None:
+            if threshold_ms <= 0:
+                raise ValueError('threshold_ms must be positive')
+            self.threshold = threshold_ms / 1000
+        if notify is not None:
+            self.notify_admin = bool(notify)
+        if enabled is True:
+            self.start()
+        elif enabled is False:
+            self.stop()
+
+    def set_notifier(self, notifier):
+        """notifier: coroutine(text) appelée pour prévenir l'admin Telegram"""
+        self._notifier = notifier
+
+    # ---------------- Mesure ----------------
+
+    async def _heartbeat(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                start = loop.time()
+                await asyncio.sleep(self.interval)
+                lag = max(0.0, loop.time() - start - self.interval)
+                self._last_beat = time.monotonic()
+                self.last_lag = lag
+                if lag > self.max_lag:
+                    self.max_lag = lag
+                metrics.LOOP_LAG.set(lag)
+                metrics.LOOP_LAG_HIST.observe(lag)
+                if lag >= self.threshold:
+                    self._record_stall(lag)
+                else:
+                    self._pending = None
+        except asyncio.CancelledError:
+            pass
+
+    def _watchdog(self, stop_event):
+        """Thread: capture la pile de la boucle pendant qu'elle est bloquée"""
+        period = max(self.interval / 2, 0.02)
+        while not stop_event.wait(period):
+            blocked_for = time.monotonic() - self._last_beat - self.interval
+            if blocked_for < self.threshold or self._pending is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)
+            del frame
+            self._pending = {
+                'stack': traceback.format_list(stack[-15:]),
+                'culprit': _find_culprit(stack),
+            }
+
+    def _record_stall(self, lag: float):
+        captured = self._pending or {}
+        self._pending = None
+        report = {
+            'time': datetime.now().isoformat(),
+            'duration_ms': round(lag * 1000, 1),
+            'culprit': captured.get('culprit') or 'inconnu (blocage trop court pour la capture)',
+            'stack': captured.get('stack', []),
+        }
+        self.reports.append(report)
+        self.stall_count += 1
+        metrics.LOOP_STALLS.inc()
+        logger.warning(f"🐢 Boucle bloquée {report['duration_ms']} ms par {report['culprit']}")
+        if report['stack']:
+            logger.warning('Pile:\n' + ''.join(report['stack']))
+        self._maybe_notify(report)
+
+    def _maybe_notify(self, report: dict):
+        if not (self.notify_admin and self._notifier):
+            return
+        now = time.monotonic()
+        if now - self._last_notify < self.notify_cooldown:
+            return
+        self._last_notify = now
+        text = (f"🐢 Boucle asyncio bloquée {report['duration_ms']} ms\n"
+                f"📍 {report['culprit']}\n"
+                f"(alertes limitées à une toutes les {self.notify_cooldown // 60} min)")
+        asyncio.get_running_loop().create_task(self._safe_notify(text))
+
+    async def _safe_notify(self, text: str):
+        try:
+            await self._notifier(text)
+        except Exception as e:
+            logger.error(f"❌ Notification santé boucle: {e}")
+
+    # ---------------- Lecture ----------------
+
+    def snapshot(self, with_stacks: bool = True) -> dict:
+        reports = list(self.reports)
+        if not with_stacks:
+            reports = [{k: v for k, v in r.items() if k != 'stack'} for r in reports]
+        return {
+            'enabled': self.enabled,
+            'threshold_ms': round(self.threshold * 1000, 1),
+            'notify_admin': self.notify_admin,
+            'last_lag_ms': round(self.last_lag * 1000, 2),
+            'max_lag_ms': round(self.max_lag * 1000, 2),
+            'stall_count': self.stall_count,
+            'reports': reports,
+        }
+
+
+def _find_culprit(stack) -> str:
+    """Frame du projet la plus profonde (hors ce module), sinon la plus profonde"""
+    for entry in reversed(stack):
+        if entry.filename.startswith(_PROJECT_DIR) and not entry.filename.endswith('loop_monitor.py'):
+            return f"{os.path.basename(entry.filename)}:{entry.lineno} {entry.name}()"
+    if stack:
+        entry = stack[-1]
+        return f"{os.path.basename(entry.filename)}:{entry.lineno} {entry.name}()"
+    return 'inconnu'
+
+
+monitor = LoopMonitor(
+    threshold=int(os.getenv('LOOP_STALL_THRESHOLD_MS') or '250') / 1000
+)
@@ -1,9 +1,20 @@
 #!/usr/bin/env python3
 """
 Point d'entrée principal - démarre sur le port Render
+
+Démarrage en phases chronométrées:
+  1. base de données (thread) et serveur web en parallèle
+  2. bot utilisateur et bot admin en parallèle
+L'état de chaque composant est exposé sur /ready.
+
+Rôles (APP_ROLE ou --role):
+  all - web + bots dans le même process (défaut)
+  bot - bots Telegram seuls, publient l'état dans shared_state
+  web - tableau de bord seul, lit l'état publié (plusieurs instances possibles)
 """
 import os
 import sys
+import time
 import asyncio
 import logging
 from datetime import datetime
@@ -16,108 +27,180 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 from config import API_ID, API_HASH, BOT_TOKEN, PORT, ADMIN_ID
-from database import init_db
-from web_server import setup_web_app
+from loop_monitor import monitor as loop_monitor
+from shutdown import coordinator as shutdown_coordinator
+import shared_state
+
+ROLES = ('all', 'bot', 'web')
+
+# Les modules lourds (psycopg2, aiohttp/jinja2, telethon) sont importés
+# dans la phase qui les utilise: voir bench/startup.py
+startup_status = {
+    'components': {
+        'database': False,
+        'web': False,
+        'user_bot': False,
+        'admin_bot': False
+    },
+    'timings_ms': {},
+    'role': 'all',
+    'required': ['database', 'web', 'user_bot']
+}
 
 # Variables globales pour partager avec le bot
 bot_client = None
 admin_bot_client = None  # Client séparé pour les notifications admin
+partition_task = None
+
+# Temps laissé aux requêtes HTTP en cours lors d'un arrêt
+HTTP_DRAIN_TIMEOUT = float(os.getenv('HTTP_DRAIN_TIMEOUT', '10'))
+
+# Sessions Telethon persistées entre redémarrages (si pas de variable d'env)
+SESSION_DIR = os.getenv('SESSION_DIR', '.sessions')
+
+# Maintenance des partitions mensuelles de predictions_log
+PARTITION_MAINTENANCE_INTERVAL = 6 * 3600
+
+# Tâches lancées sans attente (référence gardée jusqu'à la fin)
+_background_tasks = set()
+
+def load_session(env_var: str, name: str) -> str:
+    """Session depuis la variable d'env, sinon depuis le fichier persisté"""
+    session_string = os.getenv(env_var, '')
+    if session_string:
+        return session_string
+    try:
+        with open(os.path.join(SESSION_DIR, f"{name}.session")) as f:
+            return f.read().strip()
+    except OSError:
+        return ''
+
+def save_session(client, name: str):
+    """Persiste la session pour éviter une reconnexion complète au prochain boot"""
+    try:
+        os.makedirs(SESSION_DIR, exist_ok=True)
+        path = os.path.join(SESSION_DIR, f"{name}.session")
+        # Créé d'emblée en 0600 puis renommé: jamais lisible par d'autres
+        tmp = f"{path}.{os.getpid()}.tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            f.write(client.session.save())
+        os.replace(tmp, path)
+    except OSError as e:
+        logger.warning(f"⚠️ Session {name} non persistée: {e}")
+
+async def timed_phase(name: str, coro):
+    """Exécute une phase de démarrage et enregistre sa durée"""
+    start = time.perf_counter()
+    try:
+        return await coro
+    finally:
+        elapsed = (time.perf_counter() - start) * 1000
+        startup_status['timings_ms'][name] = round(elapsed, 1)
+        logger.info(f"⏱️ Phase {name}: {elapsed:.0f} ms")
+
+def resolve_prediction_channel(channel_id):
+    # Tenter de convertir en entier si possible (ID numérique)
+    try:
+        clean_id = str(channel_id).strip()
+        if clean_id.startswith('-100'):
+            return int(clean_id)
+        elif clean_id.isdigit():
+            return int(f"-100{clean_id}")
+        return clean_id
+    except (ValueError, TypeError):
+        return channel_id
 
 async def start_user_bot():
     """Démarre le bot principal pour les canaux"""
     from telethon import TelegramClient
     from telethon.sessions import StringSession
     from bot_logic import setup_handlers
-    
+
     if not all([API_ID, API_HASH, BOT_TOKEN]):
         logger.error("❌ Configuration Telegram incomplète!")
         return None
-    
-    session_string = os.getenv('TELEGRAM_SESSION', '')
+
+    session_string = load_session('TELEGRAM_SESSION', 'user')
     client = TelegramClient(StringSession(session_string), API_ID, API_HASH)
-    
+
     try:
         await client.start(bot_token=BOT_TOKEN)
         logger.info("✅ Bot utilisateur connecté")
-        
+        if not session_string:
+            save_session(client, 'user')
+
         # Setup handlers avec les IDs de canaux
         from config import (SOURCE_CHANNEL_ID, SOURCE_CHANNEL_2_ID,
                           PREDICTION_CHANNEL_ID, SUIT_MAPPING, SUIT_DISPLAY, ADMIN_ID)
-        
+
         config = {
             'PREDICTION_CHANNEL_ID': PREDICTION_CHANNEL_ID,
             'SUIT_MAPPING': SUIT_MAPPING,
             'SUIT_DISPLAY': SUIT_DISPLAY,
             'ADMIN_ID': ADMIN_ID
         }
-        
+
         source_ids = {
             'SOURCE_CHANNEL_ID': SOURCE_CHANNEL_ID,
             'SOURCE_CHANNEL_2_ID': SOURCE_CHANNEL_2_ID
         }
-        
+
         setup_handlers(client, config, source_ids)
-        
-        # Test canal prédiction
+
+        # Test canal prédiction: get_dialogs() seulement si l'entité est inconnue
+        p_id = resolve_prediction_channel(PREDICTION_CHANNEL_ID)
         try:
-            # Tenter de convertir en entier si possible (ID numérique)
             try:
-                clean_id = str(PREDICTION_CHANNEL_ID).strip()
-                if clean_id.startswith('-100'):
-                    p_id = int(clean_id)
-                elif clean_id.isdigit():
-                    p_id = int(f"-100{clean_id}")
-                else:
-                    p_id = clean_id
-            except (ValueError, TypeError):
-                p_id = PREDICTION_CHANNEL_ID
-            
-            # S'assurer que le bot a accès aux entités
-            if not session_string: # Only if not using string session which might already have dialogs
-                 await client.get_dialogs()
-            await client.get_entity(p_id)
+                await client.get_entity(p_id)
+            except ValueError:
+                await client.get_dialogs()
+                await client.get_entity(p_id)
             logger.info(f"✅ Canal prédiction {p_id} accessible")
         except Exception as e:
             logger.warning(f"⚠️ Canal prédition: {e}")
-        
+
         return client
-        
+
     except Exception as e:
         logger.error(f"❌ Erreur bot utilisateur: {e}")
         return None
 
+async def send_admin_startup_message(client):
+    """Message de démarrage à l'admin (hors du chemin critique)"""
+    try:
+        await client.send_message(ADMIN_ID, "🤖 Bot de notifications démarré!\n\nCommandes disponibles:\n/list - Liste des utilisateurs\n/add_time <email> <jours> - Ajouter du temps\n/block <email> - Bloquer utilisateur\n/unblock <email> - Débloquer utilisateur")
+        logger.info("✅ Message test envoyé à l'admin")
+    except Exception as e:
+        logger.error(f"❌ Impossible d'envoyer à l'admin {ADMIN_ID}: {e}")
+        logger.error("Vérifiez que vous avez démarré une conversation avec le bot")
+
 async def start_admin_bot():
     """Démarre un bot séparé pour les notifications admin"""
     from telethon import TelegramClient
     from telethon.sessions import StringSession
-    
+
     if not all([API_ID, API_HASH]) or not ADMIN_ID:
         logger.warning("⚠️ Pas de configuration pour notifications admin")
         return None
-    
+
     # Utiliser le même BOT_TOKEN mais pour envoyer des messages
-    session_string = os.getenv('TELEGRAM_SESSION_ADMIN', '')
+    session_string = load_session('TELEGRAM_SESSION_ADMIN', 'admin')
     client = TelegramClient(StringSession(session_string), API_ID, API_HASH)
-    
+
     try:
         # Démarrer avec le token du bot existant
         await client.start(bot_token=BOT_TOKEN)
         logger.info("✅ Bot admin notifications prêt")
-        
-        # S'assurer que le bot a accès aux entités avant d'envoyer
         if not session_string:
-            await client.get_dialogs()
-        
-        # Test envoi message à l'admin
-        try:
-            await client.send_message(ADMIN_ID, "🤖 Bot de notifications démarré!\n\nCommandes disponibles:\n/list - Liste des utilisateurs\n/add_time <email> <jours> - Ajouter du temps\n/block <email> - Bloquer utilisateur\n/unblock <email> - Débloquer utilisateur")
-            logger.info("✅ Message test envoyé à l'admin")
-        except Exception as e:
-            logger.error(f"❌ Impossible d'envoyer à l'admin {ADMIN_ID}: {e}")
-            logger.error("Vérifiez que vous avez démarré une conversation avec le bot")
-        
+            save_session(client, 'admin')
+
+        task = asyncio.create_task(send_admin_startup_message(client))
+        _background_tasks.add(task)
+        task.add_done_callback(_background_tasks.discard)
+
         return client
-        
+
     except Exception as e:
         logger.error(f"❌ Erreur bot admin: {e}")
         return None
@@ -125,63 +208,230 @@ async def start_admin_bot():
 async def start_web_server(bot_clients):
     """Démarre le serveur web"""
     from aiohttp import web
-    
-    app = setup_web_app(bot_clients)
-    runner = web.AppRunner(app)
-    
+    from web_server import setup_web_app
+
+    app = setup_web_app(bot_clients, startup_status)
+    runner = web.AppRunner(app, shutdown_timeout=HTTP_DRAIN_TIMEOUT)
+
     await runner.setup()
-    
+
     port = int(os.getenv('PORT', 5000))
     site = web.TCPSite(runner, '0.0.0.0', port)
-    
+
     await site.start()
+    startup_status['components']['web'] = True
     logger.info(f"🌐 Serveur web: http://0.0.0.0:{port}")
-    
+
     return runner
 
+async def init_database():
+    """Initialise la base dans un thread pour ne pas bloquer la boucle"""
+    from database import init_db
+
+    await asyncio.to_thread(init_db)
+    startup_status['components']['database'] = True
+    logger.info("✅ Base de données OK")
+
+async def partition_maintenance():
+    """Partitions de predictions_log: mois à venir, résumé des mois hors rétention"""
+    from database import maintain_prediction_partitions
+
+    while True:
+        try:
+            await asyncio.to_thread(maintain_prediction_partitions)
+        except Exception as e:
+            logger.error(f"❌ Maintenance partitions: {e}")
+        await asyncio.sleep(PARTITION_MAINTENANCE_INTERVAL)
+
 async def connect_bots():
     """Connect Telegram bots in the background after web server is up"""
     global bot_client, admin_bot_client
-    import web_server as ws
 
     try:
-        bot_client = await start_user_bot()
-        admin_bot_client = await start_admin_bot()
+        bot_client, admin_bot_client = await timed_phase('bots', asyncio.gather(
+            timed_phase('user_bot', start_user_bot()),
+            timed_phase('admin_bot', start_admin_bot())
+        ))
 
-        ws.bot_client = bot_client
-        ws.admin_bot_client = admin_bot_client
+        if 'web_server' in sys.modules:
+            import web_server as ws
+            ws.bot_client = bot_client
+            ws.admin_bot_client = admin_bot_client
+        startup_status['components']['user_bot'] = bot_client is not None
+        startup_status['components']['admin_bot'] = admin_bot_client is not None
+
+        if admin_bot_client:
+            async def notify_admin(text):
+                await admin_bot_client.send_message(ADMIN_ID, text)
+            loop_monitor.set_notifier(notify_admin)
 
         if admin_bot_client:
             from telethon import events
-            from web_server import handle_admin_commands
+            from admin_commands import handle_admin_commands
             @admin_bot_client.on(events.NewMessage(pattern='/'))
             async def admin_cmd_handler(event):
                 await handle_admin_commands(event)
 
+            # Diffusions aux abonnés: envoyées par le bot admin, reprises si interrompues
+            import broadcast
+            await broadcast.start(admin_bot_client)
+
+        # Premier instantané pour les workers web
+        shared_state.mark_dirty()
+
         logger.info("✅ Bots Telegram connectés en arrière-plan")
     except Exception as e:
         logger.error(f"❌ Erreur connexion bots: {e}")
 
-async def main():
-    logger.info("🚀 Démarrage...")
+def get_workers() -> int:
+    """Nombre de workers web depuis --workers <n> / --workers=<n>, sinon WEB_WORKERS"""
+    workers = os.getenv('WEB_WORKERS', '1')
+    args = sys.argv[1:]
+    for i, arg in enumerate(args):
+        if arg == '--workers' and i + 1 < len(args):
+            workers = args[i + 1]
+        elif arg.startswith('--workers='):
+            workers = arg.split('=', 1)[1]
+    if workers == 'auto':
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+def run_web_workers(workers: int):
+    """Rôle web en pré-fork: base initialisée une fois, puis N workers"""
+    from database import init_db
+    import web_workers
 
     init_db()
-    logger.info("✅ Base de données OK")
+    startup_status['role'] = 'web'
+    startup_status['required'] = ['database', 'web']
+    startup_status['components']['database'] = True
+    shared_state.configure('web')
 
-    web_runner = await start_web_server({
-        'user': None,
-        'admin': None
-    })
-    logger.info("✅ Serveur web démarré, connexion des bots en arrière-plan...")
+    def app_factory():
+        from web_server import setup_web_app
+        startup_status['components']['web'] = True
+        return setup_web_app({'user': None, 'admin': None}, startup_status)
 
-    asyncio.create_task(connect_bots())
+    async def on_worker_start(worker_id):
+        try:
+            shared_state.enable_push()
+        except Exception as e:
+            logger.warning(f"⚠️ Worker {worker_id}: notifications indisponibles ({e}), TTL court")
+        if os.getenv('LOOP_MONITOR', '1') != '0':
+            loop_monitor.start()
 
-    while True:
-        await asyncio.sleep(3600)
+    web_workers.run_master(app_factory, workers, port=int(os.getenv('PORT', 5000)),
+                           on_start=on_worker_start)
+
+def get_role() -> str:
+    """Rôle depuis --role <r> / --role=<r>, sinon APP_ROLE, sinon 'all'"""
+    role = os.getenv('APP_ROLE', 'all')
+    args = sys.argv[1:]
+    for i, arg in enumerate(args):
+        if arg == '--role' and i + 1 < len(args):
+            role = args[i + 1]
+        elif arg.startswith('--role='):
+            role = arg.split('=', 1)[1]
+    if role not in ROLES:
+        raise SystemExit(f"Rôle inconnu: {role} (attendu: {', '.join(ROLES)})")
+    return role
+
+async def main(role: str = 'all'):
+    global partition_task
+    logger.info(f"🚀 Démarrage (rôle {role})...")
+    boot_start = time.perf_counter()
+
+    startup_status['role'] = role
+    startup_status['required'] = {
+        'all': ['database', 'web', 'user_bot'],
+        'bot': ['database', 'user_bot'],
+        'web': ['database', 'web'],
+    }[role]
+    shared_state.configure(role)
+    if role == 'web':
+        try:
+            shared_state.enable_push()
+        except Exception as e:
+            logger.warning(f"⚠️ Notifications état indisponibles ({e}), TTL court")
+
+    if os.getenv('LOOP_MONITOR', '1') != '0':
+        loop_monitor.start()
+    shutdown_coordinator.install()
+
+    web_runner = None
+    db_task = asyncio.create_task(timed_phase('database', init_database()))
+    if role in ('all', 'web'):
+        web_runner = await timed_phase('web', start_web_server({
+            'user': None,
+            'admin': None
+        }))
+        logger.info("✅ Serveur web démarré")
+
+    try:
+        await db_task
+    except Exception as e:
+        logger.error(f"❌ Erreur base de données: {e}")
+
+    if role in ('all', 'bot'):
+        partition_task = asyncio.create_task(partition_maintenance())
+        await connect_bots()
+    startup_status['timings_ms']['total'] = round((time.perf_counter() - boot_start) * 1000, 1)
+    logger.info(f"🏁 Démarrage complet en {startup_status['timings_ms']['total']:.0f} ms")
+
+    register_shutdown_steps(role, web_runner)
+    await shutdown_coordinator.wait()
+    await shutdown_coordinator.run()
+
+def register_shutdown_steps(role: str, web_runner):
+    """Ordre d'arrêt: HTTP, files source, envois Telegram, état du bot, diffusions, déconnexions"""
+    if web_runner is not None:
+        async def stop_http():
+            # Ferme l'écoute puis attend les requêtes en cours (HTTP_DRAIN_TIMEOUT)
+            await web_runner.cleanup()
+        shutdown_coordinator.add_step('http', stop_http, timeout=HTTP_DRAIN_TIMEOUT + 1)
+
+    if role in ('all', 'bot'):
+        async def drain_ingestion():
+            # Les handlers ne reçoivent plus rien: on vide les files des canaux source
+            from ingestion import ingestion
+            await ingestion.drain()
+            ingestion.stop()
+        shutdown_coordinator.add_step('ingest_drain', drain_ingestion, timeout=5)
+        shutdown_coordinator.add_step('telegram_drain', shutdown_coordinator.drain_inflight, timeout=5)
+
+        async def flush_bot_state():
+            from bot_logic import save_runtime_state
+            await save_runtime_state()
+            await shared_state.flush()
+        shutdown_coordinator.add_step('bot_state', flush_bot_state, timeout=5)
+
+        async def stop_broadcasts():
+            # Les destinataires non servis restent 'pending' et seront repris
+            from broadcast import broadcaster
+            await broadcaster.stop()
+        shutdown_coordinator.add_step('broadcasts', stop_broadcasts, timeout=5)
+
+        async def disconnect_clients():
+            clients = [c for c in (bot_client, admin_bot_client) if c is not None]
+            await asyncio.gather(*(c.disconnect() for c in clients), return_exceptions=True)
+        shutdown_coordinator.add_step('disconnect', disconnect_clients, timeout=3)
+
+    async def stop_monitors():
+        loop_monitor.stop()
+        if partition_task is not None:
+            partition_task.cancel()
+    shutdown_coordinator.add_step('monitors', stop_monitors)
 
 if __name__ == '__main__':
     try:
-        asyncio.run(main())
+        role = get_role()
+        workers = get_workers()
+        if role == 'web' and workers > 1:
+            run_web_workers(workers)
+        else:
+            if workers > 1:
+                logger.warning("⚠️ --workers ignoré: seul le rôle web peut être multi-process")
+            asyncio.run(main(role))
     except KeyboardInterrupt:
         logger.info("👋 Arrêt")
     except Exception as e:
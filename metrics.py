@@ -0,0 +1,293 @@
+"""
+Registre de métriques (format texte Prometheus)
+
+Compteurs, jauges et histogrammes en mémoire, sans dépendance externe.
+Les chemins chauds n'effectuent qu'une recherche dans un dict et une
+addition ; le rendu texte n'est calculé qu'au moment du scrape /metrics.
+"""
+import time
+import logging
+import functools
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+# Buckets par défaut (secondes) - de la milliseconde à 10 s
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# ============================================================
+# TYPES DE MÉTRIQUES
+# ============================================================
+
+class _Timer:
+    """Context manager qui observe la durée écoulée dans un histogramme"""
+    __slots__ = ('_child', '_start')
+
+    def __init__(self, child):
+        self._child = child
+        self._start = 0.0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._child.observe(time.perf_counter() - self._start)
+        return False
+
+
+class _CounterChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount=1.0):
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def set(self, value):
+        self.value = float(value)
+
+    def inc(self, amount=1.0):
+        self.value += amount
+
+    def dec(self, amount=1.0):
+        self.value -= amount
+
+
+class _HistogramChild:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Metric:
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        if not self.labelnames:
+            self._default = self._new_child()
+            self._children[()] = self._default
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """Retourne (et crée au besoin) la série pour ces valeurs de labels"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}: labels attendus {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _label_str(self, values, extra=None):
+        pairs = [f'{k}="{_escape(str(v))}"' for k, v in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{self._label_str(values)} {_fmt(child.value)}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1.0):
+        self._default.inc(amount)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self._default.set(value)
+
+    def inc(self, amount=1.0):
+        self._default.inc(amount)
+
+    def dec(self, amount=1.0):
+        self._default.dec(amount)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.bucket_bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.bucket_bounds)
+
+    def observe(self, value):
+        self._default.observe(value)
+
+    def time(self):
+        return self._default.time()
+
+    def _render_child(self, values, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bucket_bounds, child.counts):
+            cumulative += count
+            le = self._label_str(values, f'le="{_fmt(bound)}"')
+            lines.append(f"{self.name}_bucket{le} {cumulative}")
+        le = self._label_str(values, 'le="+Inf"')
+        lines.append(f"{self.name}_bucket{le} {child.count}")
+        labels = self._label_str(values)
+        lines.append(f"{self.name}_sum{labels} {_fmt(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _fmt(value) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+# ============================================================
+# REGISTRE
+# ============================================================
+
+_registry = []
+_collectors = []
+
+
+def _register(metric):
+    _registry.append(metric)
+    return metric
+
+
+def counter(name, documentation, labelnames=()):
+    return _register(Counter(name, documentation, labelnames))
+
+
+def gauge(name, documentation, labelnames=()):
+    return _register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return _register(Histogram(name, documentation, labelnames, buckets))
+
+
+def register_collector(func):
+    """Enregistre une fonction appelée juste avant chaque rendu (valeurs coûteuses)"""
+    _collectors.append(func)
+    return func
+
+
+def render_metrics() -> str:
+    """Produit le texte d'exposition Prometheus de toutes les métriques"""
+    for collect in _collectors:
+        try:
+            collect()
+        except Exception as e:
+            logger.warning(f"⚠️ Collecteur métriques {collect.__name__}: {e}")
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+# ============================================================
+# MÉTRIQUES DE L'APPLICATION
+# ============================================================
+
+# Bot
+BOT_MESSAGES = counter('bot_source_messages_total',
+                       'Messages reçus des canaux source', ('event',))
+BOT_EVENTS_DROPPED = counter('bot_events_dropped_total',
+                             'Mises à jour ignorées (autre chat, doublon, arrêt)', ('event', 'reason'))
+BOT_PARSE_SECONDS = histogram('bot_parse_seconds',
+                              "Temps d'extraction du numéro de jeu et des groupes",
+                              buckets=(0.00001, 0.00005, 0.0001, 0.00025, 0.0005,
+                                       0.001, 0.0025, 0.005, 0.01))
+BOT_PROCESS_SECONDS = histogram('bot_process_seconds',
+                                'Durée totale de process_source_message')
+BOT_PREDICTIONS = counter('bot_predictions_total',
+                          'Prédictions envoyées et résolues', ('status',))
+TELEGRAM_SECONDS = histogram('telegram_request_seconds',
+                             'Latence des appels Telegram sortants', ('method',))
+TELEGRAM_ERRORS = counter('telegram_request_errors_total',
+                          'Appels Telegram sortants en erreur', ('method',))
+
+# Base de données
+DB_QUERY_SECONDS = histogram('db_query_seconds',
+                             'Latence des fonctions de database.py', ('function',))
+DB_ERRORS = counter('db_errors_total',
+                    'Exceptions levées par les fonctions de database.py', ('function',))
+
+# Web
+HTTP_SECONDS = histogram('http_request_seconds',
+                         'Latence des requêtes HTTP par route', ('method', 'route'))
+HTTP_REQUESTS = counter('http_requests_total',
+                        'Requêtes HTTP par route et code', ('method', 'route', 'status'))
+ACTIVE_SESSIONS = gauge('web_active_sessions', 'Sessions utilisateur non expirées')
+
+# Boucle asyncio
+LOOP_LAG = gauge('event_loop_lag_seconds', 'Dernier retard mesuré de la boucle asyncio')
+LOOP_LAG_HIST = histogram('event_loop_lag_histogram_seconds',
+                          'Distribution du retard de la boucle asyncio')
+LOOP_STALLS = counter('event_loop_stalls_total',
+                      'Blocages de la boucle au-delà du seuil de loop_monitor')
+
+
+def track_db(func):
+    """Décorateur: mesure la latence d'une fonction de database.py"""
+    child = DB_QUERY_SECONDS.labels(func.__name__)
+    errors = DB_ERRORS.labels(func.__name__)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            child.observe(time.perf_counter() - start)
+    return wrapper
+
@@ -0,0 +1,170 @@
+"""
+Cycle de pause des prédictions: échéance monotonique et minuteur de boucle
+
+Toutes les PAUSE_EVERY prédictions, le bot se met en pause pour la durée
+suivante du cycle (/pausecycle). La fin est programmée sur la boucle
+asyncio (call_later): la pause se termine à l'heure prévue, même sans
+message source, et aucune date n'est relue à chaque message.
+is_paused / remaining() ne coûtent qu'une lecture de time.monotonic().
+
+Début et fin sont publiés aux abonnés (subscribe): bot_logic annonce la
+pause et la reprise dans le canal de prédiction et republie l'état du
+tableau de bord. pause_config garde la fin en heure murale
+(pause_end_time, ISO) pour la sauvegarde d'état et ends_at (epoch) pour
+les workers web d'autres process.
+"""
+import time
+import asyncio
+import logging
+from datetime import datetime
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Prédictions entre deux pauses
+PAUSE_EVERY = 5
+DEFAULT_CYCLE = (180, 300, 240)  # 3min, 5min, 4min
+
+PAUSE_EVENTS = metrics.counter('bot_pause_events_total', 'Débuts et fins de pause', ('event',))
+PAUSE_REMAINING = metrics.gauge('bot_pause_remaining_seconds', 'Temps restant de la pause en cours')
+
+_listeners = []
+_current = None  # dernier scheduler créé (celui de l'état du bot), pour la jauge
+
+
+def subscribe(callback):
+    """callback(event, scheduler) à chaque début ('start') ou fin ('end') de pause"""
+    _listeners.append(callback)
+
+
+def _publish(event: str, scheduler):
+    PAUSE_EVENTS.labels(event).inc()
+    for callback in _listeners:
+        try:
+            callback(event, scheduler)
+        except Exception as e:
+            logger.error(f"❌ Événement pause {event}: {e}")
+
+
+def default_config() -> dict:
+    return {
+        'cycle': list(DEFAULT_CYCLE),
+        'current_index': 0,
+        'predictions_count': 0,
+        'is_paused': False,
+        'pause_end_time': None,
+        'ends_at': None,
+    }
+
+
+class PauseScheduler:
+    """Pause en cours et compteur du cycle, sur le dict pause_config de l'état"""
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.duration = 0
+        self._deadline = None  # time.monotonic() de fin, None hors pause
+        self._timer = None     # asyncio.TimerHandle
+        global _current
+        _current = self
+
+    @property
+    def is_paused(self) -> bool:
+        """Simple comparaison d'horloge: la fin (et son annonce) revient au minuteur"""
+        return self._deadline is not None and time.monotonic() < self._deadline
+
+    def remaining(self) -> float:
+        """Secondes avant la reprise (0 hors pause)"""
+        if self._deadline is None:
+            return 0.0
+        return max(0.0, self._deadline - time.monotonic())
+
+    def count_prediction(self) -> bool:
+        """Compte un déclencheur; vrai s'il ouvre une pause (pas de prédiction)"""
+        if self._timer is None and self._deadline is not None and not self.is_paused:
+            # Pause ouverte hors boucle, sans minuteur: close à l'échéance
+            self.end()
+        config = self.config
+        config['predictions_count'] += 1
+        if config['predictions_count'] < PAUSE_EVERY:
+            return False
+        config['predictions_count'] = 0
+        cycle = config['cycle']
+        duration = cycle[config['current_index'] % len(cycle)]
+        config['current_index'] += 1
+        if duration <= 0:
+            return False
+        self.start(duration)
+        return True
+
+    def start(self, duration: float, announce: bool = True):
+        self._cancel_timer()
+        self.duration = duration
+        self._deadline = time.monotonic() + duration
+        now = time.time()
+        self.config.update(is_paused=True, ends_at=now + duration,
+                           pause_end_time=datetime.fromtimestamp(now + duration).isoformat())
+        try:
+            self._timer = asyncio.get_running_loop().call_later(duration, self._on_timer)
+        except RuntimeError:
+            # Hors boucle (scripts): pas de minuteur, le prochain
+            # count_prediction() après l'échéance termine la pause
+            self._timer = None
+        logger.info(f"⏸️ PAUSE: {duration / 60:g}min")
+        if announce:
+            _publish('start', self)
+
+    def end(self, announce: bool = True):
+        """Termine la pause maintenant (minuteur, échéance dépassée ou commande)"""
+        if self._deadline is None:
+            return
+        self._cancel_timer()
+        self._deadline = None
+        self.config.update(is_paused=False, ends_at=None, pause_end_time=None)
+        logger.info("🔄 Pause terminée")
+        if announce:
+            _publish('end', self)
+
+    def reset(self):
+        """Cycle remis au début, sans pause en cours ni annonce (/clearall)"""
+        self.end(announce=False)
+        self.config.update(predictions_count=0, current_index=0)
+
+    def set_cycle(self, durations: list):
+        """Nouveau cycle (/pausecycle), appliqué dès la prochaine pause;
+        la pause en cours garde son échéance"""
+        self.config['cycle'] = list(durations)
+        self.config['current_index'] = 0
+
+    def restore(self):
+        """Réarme la pause sauvegardée (pause_end_time murale) après un redémarrage"""
+        end = self.config.get('pause_end_time')
+        if not self.config.get('is_paused') or not end:
+            self.config.update(is_paused=False, ends_at=None, pause_end_time=None)
+            return
+        try:
+            left = (datetime.fromisoformat(end) - datetime.now()).total_seconds()
+        except (TypeError, ValueError):
+            left = 0
+        if left > 0:
+            self.start(left, announce=False)
+        else:
+            # Échue pendant l'arrêt: reprise silencieuse, sans annonce au démarrage
+            self.config.update(is_paused=False, ends_at=None, pause_end_time=None)
+            logger.info("🔄 Pause échue pendant l'arrêt")
+
+    def _on_timer(self):
+        self._timer = None
+        self.end()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+@metrics.register_collector
+def _collect_remaining():
+    if _current is not None:
+        PAUSE_REMAINING.set(_current.remaining())
@@ -0,0 +1,94 @@
+"""
+Limitation de débit en mémoire (seaux à jetons) pour les routes d'authentification
+
+Chaque tentative de connexion / inscription coûte un PBKDF2 de 100 000
+itérations sur la boucle du serveur: sans limite, une rafale de
+credential stuffing occupe le CPU et retarde le bot Telegram du même
+process. web_server.auth_rate_limit_middleware consomme un jeton par
+adresse IP puis par email avant d'appeler la route; sans jeton: 429.
+
+Un seau inutilisé assez longtemps pour être redevenu plein (burst /
+débit) équivaut à un seau absent: il est retiré à la volée (OrderedDict
+trié par dernier accès, purge par l'avant), la mémoire suit donc le
+nombre de clés actives et reste bornée par MAX_KEYS.
+
+Les seaux vivent dans la mémoire du process: avec --workers N, chaque
+worker a les siens et SO_REUSEPORT répartit les connexions, la limite
+effective d'un attaquant est donc jusqu'à N fois la limite configurée.
+Diviser AUTH_*_BURST / AUTH_*_PER_MINUTE par WEB_WORKERS pour garder
+la même limite globale.
+"""
+import os
+import time
+from collections import OrderedDict
+
+import metrics
+
+# Rafale autorisée puis régime permanent (tentatives / minute)
+AUTH_IP_BURST = float(os.getenv('AUTH_IP_BURST', '10'))
+AUTH_IP_PER_MINUTE = float(os.getenv('AUTH_IP_PER_MINUTE', '10'))
+AUTH_EMAIL_BURST = float(os.getenv('AUTH_EMAIL_BURST', '5'))
+AUTH_EMAIL_PER_MINUTE = float(os.getenv('AUTH_EMAIL_PER_MINUTE', '3'))
+MAX_KEYS = 100_000
+# Purge au plus ce nombre de seaux expirés par appel (coût borné)
+SWEEP_BATCH = 8
+
+AUTH_RATE_LIMITED = metrics.counter('web_auth_rate_limited_total',
+                                    "Tentatives d'authentification refusées (429)", ('route', 'key'))
+RATE_LIMIT_KEYS = metrics.gauge('web_rate_limit_keys', 'Seaux à jetons actifs', ('limiter',))
+
+
+class TokenBuckets:
+    """Un seau (jetons, horodatage) par clé, expiré dès qu'il serait plein"""
+
+    def __init__(self, name: str, burst: float, per_minute: float, max_keys: int = MAX_KEYS):
+        self.name = name
+        self.burst = burst
+        self.rate = per_minute / 60
+        self.ttl = burst / self.rate if self.rate else float('inf')
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()  # clé -> (jetons, monotonic)
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def take(self, key, now: float = None) -> float:
+        """Consomme un jeton; renvoie 0 si accepté, sinon secondes avant le prochain"""
+        now = time.monotonic() if now is None else now
+        buckets = self._buckets
+        self._sweep(now)
+        entry = buckets.pop(key, None)
+        if entry is None:
+            tokens = self.burst
+        else:
+            tokens = min(self.burst, entry[0] + (now - entry[1]) * self.rate)
+        if tokens >= 1:
+            buckets[key] = (tokens - 1, now)
+            wait = 0.0
+        else:
+            buckets[key] = (tokens, now)
+            wait = (1 - tokens) / self.rate if self.rate else float('inf')
+        if len(buckets) > self.max_keys:
+            buckets.popitem(last=False)
+        return wait
+
+    def _sweep(self, now: float):
+        buckets = self._buckets
+        for _ in range(SWEEP_BATCH):
+            if not buckets:
+                return
+            key, (tokens, stamp) = next(iter(buckets.items()))
+            # Plein à nouveau (au plus tard après ttl): identique à une clé jamais vue
+            if now - stamp < self.ttl:
+                return
+            del buckets[key]
+
+
+by_ip = TokenBuckets('ip', AUTH_IP_BURST, AUTH_IP_PER_MINUTE)
+by_email = TokenBuckets('email', AUTH_EMAIL_BURST, AUTH_EMAIL_PER_MINUTE)
+
+
+@metrics.register_collector
+def _collect_keys():
+    for limiter in (by_ip, by_email):
+        RATE_LIMIT_KEYS.labels(limiter.name).set(len(limiter))
@@ -0,0 +1,155 @@
+"""
+Enregistrements compacts de l'état du bot
+
+PredictionRecord et VerificationState remplacent les dicts reconstruits
+à la main dans bot_logic / admin_commands. PredictionHistory garde les
+100 dernières prédictions avec un index numéro de jeu -> enregistrement
+(mise à jour de statut en O(1)) et une vue immuable mise en cache pour
+les lecteurs (instantané du tableau de bord, sauvegarde d'état).
+"""
+from collections import deque
+from datetime import datetime
+
+HISTORY_SIZE = 100
+
+
+class PredictionRecord:
+    __slots__ = ('game_number', 'suit', 'status', 'timestamp', 'time_str', '_dict')
+
+    def __init__(self, game_number: int, suit: str, status: str = '⏳', created: datetime = None):
+        created = created or datetime.now()
+        self.game_number = game_number
+        self.suit = suit
+        self.status = status
+        self.timestamp = created.isoformat()
+        self.time_str = created.strftime('%H:%M:%S')
+        self._dict = None
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        record = cls.__new__(cls)
+        record.game_number = data['game_number']
+        record.suit = data['suit']
+        record.status = data.get('status', '⏳')
+        record.timestamp = data.get('timestamp')
+        record.time_str = data.get('time_str')
+        record._dict = None
+        return record
+
+    def to_dict(self) -> dict:
+        """Dict mis en cache jusqu'au prochain changement de statut (ne pas modifier)"""
+        if self._dict is None:
+            self._dict = {
+                'game_number': self.game_number,
+                'suit': self.suit,
+                'status': self.status,
+                'timestamp': self.timestamp,
+                'time_str': self.time_str,
+            }
+        return self._dict
+
+
+class VerificationState:
+    """Prédiction publiée en attente de résultat (predicted_number None: aucune)"""
+    __slots__ = ('predicted_number', 'predicted_suit', 'current_check',
+                 'message_id', 'channel_id', 'status', 'base_game')
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.predicted_number = None
+        self.predicted_suit = None
+        self.current_check = 0
+        self.message_id = None
+        self.channel_id = None
+        self.status = None
+        self.base_game = None
+
+    def start(self, predicted_number, predicted_suit, message_id, channel_id, base_game):
+        self.predicted_number = predicted_number
+        self.predicted_suit = predicted_suit
+        self.current_check = 0
+        self.message_id = message_id
+        self.channel_id = channel_id
+        self.status = 'pending'
+        self.base_game = base_game
+
+    @property
+    def active(self) -> bool:
+        return self.predicted_number is not None
+
+    @property
+    def expected_number(self):
+        """Jeu à vérifier maintenant (prédit + rattrapage en cours)"""
+        return self.predicted_number + self.current_check
+
+    def update(self, data: dict):
+        for name in self.__slots__:
+            if name in data:
+                setattr(self, name, data[name])
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class PredictionHistory:
+    """Dernières prédictions, indexées par numéro de jeu"""
+
+    def __init__(self, maxlen: int = HISTORY_SIZE):
+        self._records = deque(maxlen=maxlen)
+        self._index = {}
+        self._view = ()
+        self._view_valid = True
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def __bool__(self):
+        return bool(self._records)
+
+    def append(self, record: PredictionRecord):
+        records = self._records
+        if len(records) == records.maxlen:
+            evicted = records[0]
+            if self._index.get(evicted.game_number) is evicted:
+                del self._index[evicted.game_number]
+        records.append(record)
+        self._index[record.game_number] = record
+        self._view_valid = False
+
+    def extend(self, items):
+        """Accepte des enregistrements ou des dicts (état sauvegardé)"""
+        for item in items:
+            self.append(item if isinstance(item, PredictionRecord) else PredictionRecord.from_dict(item))
+
+    def get(self, game_number: int):
+        return self._index.get(game_number)
+
+    def last(self):
+        return self._records[-1] if self._records else None
+
+    def set_status(self, game_number: int, status: str) -> bool:
+        record = self._index.get(game_number)
+        if record is None:
+            return False
+        record.status = status
+        record._dict = None
+        self._view_valid = False
+        return True
+
+    def clear(self):
+        self._records.clear()
+        self._index.clear()
+        self._view = ()
+        self._view_valid = True
+
+    def view(self) -> tuple:
+        """Tuple de dicts, reconstruit seulement après une modification"""
+        if not self._view_valid:
+            self._view = tuple(map(PredictionRecord.to_dict, self._records))
+            self._view_valid = True
+        return self._view
@@ -0,0 +1,215 @@
+"""
+État partagé entre le bot et les workers web
+
+Le processus bot publie un instantané de BotState (historique, jeu
+courant, pause, compteurs) dans un stockage partagé; chaque worker web
+le relit avec un petit cache. Backends (STATE_BACKEND):
+  memory   - rôle "all": lecture directe de bot_logic.state, rien n'est publié
+  file     - fichier JSON local (écriture atomique), plusieurs process sur un hôte
+  postgres - table bot_state, plusieurs hôtes
+"""
+import os
+import json
+import time
+import asyncio
+import logging
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ('memory', 'file', 'postgres')
+
+STATE_FILE = os.getenv('STATE_FILE', '.state/bot_state.json')
+# Regroupe les changements rapprochés en une seule écriture
+PUBLISH_DELAY = float(os.getenv('STATE_PUBLISH_DELAY', '0.2'))
+# Durée pendant laquelle un worker web réutilise l'instantané lu
+CACHE_TTL = float(os.getenv('STATE_CACHE_TTL', '1'))
+# Avec les notifications push, le TTL n'est plus qu'un filet de sécurité
+PUSH_CACHE_TTL = float(os.getenv('STATE_PUSH_CACHE_TTL', '30'))
+
+backend = os.getenv('STATE_BACKEND', 'memory')
+# Dernières traces publiées (limite haute de /api/admin/latency)
+LATENCY_RECENT = 50
+
+# Part de l'horloge: un redémarrage du bot ne réutilise pas d'anciens numéros
+_version = int(time.time() * 1000)
+_publish_task = None
+_refresh_task = None
+_cache = {'snapshot': None, 'checked_at': 0.0, 'stamp': None}
+_push_enabled = False
+
+
+def configure(role: str):
+    """Choisit le backend selon le rôle si STATE_BACKEND n'est pas imposé"""
+    global backend
+    if os.getenv('STATE_BACKEND'):
+        backend = os.getenv('STATE_BACKEND')
+    else:
+        backend = 'memory' if role == 'all' else 'postgres'
+    if backend not in BACKENDS:
+        raise ValueError(f"STATE_BACKEND inconnu: {backend}")
+    _cache.update(snapshot=None, checked_at=0.0, stamp=None)
+    logger.info(f"🔗 État partagé: backend {backend} (rôle {role})")
+
+
+def build_snapshot(state) -> dict:
+    """Instantané JSON-sérialisable de ce que le tableau de bord affiche"""
+    import tracing
+    from analytics import analytics
+    from ingestion import ingestion
+    pause = state.pause_config
+    return {
+        'version': _version,
+        'updated_at': datetime.now().isoformat(),
+        'predictions': state.prediction_history.view(),
+        'current_game_number': state.current_game_number,
+        'last_source_game_number': state.last_source_game_number,
+        'won_predictions': state.won_predictions,
+        'lost_predictions': state.lost_predictions,
+        'pause': {
+            'predictions_count': pause['predictions_count'],
+            'is_paused': pause['is_paused'],
+            # Fin de pause en epoch: temps restant = ends_at - time.time()
+            'ends_at': pause['ends_at'],
+        },
+        'analytics': analytics.snapshot(),
+        # /api/admin/latency: traces et files d'ingestion du process bot
+        'latency': {
+            'summary': tracing.summary(),
+            'ingestion': ingestion.snapshot(),
+            'recent': tracing.recent_traces(LATENCY_RECENT),
+        },
+    }
+
+# ============================================================
+# CÔTÉ BOT (publication)
+# ============================================================
+
+def mark_dirty():
+    """Signale un changement d'état; publication différée et regroupée"""
+    global _version, _publish_task
+    _version += 1
+    if backend == 'memory':
+        return
+    if _publish_task is not None and not _publish_task.done():
+        return
+    try:
+        _publish_task = asyncio.get_running_loop().create_task(_publish_later())
+    except RuntimeError:
+        # Hors boucle (tests, scripts): publication immédiate
+        _write(_current_snapshot())
+
+
+async def _publish_later():
+    await asyncio.sleep(PUBLISH_DELAY)
+    await flush()
+
+
+async def flush():
+    """Écrit l'instantané courant maintenant (aussi utilisé à l'arrêt)"""
+    if backend == 'memory':
+        return
+    snapshot = _current_snapshot()
+    try:
+        await asyncio.to_thread(_write, snapshot)
+    except Exception as e:
+        logger.error(f"❌ Publication état partagé: {e}")
+
+
+def _current_snapshot() -> dict:
+    from bot_logic import state
+    return build_snapshot(state)
+
+
+def _write(snapshot: dict):
+    payload = json.dumps(snapshot, ensure_ascii=False, default=str)
+    if backend == 'file':
+        directory = os.path.dirname(STATE_FILE)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp = f"{STATE_FILE}.{os.getpid()}.tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(payload)
+        os.replace(tmp, STATE_FILE)
+    elif backend == 'postgres':
+        from database import save_bot_state
+        save_bot_state(snapshot['version'], payload)
+
+# ============================================================
+# CÔTÉ WEB (lecture)
+# ============================================================
+
+async def read_snapshot() -> dict:
+    """Dernier instantané connu (None si le bot n'a encore rien publié)
+
+    memory: reconstruit seulement quand la version change. file / postgres:
+    relu hors de la boucle (asyncio.to_thread) au plus une fois par TTL, les
+    requêtes simultanées attendent la même relecture.
+    """
+    global _refresh_task
+    if backend == 'memory':
+        if _cache['stamp'] != _version:
+            _cache['snapshot'] = _current_snapshot()
+            _cache['stamp'] = _version
+        return _cache['snapshot']
+
+    now = time.monotonic()
+    ttl = PUSH_CACHE_TTL if _push_enabled else CACHE_TTL
+    if _cache['snapshot'] is not None and now - _cache['checked_at'] < ttl:
+        return _cache['snapshot']
+    if _refresh_task is None or _refresh_task.done():
+        _cache['checked_at'] = now
+        _refresh_task = asyncio.get_running_loop().create_task(_refresh(_cache['stamp']))
+    # Une requête annulée n'interrompt pas la relecture partagée
+    await asyncio.shield(_refresh_task)
+    return _cache['snapshot']
+
+
+async def _refresh(stamp):
+    row = await asyncio.to_thread(_load, stamp)
+    if row is not None:
+        _cache['stamp'], _cache['snapshot'] = row
+
+
+def _load(stamp):
+    """(empreinte, instantané) si l'état publié a changé depuis `stamp`, sinon None"""
+    try:
+        if backend == 'file':
+            current = os.stat(STATE_FILE).st_mtime_ns
+            if current != stamp:
+                with open(STATE_FILE, encoding='utf-8') as f:
+                    return current, json.load(f)
+        else:
+            from database import load_bot_state
+            row = load_bot_state(stamp)
+            if row is not None:
+                return row[0], json.loads(row[1])
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.error(f"❌ Lecture état partagé: {e}")
+    return None
+
+
+def invalidate(payload=None):
+    """Force la relecture au prochain read_snapshot()"""
+    _cache['checked_at'] = 0.0
+
+
+def _on_push_connection(connected: bool):
+    """Écoute perdue: retour au TTL court; rétablie: relecture (notifications manquées)"""
+    global _push_enabled
+    _push_enabled = connected
+    invalidate()
+
+
+def enable_push():
+    """Worker web: relit l'état sur notification du bot plutôt qu'au TTL court"""
+    global _push_enabled
+    if backend != 'postgres':
+        return
+    import invalidation
+    invalidation.subscribe('bot_state', invalidate)
+    invalidation.on_connection_change(_on_push_connection)
+    invalidation.start_listener()
+    _push_enabled = True
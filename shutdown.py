@@ -0,0 +1,106 @@
+"""
+Arrêt propre (SIGTERM / SIGINT)
+
+Render envoie SIGTERM à chaque redéploiement. Le coordinateur exécute,
+dans l'ordre et sous un délai global borné, les étapes enregistrées par
+main.py: arrêt de l'écoute HTTP et drainage des requêtes, drainage des
+envois Telegram en cours, écriture de l'état du bot et des données en
+attente, déconnexion des clients. Chaque étape est chronométrée.
+"""
+import os
+import time
+import signal
+import asyncio
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Render laisse 30 s entre SIGTERM et SIGKILL
+SHUTDOWN_TIMEOUT = float(os.getenv('SHUTDOWN_TIMEOUT', '25'))
+
+
+class ShutdownCoordinator:
+    def __init__(self, timeout: float = SHUTDOWN_TIMEOUT):
+        self.timeout = timeout
+        self.stopping = False
+        self._event = None
+        self._steps = []
+        self._inflight = 0
+        self._idle = None
+
+    def install(self, loop=None):
+        """Enregistre les gestionnaires SIGTERM/SIGINT sur la boucle"""
+        loop = loop or asyncio.get_running_loop()
+        self._event = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.request, sig)
+            except NotImplementedError:
+                # Windows: KeyboardInterrupt reste géré par asyncio.run
+                pass
+
+    def request(self, sig=None):
+        if self.stopping:
+            return
+        self.stopping = True
+        name = signal.Signals(sig).name if sig else 'demande'
+        logger.info(f"🛑 Arrêt demandé ({name})")
+        if self._event:
+            self._event.set()
+
+    async def wait(self):
+        await self._event.wait()
+
+    def add_step(self, name: str, func, timeout: float = None):
+        """func: coroutine sans argument, exécutée à l'arrêt dans l'ordre d'ajout"""
+        self._steps.append((name, func, timeout))
+
+    # ---------------- Opérations sortantes en cours ----------------
+
+    @contextmanager
+    def inflight(self):
+        """Entoure un envoi Telegram pour que l'arrêt attende sa fin"""
+        self._inflight += 1
+        if self._idle:
+            self._idle.clear()
+        try:
+            yield
+        finally:
+            self._inflight -= 1
+            if self._inflight == 0 and self._idle:
+                self._idle.set()
+
+    async def drain_inflight(self):
+        if self._idle and self._inflight:
+            logger.info(f"⏳ {self._inflight} envoi(s) Telegram en cours")
+            await self._idle.wait()
+
+    # ---------------- Exécution ----------------
+
+    async def run(self):
+        """Exécute les étapes; une étape en retard est abandonnée, pas les suivantes"""
+        start = time.perf_counter()
+        deadline = start + self.timeout
+        for name, func, step_timeout in self._steps:
+            remaining = deadline - time.perf_counter()
+            step_start = time.perf_counter()
+            if remaining <= 0:
+                logger.warning(f"⚠️ Arrêt: étape {name} sautée (délai global dépassé)")
+                continue
+            if step_timeout is not None:
+                remaining = min(remaining, step_timeout)
+            try:
+                await asyncio.wait_for(func(), timeout=remaining)
+                status = 'ok'
+            except asyncio.TimeoutError:
+                status = 'délai dépassé'
+            except Exception as e:
+                status = f'erreur: {e}'
+            logger.info(f"⏱️ Arrêt {name}: {(time.perf_counter() - step_start) * 1000:.0f} ms ({status})")
+        logger.info(f"👋 Arrêt terminé en {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+coordinator = ShutdownCoordinator()
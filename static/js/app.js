@@ -6,51 +6,171 @@ let currentLang = 'fr';
 let currentUser = null;
 let timerInterval = null;
 
+// Dernier payload de /api/predictions: re-rendu local au changement de langue
+let lastData = null;
+// Version de l'instantané déjà affichée (null: forcer le prochain rendu)
+let renderedVersion = null;
+
+// Lignes de l'historique en direct
+const HISTORY_SIZE = 20;
+
+// Dernière langue demandée (un paquet plus lent ne doit pas l'écraser)
+let requestedLang = null;
+
 function initApp(lang, user) {
     currentLang = lang;
     currentUser = user;
     
-    // Charger la langue
-    changeLang(lang);
+    // Charger la langue (choix enregistré sur cet appareil, sinon celle de la page)
+    const preferred = localStorage.getItem('preferred_lang');
+    changeLang(preferred && AVAILABLE_LANGS.includes(preferred) ? preferred : lang);
     
     // Démarrer le timer d'abonnement
     startSubscriptionTimer();
     
-    // Charger les données
+    // Charger les données (l'historique en direct suit le même instantané)
     fetchData();
     setInterval(fetchData, 3000);
-
-    // 🔧 NOUVEAU: Charger l'historique des prédictions
-    loadPredictionHistory();
-    setInterval(loadPredictionHistory, 30000); // Rafraîchir toutes les 30s
 }
 
-function changeLang(lang) {
+async function changeLang(lang) {
+    requestedLang = lang;
+    let t;
+    try {
+        t = await loadTranslations(lang);
+    } catch (e) {
+        console.error('Erreur chargement traductions:', e);
+        const select = $id('langSelect');
+        if (select) select.value = currentLang;
+        return;
+    }
+    if (lang !== requestedLang) return;
     currentLang = lang;
-    const t = TRANSLATIONS[lang];
     
-    // Mettre à jour tous les éléments avec data-translate
-    document.querySelectorAll('[data-translate]').forEach(el => {
-        const key = el.dataset.translate;
-        if (t[key]) {
-            el.textContent = t[key];
-        }
-    });
+    // Mettre à jour les éléments data-translate dont le texte change
+    applyTranslations(lang);
     
-    // Mettre à jour le drapeau
-    const flagEl = document.getElementById('userFlag');
+    // Mettre à jour le drapeau et le sélecteur
+    const flagEl = $id('userFlag');
     if (flagEl && t.flag) {
-        flagEl.textContent = t.flag;
+        setText(flagEl, t.flag);
     }
+    const select = $id('langSelect');
+    if (select && select.value !== lang) select.value = lang;
     
     localStorage.setItem('preferred_lang', lang);
+    // Le serveur embarque cette langue au prochain chargement
+    document.cookie = `lang=${lang}; path=/; max-age=31536000; SameSite=Lax`;
     
-    // Forcer la mise à jour des prédictions pour appliquer la langue immédiatement
-    fetchData();
+    // Réappliquer la langue aux prédictions depuis le dernier payload, sans requête
+    if (lastData) renderDashboard(lastData, true);
+}
+
+// ============================================================
+// RENDU INCRÉMENTAL (références DOM en cache, écritures si changement)
+// ============================================================
+
+const domCache = {};
+
+function $id(id) {
+    if (!(id in domCache)) domCache[id] = document.getElementById(id);
+    return domCache[id];
+}
+
+function setText(el, text) {
+    text = String(text);
+    if (el && el.textContent !== text) el.textContent = text;
+}
+
+function setStyle(el, prop, value) {
+    if (el && el.style[prop] !== value) el.style[prop] = value;
+}
+
+// Temps de script par mise à jour; ?perf dans l'URL: résumé en console
+const PERF_LOG = new URLSearchParams(window.location.search).has('perf');
+const renderTimings = [];
+let renderCount = 0;
+
+function recordRenderTime(ms, rows) {
+    renderCount++;
+    renderTimings.push(ms);
+    if (renderTimings.length > 200) renderTimings.shift();
+    if (PERF_LOG && renderCount % 20 === 0) {
+        console.log('dashboard render', dashboardPerf(), `lignes modifiées: ${rows}`);
+    }
+}
+
+function dashboardPerf() {
+    const sorted = [...renderTimings].sort((a, b) => a - b);
+    const pick = q => sorted.length ? sorted[Math.min(sorted.length - 1, Math.floor(q * sorted.length))] : 0;
+    return {
+        updates: renderCount,
+        median_ms: +pick(0.5).toFixed(3),
+        p95_ms: +pick(0.95).toFixed(3),
+        max_ms: +(sorted[sorted.length - 1] || 0).toFixed(3)
+    };
+}
+
+function renderDashboard(data, force) {
+    const start = performance.now();
+    let rows = 0;
+
+    // Compte à rebours de pause: change à chaque requête
+    renderPause(data.pause_info);
+
+    // Le reste ne dépend que de l'instantané du bot
+    if (force || data.version === undefined || data.version !== renderedVersion) {
+        renderStats(data);
+        updateActivePrediction(data.predictions || []);
+        rows = renderHistory(data.predictions);
+        renderedVersion = data.version;
+    }
+    recordRenderTime(performance.now() - start, rows);
+}
+
+function renderStats(data) {
+    setText($id('winRateValue'), data.win_rate + '%');
+    setText($id('wonValue'), data.won_predictions);
+    setText($id('lostValue'), data.lost_predictions);
+    setText($id('progressHeader'), `${data.won_predictions + data.lost_predictions} / ${data.total_predictions}`);
+    
+    if (data.last_source_game) {
+        setText($id('sourceGameNumber'), '#' + data.last_source_game);
+    }
+}
+
+function renderPause(pauseInfo) {
+    // Nouveaux compteurs (Préd. restantes et Pause)
+    if (pauseInfo) {
+        setText($id('topWonCount'), pauseInfo.remaining_before_pause);
+        const pauseValEl = $id('topLostCount');
+        if (pauseInfo.is_paused) {
+            setText(pauseValEl, pauseInfo.remaining_pause_time);
+            setStyle(pauseValEl, 'color', '#ff4b2b');
+        } else {
+            setText(pauseValEl, '0');
+            setStyle(pauseValEl, 'color', '');
+        }
+    }
+
+    const pauseInfoBar = $id('pauseInfoBar');
+    if (!pauseInfoBar) return;
+    if (!pauseInfo) {
+        setStyle(pauseInfoBar, 'display', 'none');
+        return;
+    }
+    setStyle(pauseInfoBar, 'display', 'flex');
+    setText($id('predRemaining'), pauseInfo.remaining_before_pause);
+    if (pauseInfo.is_paused) {
+        setStyle($id('pauseTimerBox'), 'display', 'block');
+        setText($id('pauseTimerValue'), pauseInfo.remaining_pause_time);
+    } else {
+        setStyle($id('pauseTimerBox'), 'display', 'none');
+    }
 }
 
 function getSuitDisplay(suit) {
-    const t = TRANSLATIONS[currentLang] || TRANSLATIONS.fr;
+    const t = TRANSLATIONS[currentLang] || {};
     const displays = {
         '♠': `♠️ ${t.suit_spade || 'Pique'}`,
         '♥': `❤️ ${t.suit_heart || 'Cœur'}`,
@@ -64,77 +184,102 @@ function getSuitClass(suit) {
     return `suit-${suit === '♥' ? 'heart' : suit === '♦' ? 'diamond' : suit === '♣' ? 'club' : 'spade'}`;
 }
 
-function renderHistory(predictions) {
-    const grid = document.getElementById('historyGrid');
-    if (!grid) return;
-    
-    const t = TRANSLATIONS[currentLang] || TRANSLATIONS.fr;
+// Lignes affichées de l'historique en direct: game_number -> {tr, sig}
+const historyRows = new Map();
+let historyEmpty = false;
 
-    if (!predictions || predictions.length === 0) {
-        grid.innerHTML = `<p style="grid-column: 1/span 5; text-align: center; opacity: 0.5;">${t.no_history || 'Aucun historique'}</p>`;
-        return;
+// Ce que fillHistoryRow affiche: la ligne n'est réécrite que si cela change
+function historyRowSignature(p) {
+    const status = formatStatusForHistory(p.status, p.rattrapage);
+    return `${p.suit}|${p.result || '-'}|${status.class}${status.num}|${p.timestamp || p.created_at}`;
+}
+
+// Historique en direct, par clé: seules les lignes nouvelles ou modifiées
+// sont reconstruites, les autres sont au plus déplacées. Renvoie le nombre
+// de lignes touchées.
+function renderHistory(predictions) {
+    const tbody = $id('predictionsHistoryBody');
+    // Pages anciennes en consultation: la vue en direct attend
+    if (!tbody || historyCursor !== null) return 0;
+
+    const history = (predictions || []).slice(-HISTORY_SIZE).reverse();
+
+    if (history.length === 0) {
+        if (!historyEmpty) {
+            historyRows.clear();
+            tbody.innerHTML = `
+                <tr>
+                    <td colspan="5" class="history-empty">
+                        <div class="history-empty-icon">📭</div>
+                        Aucune prédiction dans l'historique
+                    </td>
+                </tr>
+            `;
+            historyEmpty = true;
+        }
+        return 0;
     }
 
-    // On prend les 10 dernières prédictions résolues (pas en attente)
-    const history = predictions.filter(p => p.status !== '⏳').slice(-10).reverse();
-    
-    let html = `
-        <div class="history-header">${t.game_no || 'JEU #'}</div>
-        <div class="history-header">${t.type || 'TYPE'}</div>
-        <div class="history-header">${t.result || 'RÉSULTAT'}</div>
-        <div class="history-header">${t.status || 'STATUT'}</div>
-        <div class="history-header">${t.date || 'DATE'}</div>
-    `;
+    // Premier rendu (ou après le message vide / les pages anciennes)
+    if (historyRows.size === 0) tbody.textContent = '';
+    historyEmpty = false;
+
+    let touched = 0;
+    const keep = new Set();
+    let cursor = tbody.firstChild;
+    for (const p of history) {
+        const key = p.game_number;
+        const sig = historyRowSignature(p);
+        let row = historyRows.get(key);
+        if (!row) {
+            row = { tr: buildHistoryRow(p), sig };
+            historyRows.set(key, row);
+            touched++;
+        } else if (row.sig !== sig) {
+            fillHistoryRow(row.tr, p);
+            row.sig = sig;
+            touched++;
+        }
+        keep.add(key);
+        if (row.tr === cursor) {
+            cursor = cursor.nextSibling;
+        } else {
+            tbody.insertBefore(row.tr, cursor);
+        }
+    }
 
-    history.forEach(p => {
-        const date = new Date(p.timestamp);
-        const timeStr = date.toLocaleTimeString('fr-FR', { hour: '2-digit', minute: '2-digit' });
-        const dateStr = date.toLocaleDateString('fr-FR', { day: '2-digit', month: '2-digit' });
-        
-        html += `
-            <div class="history-cell">#${p.game_number}</div>
-            <div class="history-cell">${p.suit}</div>
-            <div class="history-cell">-</div>
-            <div class="history-cell"><span class="status-badge">${p.status}</span></div>
-            <div class="history-cell" style="font-size: 0.8em;">${dateStr}<br>${timeStr}</div>
-        `;
-    });
-
-    grid.innerHTML = html;
+    for (const [key, row] of historyRows) {
+        if (!keep.has(key)) {
+            row.tr.remove();
+            historyRows.delete(key);
+            touched++;
+        }
+    }
+    return touched;
 }
 
 function updateActivePrediction(predictions) {
-    const t = TRANSLATIONS[currentLang] || TRANSLATIONS.fr;
+    const t = TRANSLATIONS[currentLang] || {};
     
     // Trouver la prédiction en attente (statut ⏳)
     const active = predictions.find(p => p.status === '⏳');
     
-    const activePredictionDiv = document.getElementById('activePrediction');
-    const largePredictionBox = document.getElementById('largePredictionBox');
-    const largePredNumber = document.getElementById('largePredNumber');
-    const largePredSuit = document.getElementById('largePredSuit');
-    const largePredStatus = document.getElementById('largePredStatus');
+    const largePredictionBox = $id('largePredictionBox');
     
-    const numberEl = document.getElementById('predNumber');
-    const suitEl = document.getElementById('predSuit');
-    const statusEl = document.getElementById('predStatus');
-    const timeEl = document.getElementById('predTime');
+    // Bloc standard (caché comme demandé pour ne voir que le live large)
+    setStyle($id('activePrediction'), 'display', 'none');
     
     if (!active) {
-        if (activePredictionDiv) activePredictionDiv.style.display = 'none';
-        if (largePredictionBox) largePredictionBox.style.display = 'none';
+        setStyle(largePredictionBox, 'display', 'none');
         return;
     }
     
-    // Bloc standard (caché comme demandé pour ne voir que le live large)
-    if (activePredictionDiv) activePredictionDiv.style.display = 'none';
-    
     // Nouveau Bloc Large - Affichage en temps réel
     if (largePredictionBox) {
-        largePredictionBox.style.display = 'block';
-        largePredNumber.textContent = `🎰 ${t.prediction || 'PRÉDICTION'} #${active.game_number}`;
-        largePredSuit.textContent = `🎯 ${t.suit_label || 'Couleur'}: ${getSuitDisplay(active.suit)}`;
-        largePredStatus.textContent = `📊 ${t.status_label || 'Statut'}: ${t.waiting_result || 'EN ATTENTE DU RÉSULTAT...'}`;
+        setStyle(largePredictionBox, 'display', 'block');
+        setText($id('largePredNumber'), `🎰 ${t.prediction || 'PRÉDICTION'} #${active.game_number}`);
+        setText($id('largePredSuit'), `🎯 ${t.suit_label || 'Couleur'}: ${getSuitDisplay(active.suit)}`);
+        setText($id('largePredStatus'), `📊 ${t.status_label || 'Statut'}: ${t.waiting_result || 'EN ATTENTE DU RÉSULTAT...'}`);
     }
 }
 
@@ -144,13 +289,12 @@ function startSubscriptionTimer() {
         return;
     }
     
+    const end = new Date(currentUser.subscription_end);
+    const timerDisplay = $id('timerDisplay');
+    const timerValue = $id('timerValue');
+    
     const updateTimer = () => {
-        const end = new Date(currentUser.subscription_end);
-        const now = new Date();
-        const diff = end - now;
-        
-        const timerDisplay = document.getElementById('timerDisplay');
-        const timerValue = document.getElementById('timerValue');
+        const diff = end - new Date();
         
         if (diff <= 0) {
             timerValue.textContent = '00:00:00';
@@ -198,64 +342,8 @@ async function fetchData() {
         }
         
         const data = await res.json();
-        
-        // Mettre à jour les stats
-        document.getElementById('winRateValue').textContent = data.win_rate + '%';
-        document.getElementById('wonValue').textContent = data.won_predictions;
-        document.getElementById('lostValue').textContent = data.lost_predictions;
-        
-        // Mise à jour des nouveaux compteurs (Préd. restantes et Pause)
-        if (data.pause_info) {
-            const predRemEl = document.getElementById('topWonCount');
-            const pauseValEl = document.getElementById('topLostCount');
-            
-            if (predRemEl) predRemEl.textContent = data.pause_info.remaining_before_pause;
-            
-            if (data.pause_info.is_paused) {
-                if (pauseValEl) {
-                    pauseValEl.textContent = data.pause_info.remaining_pause_time;
-                    pauseValEl.style.color = '#ff4b2b';
-                }
-            } else {
-                if (pauseValEl) {
-                    pauseValEl.textContent = "0";
-                    pauseValEl.style.color = '';
-                }
-            }
-        }
-        
-        document.getElementById('progressHeader').textContent = 
-            `${data.won_predictions + data.lost_predictions} / ${data.total_predictions}`;
-        
-        if (data.last_source_game) {
-            document.getElementById('sourceGameNumber').textContent = '#' + data.last_source_game;
-        }
-
-        // Update Pause Info
-        const pauseInfoBar = document.getElementById('pauseInfoBar');
-        if (pauseInfoBar) {
-            if (data.pause_info) {
-                pauseInfoBar.style.display = 'flex';
-                document.getElementById('predRemaining').textContent = data.pause_info.remaining_before_pause;
-                const pauseTimerBox = document.getElementById('pauseTimerBox');
-                const pauseTimerValue = document.getElementById('pauseTimerValue');
-                
-                if (data.pause_info.is_paused) {
-                    pauseTimerBox.style.display = 'block';
-                    pauseTimerValue.textContent = data.pause_info.remaining_pause_time;
-                } else {
-                    pauseTimerBox.style.display = 'none';
-                }
-            } else {
-                pauseInfoBar.style.display = 'none';
-            }
-        }
-        
-        // Mettre à jour la prédiction active
-        updateActivePrediction(data.predictions);
-        
-        // Rendre l'historique
-        renderHistory(data.predictions);
+        lastData = data;
+        renderDashboard(data);
         
     } catch (e) {
         console.error('Fetch error:', e);
@@ -283,9 +371,13 @@ function getSuitClassForHistory(suit) {
 }
 
 // Formater le statut comme admin (✅0, ✅1, ✅2, ❌)
-function formatStatusForHistory(status) {
+function formatStatusForHistory(status, rattrapage) {
     if (!status) return { text: '⏳', class: 'status-pending', num: '' };
 
+    // predictions_log: WON / LOST + numéro de rattrapage
+    if (status === 'WON') return { text: '', class: 'status-won', num: rattrapage ?? '' };
+    if (status === 'LOST') return { text: '', class: 'status-lost', num: '' };
+
     // Si c'est déjà un format ✅0, ✅1, etc.
     const match = status.match(/✅(\d)/);
     if (match) {
@@ -313,84 +405,85 @@ function formatStatusForHistory(status) {
     return { text: '⏳', class: 'status-pending', num: '' };
 }
 
-// 🔧 NOUVELLE FONCTION: Charger l'historique des 20 dernières prédictions
-async function loadPredictionHistory() {
-    try {
-        const res = await fetch('/api/predictions?limit=20');
-        if (res.ok) {
-            const data = await res.json();
-            const tbody = document.getElementById('predictionsHistoryBody');
-
-            if (!tbody) {
-                console.error('Element predictionsHistoryBody non trouvé');
-                return;
-            }
+// Formateurs créés une fois (toLocale*String en recrée un à chaque appel)
+const HISTORY_DATE_FORMAT = new Intl.DateTimeFormat('fr-FR', { day: '2-digit', month: '2-digit' });
+const HISTORY_TIME_FORMAT = new Intl.DateTimeFormat('fr-FR', { hour: '2-digit', minute: '2-digit' });
 
-            if (data.predictions && data.predictions.length > 0) {
-                tbody.innerHTML = '';
-
-                // Inverser pour avoir les plus récents en premier si besoin, 
-                // mais fetchData renvoie déjà l'historique dans l'ordre du state.
-                // On prend les 20 derniers.
-                const history = data.predictions.slice(-20).reverse();
-
-                history.forEach(p => {
-                    const tr = document.createElement('tr');
-
-                    // Formater le statut
-                    const status = formatStatusForHistory(p.status);
-
-                    // Formater le costume
-                    const suitClass = getSuitClassForHistory(p.suit);
-                    const suitSymbol = p.suit ? p.suit.charAt(0) : '-';
-
-                    // Formater la date
-                    const date = new Date(p.timestamp);
-                    const dateStr = date.toLocaleDateString('fr-FR', {
-                        day: '2-digit',
-                        month: '2-digit'
-                    });
-                    const timeStr = date.toLocaleTimeString('fr-FR', {
-                        hour: '2-digit',
-                        minute: '2-digit'
-                    });
-
-                    // Construire le badge de statut
-                    let statusBadge = '';
-                    if (status.class === 'status-won') {
-                        statusBadge = `<span class="status-badge ${status.class}">✅${status.num}</span>`;
-                    } else if (status.class === 'status-lost') {
-                        statusBadge = `<span class="status-badge ${status.class}">❌</span>`;
-                    } else {
-                        statusBadge = `<span class="status-badge ${status.class}">⏳</span>`;
-                    }
-
-                    tr.innerHTML = `
-                        <td class="game-number">#${p.game_number}</td>
-                        <td><span class="suit-symbol ${suitClass}">${suitSymbol}</span></td>
-                        <td>${p.result || '-'}</td>
-                        <td>${statusBadge}</td>
-                        <td class="date-cell">${dateStr}<br>${timeStr}</td>
-                    `;
-                    tbody.appendChild(tr);
-                });
-            } else {
-                tbody.innerHTML = `
-                    <tr>
-                        <td colspan="5" class="history-empty">
-                            <div class="history-empty-icon">📭</div>
-                            Aucune prédiction dans l'historique
-                        </td>
-                    </tr>
-                `;
-            }
+// Ligne du tableau d'historique (état du bot ou predictions_log)
+function buildHistoryRow(p) {
+    const tr = document.createElement('tr');
+    fillHistoryRow(tr, p);
+    return tr;
+}
+
+function fillHistoryRow(tr, p) {
+    // Formater le statut
+    const status = formatStatusForHistory(p.status, p.rattrapage);
+
+    // Formater le costume
+    const suitClass = getSuitClassForHistory(p.suit);
+    const suitSymbol = p.suit ? p.suit.charAt(0) : '-';
+
+    // Formater la date
+    const date = new Date(p.timestamp || p.created_at);
+    const dateStr = HISTORY_DATE_FORMAT.format(date);
+    const timeStr = HISTORY_TIME_FORMAT.format(date);
+
+    // Construire le badge de statut
+    let statusBadge = '';
+    if (status.class === 'status-won') {
+        statusBadge = `<span class="status-badge ${status.class}">✅${status.num}</span>`;
+    } else if (status.class === 'status-lost') {
+        statusBadge = `<span class="status-badge ${status.class}">❌</span>`;
+    } else {
+        statusBadge = `<span class="status-badge ${status.class}">⏳</span>`;
+    }
+
+    tr.innerHTML = `
+        <td class="game-number">#${p.game_number}</td>
+        <td><span class="suit-symbol ${suitClass}">${suitSymbol}</span></td>
+        <td>${p.result || '-'}</td>
+        <td>${statusBadge}</td>
+        <td class="date-cell">${dateStr}<br>${timeStr}</td>
+    `;
+}
+
+// Curseur de l'historique complet (null: pas encore chargé, '' : fin atteinte)
+let historyCursor = null;
+
+// Pages plus anciennes depuis /api/predictions/history (predictions_log)
+async function loadOlderHistory() {
+    if (historyCursor === '') return;
+    const btn = document.getElementById('olderHistoryBtn');
+    try {
+        const params = new URLSearchParams({limit: 20});
+        if (historyCursor) params.set('cursor', historyCursor);
+        const res = await fetch(`/api/predictions/history?${params}`);
+        if (!res.ok) return;
+        const data = await res.json();
+        const tbody = document.getElementById('predictionsHistoryBody');
+        if (!tbody) return;
+
+        // Première page: l'historique complet remplace la vue en direct
+        if (historyCursor === null) {
+            tbody.innerHTML = '';
+            historyRows.clear();
+            historyEmpty = false;
         }
+        data.items.forEach(p => tbody.appendChild(buildHistoryRow(p)));
+
+        historyCursor = data.next_cursor || '';
+        if (btn) btn.disabled = historyCursor === '';
     } catch (e) {
-        console.error('Erreur chargement historique:', e);
+        console.error('Erreur chargement historique complet:', e);
     }
 }
 
-// Gestionnaire de sélection de langue
-document.getElementById('langSelect')?.addEventListener('change', (e) => {
-    changeLang(e.target.value);
-});
+// Retour à l'historique en direct (bouton Rafraîchir): rendu depuis l'instantané
+function loadPredictionHistory() {
+    historyCursor = null;
+    const olderBtn = document.getElementById('olderHistoryBtn');
+    if (olderBtn) olderBtn.disabled = false;
+    renderedVersion = null;
+    return fetchData();
+}
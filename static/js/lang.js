@@ -1,545 +1,79 @@
 // ============================================
-// TRADUCTIONS - LANGUES
+// TRADUCTIONS - PAQUETS PAR LANGUE
 // ============================================
+// Les textes sont dans static/lang/<code>.json. La page embarque le
+// paquet de la langue préférée (registerTranslations, rendu par le
+// serveur); les autres sont chargés au premier changement de langue
+// depuis /lang/<code>.json?v=<version>, gardés en cache par le navigateur.
 
-const TRANSLATIONS = {
-    fr: {
-        title: 'Prédicteur Baccara',
-        role: 'Joueur',
-        win_rate: 'Win %',
-        disconnect: 'Déconnexion',
-        won: 'Gagnants',
-        lost: 'Perdus',
-        prediction: 'PRÉDICTION',
-        predict: 'Prédire',
-        clear: 'Effacer',
-        current_pred: 'PRÉDICTION EN COURS',
-        history: 'Historique',
-        export: 'Exporter Historique',
-        import: 'Importer Historique',
-        telegram: 'Rejoindre Telegram',
-        whatsapp: 'Rejoindre WhatsApp',
-        footer: 'Prédicteur Baccara',
-        flag: '🇫🇷',
-        login: 'Connexion',
-        register: 'Inscription',
-        email: 'Email',
-        password: 'Mot de passe',
-        first_name: 'Prénom',
-        last_name: 'Nom',
-        submit: 'Valider',
-        no_account: 'Pas de compte ? S\'inscrire',
-        has_account: 'Déjà un compte ? Se connecter',
-        subscription_expired: 'Abonnement expiré',
-        subscribe_message: 'Bonjour {name}, votre abonnement a expiré. Rechargez pour continuer à voir les prédictions.',
-        subscribe_now: 'S\'abonner maintenant',
-        time_remaining: 'Temps restant',
-        days: 'jours',
-        hours: 'heures',
-        minutes: 'minutes',
-        seconds: 'secondes',
-        admin_panel: 'Panneau Admin',
-        users_list: 'Liste des utilisateurs',
-        add_time: 'Ajouter du temps',
-        block: 'Bloquer',
-        time_added: 'Temps ajouté',
-        subscription_active: 'Abonnement actif',
-        suit_label: 'Couleur',
-        status_label: 'Statut',
-        waiting_result: 'EN ATTENTE DU RÉSULTAT...',
-        suit_spade: 'Pique',
-        suit_heart: 'Cœur',
-        suit_diamond: 'Carreau',
-        suit_club: 'Trèfle',
-        history_title: '🔮 Historique des Prédictions',
-        game_no: 'JEU #',
-        type: 'TYPE',
-        result: 'RÉSULTAT',
-        status: 'STATUT',
-        date: 'DATE',
-        no_history: 'Aucun historique',
-        prediction_count_label: 'Préd. restantes',
-        pause_label: 'Arrêt'
-    },
-    
-    en: {
-        title: 'Baccarat Predictor',
-        role: 'Player',
-        win_rate: 'Win %',
-        disconnect: 'Disconnect',
-        won: 'Won',
-        lost: 'Lost',
-        prediction: 'PREDICTION',
-        predict: 'Predict',
-        clear: 'Clear',
-        current_pred: 'CURRENT PREDICTION',
-        history: 'History',
-        export: 'Export History',
-        import: 'Import History',
-        telegram: 'Join Telegram',
-        whatsapp: 'Join WhatsApp',
-        footer: 'Baccarat Predictor',
-        flag: '🇬🇧',
-        login: 'Login',
-        register: 'Register',
-        email: 'Email',
-        password: 'Password',
-        first_name: 'First Name',
-        last_name: 'Last Name',
-        submit: 'Submit',
-        no_account: 'No account? Register',
-        has_account: 'Already have an account? Login',
-        subscription_expired: 'Subscription Expired',
-        subscribe_message: 'Hello {name}, your subscription has expired. Renew to continue viewing predictions.',
-        subscribe_now: 'Subscribe Now',
-        time_remaining: 'Time remaining',
-        days: 'days',
-        hours: 'hours',
-        minutes: 'minutes',
-        seconds: 'seconds',
-        admin_panel: 'Admin Panel',
-        users_list: 'Users List',
-        add_time: 'Add Time',
-        block: 'Block',
-        time_added: 'Time added',
-        subscription_active: 'Subscription active',
-        suit_label: 'Color',
-        status_label: 'Status',
-        waiting_result: 'WAITING FOR RESULT...',
-        suit_spade: 'Spades',
-        suit_heart: 'Hearts',
-        suit_diamond: 'Diamonds',
-        suit_club: 'Clubs',
-        history_title: '🔮 Prediction History',
-        game_no: 'GAME #',
-        type: 'TYPE',
-        result: 'RESULT',
-        status: 'STATUS',
-        date: 'DATE',
-        no_history: 'No history',
-        prediction_count_label: 'Rem. Pred.',
-        pause_label: 'Stop'
-    },
-    
-    es: {
-        title: 'Predictor Baccarat',
-        role: 'Jugador',
-        win_rate: '% Victoria',
-        disconnect: 'Desconectar',
-        won: 'Ganados',
-        lost: 'Perdidos',
-        predict: 'Predecir',
-        clear: 'Borrar',
-        current_pred: 'PREDICCIÓN ACTUAL',
-        history: 'Historial',
-        export: 'Exportar Historial',
-        import: 'Importar Historial',
-        telegram: 'Unirse a Telegram',
-        whatsapp: 'Unirse a WhatsApp',
-        footer: 'Predictor Baccarat',
-        flag: '🇪🇸',
-        login: 'Iniciar sesión',
-        register: 'Registrarse',
-        email: 'Correo',
-        password: 'Contraseña',
-        first_name: 'Nombre',
-        last_name: 'Apellido',
-        submit: 'Enviar',
-        no_account: '¿No tienes cuenta? Regístrate',
-        has_account: '¿Ya tienes cuenta? Inicia sesión',
-        subscription_expired: 'Suscripción expirada',
-        subscribe_message: 'Hola {name}, tu suscripción ha expirado. Renueva para continuar viendo predicciones.',
-        subscribe_now: 'Suscribirse ahora',
-        time_remaining: 'Tiempo restante',
-        days: 'días',
-        hours: 'horas',
-        minutes: 'minutos',
-        seconds: 'segundos',
-        admin_panel: 'Panel Admin',
-        users_list: 'Lista de usuarios',
-        add_time: 'Añadir tiempo',
-        block: 'Bloquear',
-        time_added: 'Tiempo añadido',
-        subscription_active: 'Suscripción activa',
-        suit_label: 'Color',
-        status_label: 'Estado',
-        waiting_result: 'ESPERANDO RESULTADO...',
-        suit_spade: 'Picas',
-        suit_heart: 'Corazones',
-        suit_diamond: 'Diamantes',
-        suit_club: 'Tréboles',
-        history_title: '🔮 Historial de Predicciones',
-        game_no: 'JUEGO #',
-        type: 'TIPO',
-        result: 'RESULTADO',
-        status: 'ESTADO',
-        date: 'FECHA',
-        no_history: 'Sin historial',
-        prediction_count_label: 'Pred. restantes',
-        pause_label: 'Parada'
-    },
-    
-    ru: {
-        title: 'Предсказатель Баккара',
-        role: 'Игрок',
-        win_rate: 'Побед %',
-        disconnect: 'Отключение',
-        won: 'Победы',
-        lost: 'Поражения',
-        predict: 'Предсказать',
-        clear: 'Очистить',
-        current_pred: 'ТЕКУЩЕЕ ПРЕДСКАЗАНИЕ',
-        history: 'История',
-        export: 'Экспорт истории',
-        import: 'Импорт истории',
-        telegram: 'Telegram',
-        whatsapp: 'WhatsApp',
-        footer: 'Предсказатель Баккара',
-        flag: '🇷🇺',
-        login: 'Вход',
-        register: 'Регистрация',
-        email: 'Email',
-        password: 'Пароль',
-        first_name: 'Имя',
-        last_name: 'Фамилия',
-        submit: 'Подтвердить',
-        no_account: 'Нет аккаунта? Зарегистрироваться',
-        has_account: 'Уже есть аккаунт? Войти',
-        subscription_expired: 'Подписка истекла',
-        subscribe_message: 'Привет {name}, ваша подписка истекла. Продлите для продолжения просмотра предсказаний.',
-        subscribe_now: 'Продлить подписку',
-        time_remaining: 'Осталось времени',
-        days: 'дней',
-        hours: 'часов',
-        minutes: 'минут',
-        seconds: 'секунд',
-        admin_panel: 'Панель админа',
-        users_list: 'Список пользователей',
-        add_time: 'Добавить время',
-        block: 'Заблокировать',
-        time_added: 'Время добавлено',
-        subscription_active: 'Подписка активна',
-        suit_label: 'Масть',
-        status_label: 'Статус',
-        waiting_result: 'ОЖИДАНИЕ РЕЗУЛЬТАТА...',
-        suit_spade: 'Пики',
-        suit_heart: 'Черви',
-        suit_diamond: 'Бубны',
-        suit_club: 'Трефы',
-        history_title: '🔮 История Предсказаний',
-        game_no: 'ИГРА #',
-        type: 'ТИП',
-        result: 'РЕЗУЛЬТАТ',
-        status: 'СТАТУС',
-        date: 'ДАТА',
-        no_history: 'Нет истории',
-        prediction_count_label: 'Пред. осталось',
-        pause_label: 'Стоп'
-    },
-    
-    de: {
-        title: 'Baccarat Vorhersage',
-        role: 'Spieler',
-        win_rate: 'Sieg %',
-        disconnect: 'Trennen',
-        won: 'Gewonnen',
-        lost: 'Verloren',
-        predict: 'Vorhersagen',
-        clear: 'Löschen',
-        current_pred: 'AKTUELLE VORHERSAGE',
-        history: 'Verlauf',
-        export: 'Verlauf exportieren',
-        import: 'Verlauf importieren',
-        telegram: 'Telegram beitreten',
-        whatsapp: 'WhatsApp beitreten',
-        footer: 'Baccarat Vorhersage',
-        flag: '🇩🇪',
-        login: 'Anmelden',
-        register: 'Registrieren',
-        email: 'Email',
-        password: 'Passwort',
-        first_name: 'Vorname',
-        last_name: 'Nachname',
-        submit: 'Bestätigen',
-        no_account: 'Kein Konto? Registrieren',
-        has_account: 'Bereits Konto? Anmelden',
-        subscription_expired: 'Abonnement abgelaufen',
-        subscribe_message: 'Hallo {name}, Ihr Abonnement ist abgelaufen. Erneuern Sie, um Vorhersagen weiterhin zu sehen.',
-        subscribe_now: 'Jetzt abonnieren',
-        time_remaining: 'Verbleibende Zeit',
-        days: 'Tage',
-        hours: 'Stunden',
-        minutes: 'Minuten',
-        seconds: 'Sekunden',
-        admin_panel: 'Admin-Bereich',
-        users_list: 'Benutzerliste',
-        add_time: 'Zeit hinzufügen',
-        block: 'Sperren',
-        time_added: 'Zeit hinzugefügt',
-        subscription_active: 'Abonnement aktiv',
-        suit_label: 'Farbe',
-        status_label: 'Status',
-        waiting_result: 'WARTE AUF ERGEBNIS...',
-        suit_spade: 'Pik',
-        suit_heart: 'Herz',
-        suit_diamond: 'Karo',
-        suit_club: 'Kreuz',
-        history_title: '🔮 Vorhersage-Verlauf',
-        game_no: 'SPIEL #',
-        type: 'TYP',
-        result: 'ERGEBNIS',
-        status: 'STATUS',
-        date: 'DATUM',
-        no_history: 'Kein Verlauf',
-        prediction_count_label: 'Verbl. Vorh.',
-        pause_label: 'Stopp'
-    },
-    
-    it: {
-        title: 'Predittore Baccarat',
-        role: 'Giocatore',
-        win_rate: '% Vittoria',
-        disconnect: 'Disconnetti',
-        won: 'Vinti',
-        lost: 'Persi',
-        predict: 'Predici',
-        clear: 'Cancella',
-        current_pred: 'PREDIZIONE CORRENTE',
-        history: 'Cronologia',
-        export: 'Esporta Cronologia',
-        import: 'Importa Cronologia',
-        telegram: 'Unisciti a Telegram',
-        whatsapp: 'Unisciti a WhatsApp',
-        footer: 'Predittore Baccarat',
-        flag: '🇮🇹',
-        login: 'Accedi',
-        register: 'Registrati',
-        email: 'Email',
-        password: 'Password',
-        first_name: 'Nome',
-        last_name: 'Cognome',
-        submit: 'Conferma',
-        no_account: 'Nessun account? Registrati',
-        has_account: 'Hai già un account? Accedi',
-        subscription_expired: 'Abbonamento scaduto',
-        subscribe_message: 'Ciao {name}, il tuo abbonamento è scaduto. Rinnova per continuare a vedere le previsioni.',
-        subscribe_now: 'Abbonati ora',
-        time_remaining: 'Tempo rimanente',
-        days: 'giorni',
-        hours: 'ore',
-        minutes: 'minuti',
-        seconds: 'secondi',
-        admin_panel: 'Pannello Admin',
-        users_list: 'Lista utenti',
-        add_time: 'Aggiungi tempo',
-        block: 'Blocca',
-        time_added: 'Tempo aggiunto',
-        subscription_active: 'Abbonamento attivo',
-        suit_label: 'Seme',
-        status_label: 'Stato',
-        waiting_result: 'IN ATTESA DEL RISULTATO...',
-        suit_spade: 'Picche',
-        suit_heart: 'Cuori',
-        suit_diamond: 'Quadri',
-        suit_club: 'Fiori',
-        history_title: '🔮 Cronologia Predizioni',
-        game_no: 'PARTITA #',
-        type: 'TIPO',
-        result: 'RISULTATO',
-        status: 'STATO',
-        date: 'DATA',
-        no_history: 'Nessuna cronologia',
-        prediction_count_label: 'Pred. rimanenti',
-        pause_label: 'Stop'
-    },
-    
-    pt: {
-        title: 'Preditor Baccarat',
-        role: 'Jogador',
-        win_rate: '% Vitória',
-        disconnect: 'Desconectar',
-        won: 'Ganhos',
-        lost: 'Perdidos',
-        predict: 'Prever',
-        clear: 'Limpar',
-        current_pred: 'PREVISÃO ATUAL',
-        history: 'Histórico',
-        export: 'Exportar Histórico',
-        import: 'Importar Histórico',
-        telegram: 'Entrar no Telegram',
-        whatsapp: 'Entrar no WhatsApp',
-        footer: 'Preditor Baccarat',
-        flag: '🇵🇹',
-        login: 'Entrar',
-        register: 'Cadastrar',
-        email: 'Email',
-        password: 'Senha',
-        first_name: 'Nome',
-        last_name: 'Sobrenome',
-        submit: 'Confirmar',
-        no_account: 'Sem conta? Cadastre-se',
-        has_account: 'Já tem conta? Entre',
-        subscription_expired: 'Assinatura expirada',
-        subscribe_message: 'Olá {name}, sua assinatura expirou. Renove para continuar vendo previsões.',
-        subscribe_now: 'Assinar agora',
-        time_remaining: 'Tempo restante',
-        days: 'dias',
-        hours: 'horas',
-        minutes: 'minutos',
-        seconds: 'segundos',
-        admin_panel: 'Painel Admin',
-        users_list: 'Lista de usuários',
-        add_time: 'Adicionar tempo',
-        block: 'Bloquear',
-        time_added: 'Tempo adicionado',
-        subscription_active: 'Assinatura ativa',
-        suit_label: 'Naipe',
-        status_label: 'Status',
-        waiting_result: 'AGUARDANDO RESULTADO...',
-        suit_spade: 'Espadas',
-        suit_heart: 'Copas',
-        suit_diamond: 'Ouros',
-        suit_club: 'Paus',
-        history_title: '🔮 Histórico de Previsões',
-        game_no: 'JOGO #',
-        type: 'TIPO',
-        result: 'RESULTADO',
-        status: 'STATUS',
-        date: 'DATA',
-        no_history: 'Sem histórico',
-        prediction_count_label: 'Pred. restantes',
-        pause_label: 'Parada'
-    },
-    
-    ar: {
-        title: 'تنبؤ الباكارات',
-        role: 'لاعب',
-        win_rate: 'نسبة الفوز %',
-        disconnect: 'قطع الاتصال',
-        won: 'فوز',
-        lost: 'خسارة',
-        predict: 'تنبؤ',
-        clear: 'مسح',
-        current_pred: 'التنبؤ الحالي',
-        history: 'السجل',
-        export: 'تصدير السجل',
-        import: 'استيراد السجل',
-        telegram: 'انضم إلى Telegram',
-        whatsapp: 'انضم إلى WhatsApp',
-        footer: 'تنبؤ الباكارات',
-        flag: '🇸🇦',
-        login: 'تسجيل الدخول',
-        register: 'إنشاء حساب',
-        email: 'البريد الإلكتروني',
-        password: 'كلمة المرور',
-        first_name: 'الاسم الأول',
-        last_name: 'اسم العائلة',
-        submit: 'تأكيد',
-        no_account: 'ليس لديك حساب؟ سجل الآن',
-        has_account: 'لديك حساب بالفعل؟ سجل دخول',
-        subscription_expired: 'انتهى الاشتراك',
-        subscribe_message: 'مرحباً {name}، انتهى اشتراكك. جدد للاستمرار في مشاهدة التنبؤات.',
-        subscribe_now: 'جدد الاشتراك الآن',
-        time_remaining: 'الوقت المتبقي',
-        days: 'أيام',
-        hours: 'ساعات',
-        minutes: 'دقائق',
-        seconds: 'ثواني',
-        admin_panel: 'لوحة التحكم',
-        users_list: 'قائمة المستخدمين',
-        add_time: 'إضافة وقت',
-        block: 'حظر',
-        time_added: 'تم إضافة الوقت',
-        subscription_active: 'الاشتراك نشط',
-        suit_label: 'الشكل',
-        status_label: 'الحالة',
-        waiting_result: 'في انتظار النتيجة...',
-        suit_spade: 'بيك',
-        suit_heart: 'قلب',
-        suit_diamond: 'ديمون',
-        suit_club: 'كلو',
-        history_title: '🔮 سجل التنبؤات',
-        game_no: 'لعبة #',
-        type: 'النوع',
-        result: 'النتيجة',
-        status: 'الحالة',
-        date: 'التاريخ',
-        no_history: 'لا يوجد سجل',
-        prediction_count_label: 'التنبؤات المتبقية',
-        pause_label: 'توقف'
-    },
-    
-    zh: {
-        title: '百家乐预测器',
-        role: '玩家',
-        win_rate: '胜率 %',
-        disconnect: '断开连接',
-        won: '赢',
-        lost: '输',
-        predict: '预测',
-        clear: '清除',
-        current_pred: '当前预测',
-        history: '历史记录',
-        export: '导出历史',
-        import: '导入历史',
-        telegram: '加入 Telegram',
-        whatsapp: '加入 WhatsApp',
-        footer: '百家乐预测器',
-        flag: '🇨🇳',
-        login: '登录',
-        register: '注册',
-        email: '邮箱',
-        password: '密码',
-        first_name: '名',
-        last_name: '姓',
-        submit: '确认',
-        no_account: '没有账户？注册',
-        has_account: '已有账户？登录',
-        subscription_expired: '订阅已过期',
-        subscribe_message: '您好 {name}，您的订阅已过期。续订以继续查看预测。',
-        subscribe_now: '立即订阅',
-        time_remaining: '剩余时间',
-        days: '天',
-        hours: '小时',
-        minutes: '分钟',
-        seconds: '秒',
-        admin_panel: '管理面板',
-        users_list: '用户列表',
-        add_time: '添加时间',
-        block: '封锁',
-        time_added: '时间已添加',
-        subscription_active: '订阅有效',
-        suit_label: '花色',
-        status_label: '状态',
-        waiting_result: '等待结果中...',
-        suit_spade: '黑桃',
-        suit_heart: '红桃',
-        suit_diamond: '方块',
-        suit_club: '梅花',
-        history_title: '🔮 预测历史',
-        game_no: '游戏 #',
-        type: '类型',
-        result: '结果',
-        status: '状态',
-        date: '日期',
-        no_history: '无历史记录',
-        prediction_count_label: '剩余预测',
-        pause_label: '暂停'
+const TRANSLATIONS = {};
+let AVAILABLE_LANGS = ['fr'];
+let LANG_VERSION = '';
+const pendingTranslations = {};
+
+function registerTranslations(lang, bundle, version, langs) {
+    TRANSLATIONS[lang] = bundle;
+    if (version) LANG_VERSION = version;
+    if (langs) AVAILABLE_LANGS = langs;
+}
+
+// Paquet d'une langue: déjà en mémoire, sinon cache HTTP / réseau
+function loadTranslations(lang) {
+    if (TRANSLATIONS[lang]) return Promise.resolve(TRANSLATIONS[lang]);
+    if (!pendingTranslations[lang]) {
+        pendingTranslations[lang] = fetch(`/lang/${lang}.json?v=${LANG_VERSION}`)
+            .then(res => {
+                if (!res.ok) throw new Error(`HTTP ${res.status}`);
+                return res.json();
+            })
+            .then(bundle => (TRANSLATIONS[lang] = bundle))
+            .finally(() => { delete pendingTranslations[lang]; });
+    }
+    return pendingTranslations[lang];
+}
+
+// Nœuds [data-translate] indexés une seule fois par clé
+let translateIndex = null;
+let appliedLang = null;
+
+// N'écrit que les textes qui changent par rapport à la langue affichée
+function applyTranslations(lang) {
+    const t = TRANSLATIONS[lang];
+    if (!t) return 0;
+    if (!translateIndex) {
+        translateIndex = new Map();
+        document.querySelectorAll('[data-translate]').forEach(el => {
+            const key = el.dataset.translate;
+            if (!translateIndex.has(key)) translateIndex.set(key, []);
+            translateIndex.get(key).push(el);
+        });
     }
-};
+    const previous = appliedLang && TRANSLATIONS[appliedLang];
+    let written = 0;
+    translateIndex.forEach((elements, key) => {
+        const text = t[key];
+        if (!text || (previous && previous[key] === text)) return;
+        elements.forEach(el => {
+            if (el.textContent !== text) {
+                el.textContent = text;
+                written++;
+            }
+        });
+    });
+    appliedLang = lang;
+    return written;
+}
 
 // Fonction utilitaire pour obtenir une traduction
 function getTranslation(key, lang = 'fr', replacements = {}) {
-    const translation = TRANSLATIONS[lang] || TRANSLATIONS.fr;
-    let text = translation[key] || TRANSLATIONS.fr[key] || key;
-    
+    const fallback = TRANSLATIONS.fr || {};
+    const translation = TRANSLATIONS[lang] || fallback;
+    let text = translation[key] || fallback[key] || key;
+
     // Remplacer les variables {name}, etc.
     Object.keys(replacements).forEach(key => {
         text = text.replace(`{${key}}`, replacements[key]);
     });
-    
+
     return text;
 }
-
-// Liste des langues disponibles
-const AVAILABLE_LANGS = Object.keys(TRANSLATIONS);
@@ -0,0 +1,136 @@
+"""
+Opérations groupées sur les abonnements (tableau de bord admin, bot admin)
+
+Prolonger, bloquer ou débloquer des centaines d'utilisateurs en une
+requête: la liste vient d'emails saisis, d'un filtre (actifs, expirant
+sous N jours, expirés, bloqués, tous) ou d'un fichier CSV
+(email[,jours] par ligne, en-tête facultatif). Tout est appliqué par
+database.bulk_update_users, en une seule transaction ensembliste, avec
+un résultat par utilisateur.
+"""
+import re
+import csv
+import io
+import asyncio
+import logging
+
+from database import BULK_ACTIONS, USER_FILTERS
+
+logger = logging.getLogger(__name__)
+
+MAX_TARGETS = 5000
+MAX_DAYS = 3650
+EMAIL_RE = re.compile(r'^[^@\s,;]+@[^@\s,;]+\.[^@\s,;]+$')
+
+
+class BulkRequestError(ValueError):
+    """Demande invalide (renvoyée en 400 par le serveur web)"""
+
+
+def _days(value) -> int:
+    try:
+        days = int(value)
+    except (TypeError, ValueError):
+        raise BulkRequestError('invalid_days')
+    if not 0 < days <= MAX_DAYS:
+        raise BulkRequestError('invalid_days')
+    return days
+
+
+def split_emails(text: str) -> list:
+    """Emails séparés par des espaces, virgules, points-virgules ou retours à la ligne"""
+    return [e for e in re.split(r'[\s,;]+', text or '') if e]
+
+
+def parse_csv(text: str, default_days=None):
+    """Lignes email[,jours] -> (emails, jours par email ou None, lignes invalides)"""
+    emails, days, invalid = [], [], []
+    for row in csv.reader(io.StringIO(text)):
+        cells = [cell.strip() for cell in row]
+        if not cells or not cells[0]:
+            continue
+        if not EMAIL_RE.match(cells[0]):
+            # En-tête ("email,jours") ou ligne mal formée
+            if cells[0].lower() not in ('email', 'e-mail', 'mail'):
+                invalid.append(cells[0])
+            continue
+        emails.append(cells[0])
+        days.append(_days(cells[1]) if len(cells) > 1 and cells[1] else default_days)
+    return emails, days, invalid
+
+
+def build_request(action: str, days=None, emails=None, csv_text: str = None,
+                  user_filter: str = None, within_days=7) -> dict:
+    """Valide une demande -> arguments de run()"""
+    action = (action or '').lower()
+    if action not in BULK_ACTIONS:
+        raise BulkRequestError('invalid_action')
+    default_days = _days(days) if action == 'extend' and days not in (None, '') else None
+    if action == 'extend' and default_days is None and csv_text is None:
+        raise BulkRequestError('invalid_days')
+
+    request = {'action': action, 'days': default_days or 0, 'invalid': []}
+    if csv_text is not None:
+        targets, per_user, request['invalid'] = parse_csv(csv_text, default_days)
+        if action == 'extend':
+            if None in per_user:
+                raise BulkRequestError('missing_days')
+            request['days'] = per_user
+    elif emails is not None:
+        if isinstance(emails, str):
+            emails = split_emails(emails)
+        targets = []
+        for email in emails:
+            (targets if EMAIL_RE.match(email) else request['invalid']).append(email)
+    elif user_filter:
+        if user_filter not in USER_FILTERS:
+            raise BulkRequestError('invalid_filter')
+        request.update(user_filter=user_filter, within_days=_days(within_days))
+        return request
+    else:
+        raise BulkRequestError('no_targets')
+
+    # Emails normalisés, chaque utilisateur une seule fois (la dernière ligne l'emporte)
+    merged = {}
+    per_user = request['days'] if isinstance(request['days'], list) else None
+    for index, email in enumerate(targets):
+        email = email.lower()
+        merged.pop(email, None)
+        merged[email] = per_user[index] if per_user else None
+    if not merged:
+        raise BulkRequestError('no_targets')
+    if len(merged) > MAX_TARGETS:
+        raise BulkRequestError('too_many_targets')
+    request['emails'] = list(merged)
+    if per_user:
+        request['days'] = list(merged.values())
+    return request
+
+
+async def run(request: dict) -> dict:
+    """Applique la demande (thread, une transaction) et résume le résultat"""
+    from database import bulk_update_users
+    invalid = request['invalid']
+    args = {k: v for k, v in request.items() if k != 'invalid'}
+    rows = await asyncio.to_thread(bulk_update_users, **args)
+
+    results = [{
+        'email': row['email'],
+        'status': 'ok' if row['id'] is not None else 'not_found',
+        'user_id': row['id'],
+        'subscription_end': row['subscription_end'].isoformat() if row['subscription_end'] else None,
+        'is_active': row['is_active'],
+        'telegram_id': row['telegram_id'],
+    } for row in rows]
+    results.extend({'email': email, 'status': 'invalid'} for email in invalid)
+
+    summary = {
+        'action': request['action'],
+        'updated': sum(r['status'] == 'ok' for r in results),
+        'not_found': sum(r['status'] == 'not_found' for r in results),
+        'invalid': len(invalid),
+        'results': results,
+    }
+    logger.info(f"👥 Opération groupée {summary['action']}: {summary['updated']} mis à jour, "
+                f"{summary['not_found']} inconnus, {summary['invalid']} invalides")
+    return summary
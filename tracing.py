@@ -0,0 +1,170 @@
+"""
+Traçage de bout en bout: message source -> prédiction publiée
+
+Une trace (Trace) est créée à la réception d'un message du canal source,
+voyage avec la mise à jour dans la file d'ingestion, puis est rattachée
+au contexte du worker (attach) et propagée par contextvars (aucune
+signature à modifier). Chaque étape
+(handle_message, process_source_message, check_and_launch_prediction,
+send_prediction_to_channel, update_prediction_status, log DB) ouvre un
+span. Les traces qui aboutissent à une publication ("prediction") ou à
+une édition de statut ("result") alimentent des fenêtres glissantes d'où
+sont tirés les percentiles.
+"""
+import time
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import metrics
+
+WINDOW_SIZE = 500
+
+_current = contextvars.ContextVar('trace', default=None)
+
+# (issue, étape) -> durées récentes en ms
+_windows = {}
+_recent = deque(maxlen=50)
+
+PIPELINE_SECONDS = metrics.histogram(
+    'bot_pipeline_seconds',
+    'Latence message source -> publication (prediction) ou édition (result)',
+    ('outcome',)
+)
+
+
+class Trace:
+    __slots__ = ('game', 'message_time', 'received_wall', 'start', 'spans', 'outcome')
+
+    def __init__(self, message_time=None):
+        self.game = None
+        self.message_time = message_time
+        self.received_wall = datetime.now(timezone.utc)
+        self.start = time.perf_counter()
+        self.spans = []
+        self.outcome = None
+
+    def to_dict(self) -> dict:
+        return {
+            'game': self.game,
+            'outcome': self.outcome,
+            'message_time': self.message_time.isoformat() if self.message_time else None,
+            'received': self.received_wall.isoformat(),
+            'telegram_delay_ms': _telegram_delay_ms(self),
+            'spans': [{'name': n, 'start_ms': round(s, 2), 'duration_ms': round(d, 2)}
+                      for n, s, d in self.spans],
+        }
+
+
+def _telegram_delay_ms(trace):
+    """Écart horodatage Telegram -> réception (résolution 1 s côté Telegram)"""
+    if trace.message_time is None:
+        return None
+    msg_time = trace.message_time
+    if msg_time.tzinfo is None:
+        msg_time = msg_time.replace(tzinfo=timezone.utc)
+    return max(0, round((trace.received_wall - msg_time).total_seconds() * 1000))
+
+
+def attach(trace):
+    """Reprend une trace ouverte ailleurs (worker d'ingestion); jeton pour finish_trace"""
+    return _current.set(trace)
+
+
+def record_span(name: str, begin: float, end: float = None):
+    """Ajoute une étape déjà écoulée (bornes perf_counter), ex. l'attente en file"""
+    trace = _current.get()
+    if trace is None:
+        return
+    end = time.perf_counter() if end is None else end
+    trace.spans.append((name, (begin - trace.start) * 1000, (end - begin) * 1000))
+
+
+def current():
+    return _current.get()
+
+
+@contextmanager
+def span(name: str):
+    """Mesure une étape de la trace courante (no-op s'il n'y en a pas)"""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    begin = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        trace.spans.append((name, (begin - trace.start) * 1000, (end - begin) * 1000))
+
+
+def set_game(game_number):
+    trace = _current.get()
+    if trace is not None:
+        trace.game = game_number
+
+
+def mark_outcome(outcome: str):
+    """'prediction' (publication) ou 'result' (édition de statut)"""
+    trace = _current.get()
+    if trace is not None:
+        trace.outcome = outcome
+
+
+def finish_trace(token) -> bool:
+    """Ferme la trace et l'agrège si elle a produit une publication/édition (vrai dans ce cas)"""
+    trace = _current.get()
+    _current.reset(token)
+    if trace is None or trace.outcome is None:
+        return False
+    total_ms = (time.perf_counter() - trace.start) * 1000
+    _observe(trace.outcome, 'total', total_ms)
+    delay = _telegram_delay_ms(trace)
+    if delay is not None:
+        _observe(trace.outcome, 'telegram_delay', delay)
+        _observe(trace.outcome, 'end_to_end', delay + total_ms)
+    for name, _, duration in trace.spans:
+        _observe(trace.outcome, name, duration)
+    PIPELINE_SECONDS.labels(trace.outcome).observe(total_ms / 1000)
+    _recent.append(trace)
+    return True
+
+
+def _observe(outcome, stage, value_ms):
+    window = _windows.get((outcome, stage))
+    if window is None:
+        window = _windows[(outcome, stage)] = deque(maxlen=WINDOW_SIZE)
+    window.append(value_ms)
+
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    idx = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return round(sorted_values[idx], 2)
+
+
+def summary() -> dict:
+    """Percentiles par issue et par étape sur les WINDOW_SIZE dernières traces"""
+    result = {}
+    for (outcome, stage), window in list(_windows.items()):
+        values = sorted(window)
+        result.setdefault(outcome, {})[stage] = {
+            'count': len(values),
+            'p50': _percentile(values, 0.50),
+            'p95': _percentile(values, 0.95),
+            'p99': _percentile(values, 0.99),
+            'max': round(values[-1], 2) if values else None,
+        }
+    return result
+
+
+def recent_traces(limit: int = 20) -> list:
+    return [t.to_dict() for t in list(_recent)[-limit:]]
+
+
+def reset():
+    _windows.clear()
+    _recent.clear()
@@ -0,0 +1,63 @@
+"""
+Traductions du tableau de bord: un paquet JSON par langue (static/lang/<code>.json)
+
+La page principale embarque le paquet de la langue préférée (cookie
+`lang`, sinon Accept-Language, sinon le français); les autres ne sont
+téléchargés qu'au changement de langue, depuis /lang/<code>.json?v=VERSION.
+VERSION est une empreinte de tous les paquets: l'URL change à chaque
+modification, le navigateur peut donc les garder indéfiniment.
+"""
+import os
+import json
+import hashlib
+
+LANG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'lang')
+DEFAULT_LANG = 'fr'
+# Ordre du sélecteur de langue
+LANGS = ('fr', 'en', 'es', 'ru', 'de', 'it', 'pt', 'ar', 'zh')
+
+_bundles = {}  # code -> (dict, octets JSON compacts)
+
+
+def _load():
+    digest = hashlib.blake2b(digest_size=8)
+    for lang in LANGS:
+        with open(os.path.join(LANG_DIR, f"{lang}.json"), encoding='utf-8') as f:
+            data = json.load(f)
+        body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode()
+        _bundles[lang] = (data, body)
+        digest.update(body)
+    return digest.hexdigest()
+
+
+VERSION = _load()
+
+
+def bundle(lang: str) -> dict:
+    return _bundles[lang][0]
+
+
+def bundle_bytes(lang: str) -> bytes:
+    return _bundles[lang][1]
+
+
+def negotiate(cookie_lang: str = None, accept_language: str = None) -> str:
+    """Langue à embarquer dans la page: cookie, puis Accept-Language (q-values), puis défaut"""
+    if cookie_lang in _bundles:
+        return cookie_lang
+    best, best_q = DEFAULT_LANG, 0.0
+    for item in (accept_language or '').split(','):
+        name, _, params = item.strip().partition(';')
+        code = name.strip().lower().split('-')[0]
+        if code not in _bundles:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if q > best_q:
+            best, best_q = code, q
+    return best
@@ -1,22 +1,31 @@
 """
 Serveur web aiohttp
 """
+import os
 import json
+import math
+import time
+import mimetypes
+import asyncio
 import logging
 from aiohttp import web
 from jinja2 import Environment, FileSystemLoader, select_autoescape
 from datetime import datetime
-from telethon import events
 
 from database import (
-    add_subscription_time, get_all_users, block_user, 
-    unblock_user, get_user_by_email
+    get_all_users, block_user, unblock_user, bulk_update_users
 )
 from auth import (
     register_user, login_user, check_session, logout_user,
     check_admin_credentials, has_active_subscription
 )
 from config import ADMIN_ID
+from admin_commands import handle_admin_commands, get_win_rate
+import metrics
+import ratelimit
+import compression
+import translations
+from pause import PAUSE_EVERY
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +33,9 @@ logger = logging.getLogger(__name__)
 bot_client = None
 admin_bot_client = None
 
+# État du démarrage (fourni par main.py, exposé sur /ready)
+startup_status = {'components': {}, 'timings_ms': {}}
+
 env = Environment(
     loader=FileSystemLoader('templates'),
     autoescape=select_autoescape(['html', 'xml'])
@@ -33,9 +45,23 @@ def render_template(template_name, **context):
     template = env.get_template(template_name)
     return template.render(**context)
 
+async def send_telegram_message(chat_id, text):
+    """Envoie via le client admin, ou via l'API HTTP Bot (rôle web sans Telethon)"""
+    if admin_bot_client:
+        await admin_bot_client.send_message(chat_id, text)
+        return
+    
+    from config import BOT_TOKEN
+    from aiohttp import ClientSession, ClientTimeout
+    async with ClientSession(timeout=ClientTimeout(total=10)) as http:
+        async with http.post(f"https://api.telegram.org/bot{BOT_TOKEN}/sendMessage",
+                             json={'chat_id': chat_id, 'text': text}) as resp:
+            if resp.status != 200:
+                raise RuntimeError(f"Bot API {resp.status}: {await resp.text()}")
+
 async def notify_admin_new_user(user):
     """Envoie notification à l'admin via Telegram"""
-    if not admin_bot_client or not ADMIN_ID:
+    if not ADMIN_ID:
         logger.warning("⚠️ Pas de bot admin configuré pour notification")
         return False
     
@@ -51,7 +77,7 @@ async def notify_admin_new_user(user):
 • /add_time {user['email']} 30
 • /block {user['email']}"""
         
-        await admin_bot_client.send_message(int(ADMIN_ID), msg)
+        await send_telegram_message(int(ADMIN_ID), msg)
         logger.info(f"✅ Notification envoyée à l'admin pour {user['email']}")
         return True
         
@@ -75,11 +101,26 @@ async def index(request):
             content_type='text/html'
         )
     
+    # Langue préférée embarquée dans la page: pas de requête de traduction au chargement
+    lang = translations.negotiate(request.cookies.get('lang'), request.headers.get('Accept-Language'))
     return web.Response(
-        text=render_template('index.html', user=session, lang='fr'),
+        text=render_template('index.html', user=session, lang=lang,
+                             translations=translations.bundle(lang),
+                             langs=translations.LANGS, lang_version=translations.VERSION),
         content_type='text/html'
     )
 
+async def lang_bundle(request):
+    """Paquet de traductions d'une langue, gardé par le navigateur si l'URL est versionnée"""
+    lang = request.match_info['lang']
+    if lang not in translations.LANGS:
+        raise web.HTTPNotFound()
+    response = web.Response(body=translations.bundle_bytes(lang),
+                            content_type='application/json', charset='utf-8')
+    if request.query.get('v') == translations.VERSION:
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
 async def login_page(request):
     return web.Response(
         text=render_template('login.html'),
@@ -156,36 +197,29 @@ async def api_predictions(request):
     if not session or not has_active_subscription(session):
         return web.json_response({'error': 'unauthorized'}, status=401)
     
-    from bot_logic import state as bot_state
-    from database import get_prediction_stats
+    import shared_state
+    
+    snapshot = await shared_state.read_snapshot()
+    if snapshot is None:
+        return web.json_response({'error': 'bot_state_unavailable'}, status=503)
     
-    won, lost = get_prediction_stats()
+    won = snapshot['won_predictions']
+    lost = snapshot['lost_predictions']
     
-    # Pause info
+    # Pause info (fin en epoch publiée par le scheduler de pause du bot)
     pause_info = None
-    if bot_state.pause_config:
+    pause = snapshot['pause']
+    if pause:
         # Préd. restantes: On veut afficher X/5
-        rem_count = 5 - bot_state.pause_config['predictions_count']
-        remaining_before_pause = f"{rem_count}/5"
-        
-        is_paused = bot_state.pause_config['is_paused']
-        remaining_pause_time = "0"
+        remaining_before_pause = f"{PAUSE_EVERY - pause['predictions_count']}/{PAUSE_EVERY}"
         
-        if is_paused and bot_state.pause_config['pause_end_time']:
-            try:
-                end_time = datetime.fromisoformat(bot_state.pause_config['pause_end_time'])
-                diff = end_time - datetime.now()
-                if diff.total_seconds() > 0:
-                    remaining_pause_time = str(int(diff.total_seconds()))
-                else:
-                    is_paused = False
-            except:
-                pass
+        remaining = pause['ends_at'] - time.time() if pause['is_paused'] and pause.get('ends_at') else 0
+        is_paused = remaining > 0
         
         pause_info = {
             'remaining_before_pause': remaining_before_pause,
             'is_paused': is_paused,
-            'remaining_pause_time': remaining_pause_time
+            'remaining_pause_time': str(int(remaining)) if is_paused else "0"
         }
     
     sub_end = session.get('subscription_end')
@@ -197,13 +231,15 @@ async def api_predictions(request):
         sub_end_str = str(sub_end) if sub_end else None
     
     data = {
-        'predictions': list(bot_state.prediction_history),
+        # Version de l'instantané: app.js saute le rendu si elle n'a pas changé
+        'version': snapshot['version'],
+        'predictions': snapshot['predictions'],
         'total_predictions': won + lost,
         'won_predictions': won,
         'lost_predictions': lost,
         'win_rate': round((won / (won + lost) * 100), 1) if (won + lost) > 0 else 0,
-        'current_game': bot_state.current_game_number or bot_state.last_source_game_number,
-        'last_source_game': bot_state.last_source_game_number,
+        'current_game': snapshot['current_game_number'] or snapshot['last_source_game_number'],
+        'last_source_game': snapshot['last_source_game_number'],
         'pause_info': pause_info,
         'user': {
             'first_name': session['first_name'],
@@ -213,15 +249,24 @@ async def api_predictions(request):
     }
     return web.json_response(data)
 
-def get_win_rate():
-    from bot_logic import state as bot_state
-    finished = bot_state.won_predictions + bot_state.lost_predictions
-    if finished == 0:
-        return 0
-    return round((bot_state.won_predictions / finished) * 100, 1)
-
 # ============ ADMIN ROUTES ============
 
+async def api_predictions_history(request):
+    """Historique complet (predictions_log), paginé par curseur"""
+    session_id = request.cookies.get('session_id')
+    session = await check_session(session_id) if session_id else None
+    
+    if not session or not has_active_subscription(session):
+        return web.json_response({'error': 'unauthorized'}, status=401)
+    
+    import history
+    try:
+        params = history.parse_query(request.query)
+    except history.HistoryQueryError as e:
+        return web.json_response({'error': str(e)}, status=400)
+    
+    return web.json_response(await history.get_page(params))
+
 async def admin_login_page(request):
     return web.Response(
         text=render_template('admin_login.html'),
@@ -261,19 +306,21 @@ async def api_admin_add_time(request):
         return web.json_response({'error': 'unauthorized'}, status=401)
     
     data = await request.json()
-    email = data.get('email')
+    email = (data.get('email') or '').lower()
     days = int(data.get('days', 0))
     
-    user = get_user_by_email(email)
-    if not user:
+    # Recherche et prolongation en une seule requête
+    rows = await asyncio.to_thread(bulk_update_users, 'extend', emails=[email], days=days)
+    user = rows[0] if rows else None
+    if not user or user['id'] is None:
         return web.json_response({'error': 'user_not_found'}, status=404)
     
-    new_end = add_subscription_time(user['id'], days)
+    new_end = user['subscription_end']
     
     # Notifier l'utilisateur si possible
-    if admin_bot_client and user.get('telegram_id'):
+    if user.get('telegram_id'):
         try:
-            await admin_bot_client.send_message(
+            await send_telegram_message(
                 user['telegram_id'],
                 f"✅ {days} jours ajoutés à votre abonnement!\nNouvelle expiration: {new_end.strftime('%d/%m/%Y')}"
             )
@@ -285,6 +332,35 @@ async def api_admin_add_time(request):
         'new_end': new_end.isoformat() if new_end else None
     })
 
+async def api_admin_bulk_subscriptions(request):
+    """Prolonge / bloque / débloque plusieurs abonnés en une transaction
+    
+    JSON: action, days, puis emails (liste ou texte), filter (+ within_days) ou csv;
+    ou formulaire multipart avec un fichier CSV dans le champ "file".
+    """
+    if not request.cookies.get('admin_session'):
+        return web.json_response({'error': 'unauthorized'}, status=401)
+    
+    import subscriptions
+    if request.content_type == 'multipart/form-data':
+        form = await request.post()
+        upload = form.get('file')
+        data = dict(form)
+        data['csv'] = upload.file.read().decode('utf-8-sig') if hasattr(upload, 'file') else None
+    else:
+        data = await request.json()
+    
+    try:
+        bulk = subscriptions.build_request(
+            data.get('action'), days=data.get('days'), emails=data.get('emails'),
+            csv_text=data.get('csv'), user_filter=data.get('filter'),
+            within_days=data.get('within_days', 7)
+        )
+    except subscriptions.BulkRequestError as e:
+        return web.json_response({'error': str(e)}, status=400)
+    
+    return web.json_response(await subscriptions.run(bulk))
+
 async def api_admin_block(request):
     if not request.cookies.get('admin_session'):
         return web.json_response({'error': 'unauthorized'}, status=401)
@@ -300,6 +376,96 @@ async def api_admin_block(request):
     
     return web.json_response({'success': True})
 
+async def api_admin_broadcasts(request):
+    """Liste des diffusions (GET) / nouvelle diffusion (POST: text, audience)"""
+    if not request.cookies.get('admin_session'):
+        return web.json_response({'error': 'unauthorized'}, status=401)
+    
+    from database import create_broadcast, list_broadcasts, BROADCAST_AUDIENCES
+    from broadcast import broadcaster
+    dumps = lambda data: json.dumps(data, default=str)
+    
+    if request.method == 'POST':
+        data = await request.json()
+        text = (data.get('text') or '').strip()
+        audience = data.get('audience', 'subscribers')
+        if not text or len(text) > 4096:
+            return web.json_response({'error': 'invalid_text'}, status=400)
+        if audience not in BROADCAST_AUDIENCES:
+            return web.json_response({'error': 'invalid_audience'}, status=400)
+        row = await asyncio.to_thread(create_broadcast, text, audience)
+        # Rôle "all": le bot est dans ce process (sinon il reçoit le NOTIFY)
+        broadcaster.start(row)
+        return web.json_response(row, dumps=dumps)
+    
+    limit = min(int(request.query.get('limit', 20)), 100)
+    return web.json_response({
+        'broadcasts': await asyncio.to_thread(list_broadcasts, limit),
+        'runner': broadcaster.snapshot() if broadcaster.client else None
+    }, dumps=dumps)
+
+async def api_admin_broadcast_cancel(request):
+    if not request.cookies.get('admin_session'):
+        return web.json_response({'error': 'unauthorized'}, status=401)
+    
+    from database import finish_broadcast
+    from broadcast import broadcaster
+    broadcast_id = int(request.match_info['broadcast_id'])
+    if not await asyncio.to_thread(finish_broadcast, broadcast_id, 'cancelled'):
+        return web.json_response({'error': 'not_running'}, status=404)
+    broadcaster.cancel(broadcast_id)
+    return web.json_response({'success': True})
+
+async def api_admin_loop_health(request):
+    """Santé de la boucle asyncio (GET) / configuration à chaud (POST)"""
+    if not request.cookies.get('admin_session'):
+        return web.json_response({'error': 'unauthorized'}, status=401)
+    
+    from loop_monitor import monitor
+    
+    if request.method == 'POST':
+        data = await request.json()
+        try:
+            threshold_ms = data.get('threshold_ms')
+            monitor.configure(
+                enabled=data.get('enabled'),
+                threshold_ms=float(threshold_ms) if threshold_ms is not None else None,
+                notify=data.get('notify')
+            )
+        except (TypeError, ValueError):
+            return web.json_response({'error': 'invalid_config'}, status=400)
+    
+    return web.json_response(monitor.snapshot())
+
+async def api_admin_latency(request):
+    """Percentiles de latence source -> prédiction / résultat -> statut"""
+    if not request.cookies.get('admin_session'):
+        return web.json_response({'error': 'unauthorized'}, status=401)
+    
+    # Publiés par le process bot (le rôle web ne trace ni n'ingère rien)
+    import shared_state
+    snapshot = await shared_state.read_snapshot()
+    if snapshot is None or 'latency' not in snapshot:
+        return web.json_response({'error': 'bot_state_unavailable'}, status=503)
+    latency = snapshot['latency']
+    limit = min(int(request.query.get('limit', 20)), shared_state.LATENCY_RECENT)
+    return web.json_response({
+        'summary': latency['summary'],
+        'ingestion': latency['ingestion'],
+        'recent': latency['recent'][-limit:]
+    })
+
+async def api_admin_analytics(request):
+    """Statistiques détaillées (couleur, heure, rattrapage, séries), sans lecture du journal"""
+    if not request.cookies.get('admin_session'):
+        return web.json_response({'error': 'unauthorized'}, status=401)
+    
+    import shared_state
+    snapshot = await shared_state.read_snapshot()
+    if snapshot is None or 'analytics' not in snapshot:
+        return web.json_response({'error': 'bot_state_unavailable'}, status=503)
+    return web.json_response(snapshot['analytics'])
+
 async def api_admin_create_user(request):
     if not request.cookies.get('admin_session'):
         return web.json_response({'error': 'unauthorized'}, status=401)
@@ -317,137 +483,170 @@ async def api_admin_create_user(request):
         return web.json_response({'success': True, 'user': user})
     return web.json_response({'error': 'creation_failed'}, status=400)
 
-# ============ COMMANDES TELEGRAM ADMIN ============
+def _route_name(request) -> str:
+    """Gabarit de la route (pas l'URL brute) pour les labels de métriques"""
+    route = request.match_info.route.resource
+    return route.canonical if route is not None else 'unmatched'
 
-async def handle_admin_commands(event):
-    """Gère les commandes admin dans Telegram"""
-    if not event.is_private:
-        return
-    
-    sender_id = event.sender_id
-    if str(sender_id) != str(ADMIN_ID):
-        return
-    
-    text = event.message.message
-    parts = text.split()
-    command = parts[0].lower() if parts else ''
-    
+@web.middleware
+async def metrics_middleware(request, handler):
+    """Mesure la latence et le code de retour par route (gabarit, pas l'URL brute)"""
+    route_name = _route_name(request)
+    start = time.perf_counter()
+    status = 500
     try:
-        if command == '/list':
-            users = get_all_users()
-            msg = "📋 LISTE DES UTILISATEURS\n\n"
-            for u in users[:20]:  # Limite à 20
-                status = "🟢" if u['is_active'] else "🔴"
-                sub = u['subscription_end'][:10] if u['subscription_end'] else "Non abonné"
-                msg += f"{status} {u['first_name']} {u['last_name']}\n📧 {u['email']}\n📅 {sub}\n\n"
-            await event.reply(msg)
-            
-        elif command == '/add_time' and len(parts) >= 3:
-            email = parts[1]
-            days = int(parts[2])
-            user = get_user_by_email(email)
-            if user:
-                new_end = add_subscription_time(user['id'], days)
-                await event.reply(f"✅ {days} jours ajoutés à {email}\nNouvelle date: {new_end}")
-            else:
-                await event.reply(f"❌ Utilisateur {email} non trouvé")
-                
-        elif command == '/block' and len(parts) >= 2:
-            email = parts[1]
-            user = get_user_by_email(email)
-            if user:
-                block_user(user['id'])
-                await event.reply(f"🚫 {email} bloqué")
-            else:
-                await event.reply(f"❌ {email} non trouvé")
-                
-        elif command == '/unblock' and len(parts) >= 2:
-            email = parts[1]
-            user = get_user_by_email(email)
-            if user:
-                unblock_user(user['id'])
-                await event.reply(f"✅ {email} débloqué")
-            else:
-                await event.reply(f"❌ {email} non trouvé")
-                
-        elif command == '/clearall':
-            from database import clear_all_except_users
-            from bot_logic import state as bot_state
-            
-            # 1. Clear database
-            if clear_all_except_users():
-                # 2. Reset bot state
-                bot_state.predictions_enabled = True
-                bot_state.won_predictions = 0
-                bot_state.lost_predictions = 0
-                bot_state.total_predictions = 0
-                bot_state.prediction_history.clear()
-                bot_state.processed_messages.clear()
-                
-                # 3. Reset pause cycle
-                bot_state.pause_config['predictions_count'] = 0
-                bot_state.pause_config['is_paused'] = False
-                bot_state.pause_config['current_index'] = 0
-                
-                # 4. Clear verification state
-                bot_state.verification_state = {
-                    'predicted_number': None, 'predicted_suit': None,
-                    'current_check': 0, 'message_id': None,
-                    'channel_id': None, 'status': None, 'base_game': None
-                }
-                
-                await event.reply("✅ Système réinitialisé !\n- Base de données nettoyée (hors utilisateurs)\n- Compteurs à zéro\n- Prédictions automatiques reprises")
-            else:
-                await event.reply("❌ Erreur lors du nettoyage de la base de données")
-                
-        elif command == '/help':
-            await event.reply("""📚 COMMANDES ADMIN:
-
-/list - Liste des utilisateurs
-/add_time <email> <jours> - Ajouter du temps
-/block <email> - Bloquer utilisateur
-/unblock <email> - Débloquer utilisateur
-/stats - Statistiques
-
-Exemple: /add_time user@email.com 7""")
-            
-        elif command == '/stats':
-            from bot_logic import state as bot_state
-            await event.reply(f"""📊 STATISTIQUES BOT:
-
-🎯 Prédictions: {bot_state.total_predictions}
-✅ Gagnés: {bot_state.won_predictions}
-❌ Perdus: {bot_state.lost_predictions}
-📈 Win Rate: {get_win_rate()}%
-🎮 Jeu actuel: #{bot_state.current_game_number}""")
-            
-        elif command == '/log':
-            if event.message.photo:
-                await event.message.download_media("static/logo.png")
-                await event.reply("✅ Logo mis à jour avec succès ! Le changement sera visible au prochain rafraîchissement de la page.")
-            else:
-                await event.reply("📷 Veuillez envoyer l'image avec la commande /log en légende.")
-            
-    except Exception as e:
-        await event.reply(f"❌ Erreur: {e}")
+        response = await handler(request)
+        status = response.status
+        return response
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        metrics.HTTP_SECONDS.labels(request.method, route_name).observe(time.perf_counter() - start)
+        metrics.HTTP_REQUESTS.labels(request.method, route_name, str(status)).inc()
+
+async def readiness(request):
+    """Prêt quand les composants requis par le rôle sont disponibles (503 sinon)"""
+    components = startup_status['components']
+    required = startup_status.get('required', ['database', 'web', 'user_bot'])
+    ready = bool(components) and all(components.get(name) for name in required)
+    return web.json_response({
+        'ready': ready,
+        'role': startup_status.get('role', 'all'),
+        'components': components,
+        'timings_ms': startup_status['timings_ms']
+    }, status=200 if ready else 503)
+
+async def metrics_endpoint(request):
+    """Exposition Prometheus (protégée par METRICS_TOKEN si défini)"""
+    token = os.getenv('METRICS_TOKEN')
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return web.Response(status=401, text='unauthorized')
+    return web.Response(
+        text=metrics.render_metrics(),
+        content_type='text/plain',
+        charset='utf-8',
+        headers={'X-Content-Type-Options': 'nosniff'}
+    )
+
+# Rafraîchissement de web_active_sessions: /metrics ne lit que la mémoire
+ACTIVE_SESSIONS_INTERVAL = float(os.getenv('ACTIVE_SESSIONS_INTERVAL', '30'))
+
+async def active_sessions_refresher(app):
+    """Compte les sessions actives dans un thread, en tâche de fond du serveur web"""
+    from database import count_active_sessions
+
+    async def refresh():
+        while True:
+            try:
+                metrics.ACTIVE_SESSIONS.set(await asyncio.to_thread(count_active_sessions))
+            except Exception as e:
+                logger.warning(f"⚠️ Comptage sessions actives: {e}")
+            await asyncio.sleep(ACTIVE_SESSIONS_INTERVAL)
+
+    task = asyncio.create_task(refresh())
+    yield
+    task.cancel()
+
+# Routes coûteuses (PBKDF2) ou sensibles, limitées par IP et par email
+AUTH_ROUTES = frozenset(('/api/login', '/api/register', '/api/admin/login'))
+# Proxys de confiance devant le serveur: 0 (défaut) = ignorer X-Forwarded-For,
+# que le client peut forger; PROXY_HOPS=1 derrière le proxy de Render
+PROXY_HOPS = int(os.getenv('PROXY_HOPS', '0'))
+
+def client_ip(request) -> str:
+    """IP du client: request.remote, ou l'entrée ajoutée par notre proxy
+    (la plus à droite) de X-Forwarded-For si PROXY_HOPS est configuré"""
+    forwarded = request.headers.get('X-Forwarded-For')
+    if forwarded and PROXY_HOPS:
+        hops = [hop.strip() for hop in forwarded.split(',')]
+        return hops[-min(PROXY_HOPS, len(hops))]
+    return request.remote or 'unknown'
+
+@web.middleware
+async def auth_rate_limit_middleware(request, handler):
+    """429 avant tout calcul de mot de passe quand l'IP ou l'email a épuisé ses jetons"""
+    if request.method != 'POST' or request.path not in AUTH_ROUTES:
+        return await handler(request)
+    
+    key = 'ip'
+    wait = ratelimit.by_ip.take(client_ip(request))
+    if not wait:
+        # Formulaire lu une fois, aiohttp le garde pour la route
+        data = await request.post()
+        email = (data.get('email') or '').strip().lower()
+        if email:
+            key = 'email'
+            wait = ratelimit.by_email.take(email)
+    if wait:
+        ratelimit.AUTH_RATE_LIMITED.labels(request.path, key).inc()
+        retry_after = str(math.ceil(wait))
+        return web.json_response({'success': False, 'error': 'rate_limited', 'retry_after': int(retry_after)},
+                                 status=429, headers={'Retry-After': retry_after})
+    return await handler(request)
+
+@web.middleware
+async def compression_middleware(request, handler):
+    """gzip / brotli négociés selon Accept-Encoding (voir compression.py)"""
+    response = await handler(request)
+    accept = request.headers.get('Accept-Encoding', '')
+    if (not accept or request.method == 'HEAD' or response.status in (204, 304)
+            or 'Content-Encoding' in response.headers):
+        return response
+    if isinstance(response, web.Response):
+        content_type = response.content_type
+    else:
+        # FileResponse: type fixé seulement dans prepare(), on le déduit du chemin
+        content_type = mimetypes.guess_type(request.path)[0] or response.content_type
+    if not compression.compressible(content_type):
+        return response
+    
+    if isinstance(response, web.Response):
+        body = response.body
+        encoding = compression.choose_encoding(accept)
+        if encoding is None or not isinstance(body, (bytes, bytearray)) or len(body) < compression.COMPRESS_MIN_SIZE:
+            return response
+        route = _route_name(request)
+        if len(body) >= compression.COMPRESS_THREAD_SIZE:
+            body = await asyncio.to_thread(compression.compress, bytes(body), encoding, route)
+        else:
+            body = compression.compress(bytes(body), encoding, route)
+        response.body = body
+        response.headers['Content-Encoding'] = encoding
+    else:
+        # Flux (fichiers statiques): compression gzip au fil de l'envoi par aiohttp
+        # (hors requêtes partielles: les plages portent sur le fichier brut)
+        if 'Range' in request.headers or compression.choose_encoding(accept, ('gzip',)) is None:
+            return response
+        response.enable_compression(web.ContentCoding.gzip)
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
 
 @web.middleware
 async def cache_control_middleware(request, handler):
     response = await handler(request)
+    # Cache explicitement autorisé par la route (paquets de traduction versionnés)
+    if 'Cache-Control' in response.headers:
+        return response
     response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
     response.headers['Pragma'] = 'no-cache'
     response.headers['Expires'] = '0'
     return response
 
-def setup_web_app(bot_clients):
-    app = web.Application(middlewares=[cache_control_middleware])
+def setup_web_app(bot_clients, status=None):
+    app = web.Application(middlewares=[metrics_middleware, compression_middleware,
+                                       auth_rate_limit_middleware, cache_control_middleware])
     
-    global bot_client, admin_bot_client
+    global bot_client, admin_bot_client, startup_status
+    if status is not None:
+        startup_status = status
     bot_client = bot_clients.get('user')
     admin_bot_client = bot_clients.get('admin')
     
     # Ajouter handler commandes admin si bot admin disponible
     if admin_bot_client:
+        from telethon import events
+        
         @admin_bot_client.on(events.NewMessage(pattern='/'))
         async def admin_cmd_handler(event):
             await handle_admin_commands(event)
@@ -456,12 +655,14 @@ def setup_web_app(bot_clients):
     app.router.add_get('/', index)
     app.router.add_get('/login', login_page)
     app.router.add_get('/register', register_page)
+    app.router.add_get('/lang/{lang}.json', lang_bundle)
     
     app.router.add_post('/api/login', api_login)
     app.router.add_post('/api/register', api_register)
     app.router.add_post('/api/logout', api_logout)
     
     app.router.add_get('/api/predictions', api_predictions)
+    app.router.add_get('/api/predictions/history', api_predictions_history)
     
     # Admin
     app.router.add_get('/admin/login', admin_login_page)
@@ -470,9 +671,22 @@ def setup_web_app(bot_clients):
     app.router.add_get('/api/admin/users', api_admin_users)
     app.router.add_post('/api/admin/add-time', api_admin_add_time)
     app.router.add_post('/api/admin/block', api_admin_block)
+    app.router.add_post('/api/admin/bulk-subscriptions', api_admin_bulk_subscriptions)
+    app.router.add_get('/api/admin/broadcasts', api_admin_broadcasts)
+    app.router.add_post('/api/admin/broadcasts', api_admin_broadcasts)
+    app.router.add_post('/api/admin/broadcasts/{broadcast_id}/cancel', api_admin_broadcast_cancel)
     app.router.add_post('/api/admin/create-user', api_admin_create_user)
+    app.router.add_get('/api/admin/loop-health', api_admin_loop_health)
+    app.router.add_post('/api/admin/loop-health', api_admin_loop_health)
+    app.router.add_get('/api/admin/latency', api_admin_latency)
+    app.router.add_get('/api/admin/analytics', api_admin_analytics)
+    
+    # Métriques / disponibilité
+    app.router.add_get('/metrics', metrics_endpoint)
+    app.router.add_get('/ready', readiness)
     
     # Static
     app.router.add_static('/static/', path='static', name='static')
     
+    app.cleanup_ctx.append(active_sessions_refresher)
     return app
@@ -0,0 +1,212 @@
+"""
+Mode multi-workers (pré-fork) pour le rôle web
+
+Le process maître initialise la base une fois puis lance WEB_WORKERS
+process enfants. Chaque enfant a sa propre boucle asyncio et écoute le
+même port grâce à SO_REUSEPORT (le noyau répartit les connexions); à
+défaut, le maître ouvre la socket avant le fork et les enfants
+l'héritent. Les caches de chaque worker restent cohérents via
+invalidation.py (LISTEN/NOTIFY).
+
+Signaux du maître:
+  SIGTERM / SIGINT - arrêt propre de tous les workers
+  SIGHUP           - redémarrage progressif (un worker à la fois)
+Un worker qui meurt est relancé automatiquement, après un délai qui double
+à chaque mort rapprochée du même worker; s'il meurt CRASH_LIMIT fois en
+CRASH_WINDOW secondes (base injoignable, port pris...), le maître arrête
+tout et sort en code 1 pour que l'hébergeur voie l'échec.
+"""
+import os
+import sys
+import time
+import socket
+import signal
+import asyncio
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+# Délai laissé à un worker pour terminer ses requêtes en cours
+GRACEFUL_TIMEOUT = float(os.getenv('WEB_GRACEFUL_TIMEOUT', '10'))
+# Délai avant relance d'un worker mort, doublé à chaque mort rapprochée
+RESTART_BACKOFF = float(os.getenv('WEB_RESTART_BACKOFF', '0.5'))
+RESTART_BACKOFF_MAX = float(os.getenv('WEB_RESTART_BACKOFF_MAX', '30'))
+# Morts d'un même worker dans la fenêtre au-delà desquelles le maître abandonne
+CRASH_LIMIT = int(os.getenv('WEB_CRASH_LIMIT', '5'))
+CRASH_WINDOW = float(os.getenv('WEB_CRASH_WINDOW', '60'))
+
+
+def reuse_port_supported() -> bool:
+    return hasattr(socket, 'SO_REUSEPORT')
+
+
+def _shared_socket(host: str, port: int) -> socket.socket:
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(1024)
+    sock.set_inheritable(True)
+    return sock
+
+
+async def _serve(app_factory, host, port, sock, worker_id):
+    """Boucle d'un worker: sert l'application jusqu'au SIGTERM"""
+    from aiohttp import web
+
+    app = app_factory()
+    runner = web.AppRunner(app, handle_signals=False, shutdown_timeout=GRACEFUL_TIMEOUT)
+    await runner.setup()
+    if sock is not None:
+        site = web.SockSite(runner, sock)
+    else:
+        site = web.TCPSite(runner, host, port, reuse_port=True)
+    await site.start()
+    logger.info(f"👷 Worker {worker_id} (pid {os.getpid()}) prêt sur {host}:{port}")
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+    await stop.wait()
+
+    start = time.perf_counter()
+    # Arrête d'accepter puis attend les requêtes en cours (shutdown_timeout)
+    await runner.cleanup()
+    logger.info(f"👷 Worker {worker_id} arrêté en {(time.perf_counter() - start) * 1000:.0f} ms")
+
+
+def _spawn(app_factory, host, port, sock, worker_id, on_start=None) -> int:
+    pid = os.fork()
+    if pid:
+        return pid
+    # Enfant: signaux par défaut, boucle neuve
+    signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    code = 0
+    try:
+        async def run():
+            if on_start:
+                await on_start(worker_id)
+            await _serve(app_factory, host, port, sock, worker_id)
+        asyncio.run(run())
+    except Exception as e:
+        logger.error(f"💥 Worker {worker_id}: {e}")
+        code = 1
+    finally:
+        os._exit(code)
+
+
+def run_master(app_factory, workers: int, host: str = '0.0.0.0', port: int = 5000, on_start=None):
+    """Lance et supervise `workers` process enfants (bloquant)"""
+    sock = None if reuse_port_supported() else _shared_socket(host, port)
+    mode = 'SO_REUSEPORT' if sock is None else 'socket partagée'
+    logger.info(f"🌐 {workers} workers web sur {host}:{port} ({mode})")
+
+    children = {}  # pid -> worker_id
+    crashes = {}   # worker_id -> morts récentes (time.monotonic)
+    pending = {}   # worker_id -> relance prévue (time.monotonic)
+    state = {'stopping': False, 'reload': False, 'failed': False}
+
+    def start_worker(worker_id):
+        pid = _spawn(app_factory, host, port, sock, worker_id, on_start)
+        children[pid] = worker_id
+        return pid
+
+    def on_term(signum, frame):
+        state['stopping'] = True
+
+    def on_hup(signum, frame):
+        state['reload'] = True
+
+    signal.signal(signal.SIGTERM, on_term)
+    signal.signal(signal.SIGINT, on_term)
+    signal.signal(signal.SIGHUP, on_hup)
+
+    for worker_id in range(workers):
+        start_worker(worker_id)
+
+    while not state['stopping']:
+        if state['reload']:
+            state['reload'] = False
+            _rolling_restart(children, start_worker)
+        now = time.monotonic()
+        for worker_id, at in list(pending.items()):
+            if at <= now:
+                del pending[worker_id]
+                start_worker(worker_id)
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            pid = 0
+        if pid and pid in children:
+            worker_id = children.pop(pid)
+            if not state['stopping']:
+                _schedule_restart(worker_id, pid, status, crashes, pending, state)
+            continue
+        time.sleep(0.2)
+
+    _stop_all(children)
+    if state['failed']:
+        logger.error("💥 Workers web en échec répété, arrêt du maître")
+        sys.exit(1)
+    logger.info("👋 Workers web arrêtés")
+
+
+def _schedule_restart(worker_id, pid, status, crashes, pending, state):
+    """Relance différée (backoff exponentiel), ou abandon après CRASH_LIMIT morts rapprochées"""
+    now = time.monotonic()
+    recent = crashes.setdefault(worker_id, deque())
+    recent.append(now)
+    while now - recent[0] > CRASH_WINDOW:
+        recent.popleft()
+    if len(recent) >= CRASH_LIMIT:
+        logger.error(f"💥 Worker {worker_id} (pid {pid}) mort {len(recent)} fois en {CRASH_WINDOW:g}s")
+        state['stopping'] = state['failed'] = True
+        return
+    delay = min(RESTART_BACKOFF_MAX, RESTART_BACKOFF * 2 ** (len(recent) - 1))
+    logger.warning(f"⚠️ Worker {worker_id} (pid {pid}) terminé (statut {status}), relance dans {delay:g}s")
+    pending[worker_id] = now + delay
+
+
+def _rolling_restart(children, start_worker):
+    """Remplace chaque worker: nouveau d'abord, puis arrêt propre de l'ancien"""
+    logger.info("🔄 Redémarrage progressif des workers")
+    for pid, worker_id in list(children.items()):
+        start_worker(worker_id)
+        children.pop(pid, None)
+        _terminate(pid)
+
+
+def _terminate(pid, timeout=GRACEFUL_TIMEOUT + 2):
+    try:
+        os.kill(pid, signal.SIGTERM)
+    except ProcessLookupError:
+        return
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            done, _ = os.waitpid(pid, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if done:
+            return
+        time.sleep(0.05)
+    logger.warning(f"⚠️ Worker pid {pid} ne répond pas, SIGKILL")
+    try:
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+    except (ProcessLookupError, ChildProcessError):
+        pass
+
+
+def _stop_all(children):
+    for pid in list(children):
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            children.pop(pid)
+    for pid in list(children):
+        _terminate(pid)
+        children.pop(pid, None)